@@ -1,30 +1,86 @@
-from flask import Flask, Blueprint
+import os
+
+from flask import Flask, Blueprint, Response
 from flask_restful import Api
 
 from .api.config import config_by_name
-from .api.extensions import db, jwt
+from .api.extensions import db, migrate
 from .api.routes import register_resources
+from .commands import blacklist_cli
+from .api.auth import bearer_auth, static_bearer_required
+from .api.client_ip import client_ip_resolver
+from .api.pool_metrics import pool_metrics
+from .api.query_monitor import query_monitor
+from .api.request_metrics import request_metrics
+from .api.representations import BACKEND_ORJSON, FastJSONProvider, make_output_json, resolve_backend
+from .services.blacklist_cache import blacklist_cache
+from .services.blacklist_bloom import blacklist_bloom
+from .services.blacklist_snapshot import blacklist_snapshot
+from .services.blacklist_ingest_service import blacklist_ingest_queue
+from .services.read_replicas import replica_router
+from .services.blacklist_retention_service import blacklist_retention
 
-def create_api_blueprint() -> Blueprint:
+def create_api_blueprint(json_backend=None) -> Blueprint:
     
     bp = Blueprint("api_root", __name__) 
     api = Api(bp)
+    # Serializa las respuestas con orjson si está disponible (ver API_JSON_BACKEND)
+    api.representations["application/json"] = make_output_json(json_backend)
     register_resources(api)
     return bp
 
-def create_app(config_name="development"):
+def create_app(config_name=None):
+    # Sin nombre explícito se usa FLASK_ENV (p. ej. al arrancar con gunicorn)
+    config_name = config_name or os.getenv("FLASK_ENV", "development")
     app = Flask(__name__)
     app.config.from_object(config_by_name[config_name])
+    json_backend = resolve_backend(app.config.get("API_JSON_BACKEND"))
+    if json_backend == BACKEND_ORJSON:
+        app.json = FastJSONProvider(app)
 
     db.init_app(app)
-    jwt.init_app(app)
+    bearer_auth.init_app(app)
+    client_ip_resolver.init_app(app)
+    migrate.init_app(app, db)
+    blacklist_cache.init_app(app)
+    blacklist_bloom.init_app(app)
+    blacklist_snapshot.init_app(app)
+    blacklist_ingest_queue.init_app(app)
+    blacklist_retention.init_app(app)
+    with app.app_context():
+        pool_metrics.init_app(app, db.engine)
+        request_metrics.init_app(app, db.engine)
+        query_monitor.init_app(app, db.engine)
+    # Después de las métricas: instrumenta también los engines de las réplicas
+    replica_router.init_app(app)
 
-    app.register_blueprint(create_api_blueprint())
+    app.register_blueprint(create_api_blueprint(json_backend))
+    app.cli.add_command(blacklist_cli)
 
     @app.get("/ping")
     def ping():
         return "pong", 200
 
+    @app.get("/stats")
+    @static_bearer_required
+    def stats():
+        return {
+            "cache": blacklist_cache.stats(),
+            "bloom": blacklist_bloom.stats(),
+            "snapshot": blacklist_snapshot.stats(),
+            "ingest": blacklist_ingest_queue.stats(),
+            "replicas": replica_router.stats(),
+            "retention": blacklist_retention.stats(),
+            "pool": pool_metrics.stats(),
+            "auth": bearer_auth.stats(),
+        }, 200
+
+    @app.get("/metrics")
+    @static_bearer_required
+    def metrics():
+        body, content_type = request_metrics.export()
+        return Response(body, content_type=content_type)
+
     # ========================================
     # ENDPOINTS TEMPORALES PARA TESTING DE NEW RELIC
     # ========================================
@@ -1,18 +1,197 @@
+"""
+Autenticación por bearer token.
+
+Se aceptan tokens estáticos (STATIC_JWT_TOKENS, varios para poder rotarlos sin
+cortar el servicio, además del STATIC_JWT_TOKEN de siempre) y, con
+AUTH_JWT_ENABLED, JWT firmados que se verifican con PyJWT.
+
+Lo que no depende de la petición se prepara una sola vez en init_app: los
+tokens estáticos se codifican a bytes y las claves de verificación se cargan
+por algoritmo. Los JWT válidos se guardan en un caché LRU acotado hasta su
+exp, de modo que un cliente que repite el mismo token solo paga la
+verificación de la firma la primera vez.
+"""
 import hmac
-from flask import request, current_app
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
 
+import jwt
+from jwt.algorithms import get_default_algorithms
+from flask import request
+
+from .request_metrics import STAGE_AUTH, add_stage_time
+
+BEARER_PREFIX = "Bearer "
+
+
+def parse_token_list(value):
+    """Separa una lista de tokens por comas descartando los vacíos"""
+    return [token.strip() for token in (value or "").split(",") if token.strip()]
+
+
+def load_jwt_keys(algorithms, secret=None, public_key=None):
+    """
+    Prepara la clave de verificación de cada algoritmo aceptado
+
+    Los algoritmos HMAC (HS*) usan el secreto compartido y los asimétricos
+    (RS*, ES*, PS*, EdDSA) la clave pública en PEM, que requiere cryptography.
+
+    Raises:
+        ValueError: Si un algoritmo no está soportado o le falta su clave
+
+    Returns:
+        dict: algoritmo -> clave ya preparada para PyJWT
+    """
+    supported = get_default_algorithms()
+    keys = {}
+    for name in algorithms:
+        if name == "none" or name not in supported:
+            raise ValueError(f"Algoritmo JWT no soportado: {name}")
+
+        key = secret if name.startswith("HS") else public_key
+        if not key:
+            raise ValueError(f"Falta la clave para verificar JWT con {name}")
+        keys[name] = supported[name].prepare_key(key)
+    return keys
+
+
+class BearerAuth:
+    """
+    Valida el header Authorization de cada petición.
+
+    La comparación con los tokens estáticos es en tiempo constante y se hace
+    contra todos ellos, sin cortar en el primero que coincide.
+    """
+
+    def __init__(self, clock=time.time):
+        self._lock = threading.Lock()
+        self._verified = OrderedDict()
+        self._clock = clock
+        self._jwt = jwt.PyJWT()
+        self._tokens = ()
+        self._jwt_keys = {}
+        self._decode_options = {}
+        self.jwt_enabled = False
+        self.cache_size = 0
+        self.cache_ttl = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """Precalcula los tokens y las claves a partir de la configuración"""
+        config = app.config
+        tokens = parse_token_list(config.get("STATIC_JWT_TOKENS"))
+        legacy = (config.get("STATIC_JWT_TOKEN") or "").strip()
+        if legacy and legacy not in tokens:
+            tokens.append(legacy)
+        self._tokens = tuple(token.encode("utf-8") for token in tokens)
+
+        self.jwt_enabled = config.get("AUTH_JWT_ENABLED", False)
+        self._jwt_keys = {}
+        if self.jwt_enabled:
+            # Sin clave explícita no se usa JWT_SECRET_KEY: su valor por
+            # defecto está en el código y permitiría firmar tokens válidos
+            if not (config.get("AUTH_JWT_SECRET") or config.get("AUTH_JWT_PUBLIC_KEY")):
+                raise ValueError("AUTH_JWT_ENABLED requiere AUTH_JWT_SECRET o AUTH_JWT_PUBLIC_KEY")
+            self._jwt_keys = load_jwt_keys(
+                parse_token_list(config.get("AUTH_JWT_ALGORITHMS", "HS256")),
+                secret=config.get("AUTH_JWT_SECRET"),
+                public_key=config.get("AUTH_JWT_PUBLIC_KEY"),
+            )
+        self._decode_options = {
+            "audience": config.get("AUTH_JWT_AUDIENCE") or None,
+            "issuer": config.get("AUTH_JWT_ISSUER") or None,
+            "leeway": config.get("AUTH_JWT_LEEWAY", 0),
+        }
+        self.cache_size = config.get("AUTH_JWT_CACHE_SIZE", 10000)
+        self.cache_ttl = config.get("AUTH_JWT_CACHE_TTL", 300.0)
+        self.clear()
+
+    def clear(self):
+        """Descarta los JWT verificados (p. ej. tras rotar la clave)"""
+        with self._lock:
+            self._verified.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def check(self, auth_header):
+        """
+        Valida un header Authorization.
+
+        Retorna None si es válido o la respuesta de error (body, status) en otro caso.
+        """
+        if not auth_header.startswith(BEARER_PREFIX):
+            return {"message": "Unauthorized"}, 401
+        token = auth_header[len(BEARER_PREFIX):].strip()
+
+        if token and (self._match_static(token.encode("utf-8"))
+                      or (self.jwt_enabled and self._verify_jwt(token))):
+            return None
+        return {"message": "Forbidden"}, 403
+
+    def _match_static(self, candidate):
+        matched = False
+        for expected in self._tokens:
+            matched |= hmac.compare_digest(candidate, expected)
+        return matched
+
+    def _verify_jwt(self, token):
+        now = self._clock()
+        with self._lock:
+            expires_at = self._verified.get(token)
+            if expires_at is not None:
+                if expires_at > now:
+                    self._verified.move_to_end(token)
+                    self.hits += 1
+                    return True
+                del self._verified[token]
+            self.misses += 1
+
+        try:
+            algorithm = jwt.get_unverified_header(token).get("alg")
+            key = self._jwt_keys.get(algorithm) if isinstance(algorithm, str) else None
+            if key is None:
+                return False
+            claims = self._jwt.decode(token, key, algorithms=[algorithm], **self._decode_options)
+        except jwt.InvalidTokenError:
+            return False
+
+        if self.cache_size > 0:
+            expires_at = now + self.cache_ttl
+            if isinstance(claims.get("exp"), (int, float)):
+                expires_at = min(expires_at, claims["exp"])
+            with self._lock:
+                self._verified[token] = expires_at
+                self._verified.move_to_end(token)
+                while len(self._verified) > self.cache_size:
+                    self._verified.popitem(last=False)
+        return True
+
+    def stats(self):
+        """Retorna los contadores del caché de JWT verificados"""
+        with self._lock:
+            return {
+                "static_tokens": len(self._tokens),
+                "jwt_enabled": self.jwt_enabled,
+                "jwt_cache_size": len(self._verified),
+                "jwt_cache_hits": self.hits,
+                "jwt_cache_misses": self.misses,
+            }
+
+
+bearer_auth = BearerAuth()
+
+
 def static_bearer_required(fn):
-    """Decorator to protect routes with a static bearer token."""
+    """Protege una ruta con bearer token (estático o JWT, ver BearerAuth)"""
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        auth = request.headers.get("Authorization", "")
-        if not auth.startswith("Bearer "):
-            return {"message": "Unauthorized"}, 401
-        token = auth.split("Bearer ", 1)[1].strip()
-
-        expected = current_app.config["STATIC_JWT_TOKEN"]
-        if not token or not hmac.compare_digest(token, expected):
-            return {"message": "Forbidden"}, 403
+        start = time.perf_counter()
+        error = bearer_auth.check(request.environ.get("HTTP_AUTHORIZATION", ""))
+        add_stage_time(STAGE_AUTH, time.perf_counter() - start)
+        if error:
+            return error
         return fn(*args, **kwargs)
     return wrapper
@@ -0,0 +1,186 @@
+"""
+IP del cliente detrás de proxies de confianza.
+
+Solo se confía en X-Forwarded-For hasta donde llegan los proxies propios:
+por cantidad de saltos (TRUSTED_PROXY_COUNT, como werkzeug ProxyFix) o por
+redes (TRUSTED_PROXY_CIDRS, que tiene prioridad). Con CLIENT_IP_HEADER se
+puede usar en su lugar el header que fija el borde (p. ej. CF-Connecting-IP),
+siempre que la petición venga de un proxy de confianza; por eso requiere
+TRUSTED_PROXY_CIDRS: contando saltos no se sabe si el header lo puso el
+borde o el cliente.
+
+ClientIpMiddleware resuelve la IP una vez por petición y la deja en el
+environ; las direcciones se validan y se guardan en forma compacta, así
+que nunca se almacena algo que no sea una IP.
+"""
+import ipaddress
+import socket
+
+CLIENT_IP_ENVIRON_KEY = 'blacklist.client_ip'
+FORWARDED_FOR_HEADER = 'X-Forwarded-For'
+FORWARDED_FOR_ENVIRON = 'HTTP_X_FORWARDED_FOR'
+
+_V4_MAPPED_PREFIX = b'\x00' * 10 + b'\xff\xff'
+
+
+def _parse(value):
+    """
+    Retorna (familia, bytes) de una IP o None. inet_pton valida igual de
+    estricto que ipaddress pero es varias veces más rápido en cada petición.
+    """
+    # Acepta puerto (1.2.3.4:80, [::1]:80) y zona IPv6 (fe80::1%eth0), que se descartan
+    if not value:
+        return None
+    value = value.strip()
+    if value.startswith('['):
+        value = value[1:].split(']', 1)[0]
+    elif value.count(':') == 1:
+        value = value.split(':', 1)[0]
+    value = value.split('%', 1)[0]
+
+    family = socket.AF_INET6 if ':' in value else socket.AF_INET
+    try:
+        packed = socket.inet_pton(family, value)
+    except (OSError, ValueError):
+        return None
+    if family == socket.AF_INET6 and packed[:12] == _V4_MAPPED_PREFIX:
+        return socket.AF_INET, packed[12:]
+    return family, packed
+
+
+def _format(parsed):
+    return socket.inet_ntop(*parsed) if parsed is not None else None
+
+
+def parse_ip(value):
+    """Retorna la IP en forma compacta o None si el valor no es una IP"""
+    return _format(_parse(value))
+
+
+def parse_networks(value):
+    """
+    Convierte una lista de redes separadas por comas (CIDR o IP sola)
+
+    Raises:
+        ValueError: Si alguna red no es válida
+    """
+    return tuple(
+        ipaddress.ip_network(network.strip(), strict=False)
+        for network in (value or '').split(',') if network.strip()
+    )
+
+
+def _environ_key(header):
+    return 'HTTP_' + header.upper().replace('-', '_')
+
+
+class ClientIpResolver:
+    """Determina la IP del cliente a partir de la dirección remota y los headers de proxy"""
+
+    def __init__(self, proxy_count=1, trusted_networks=(), client_header=None):
+        self.proxy_count = proxy_count
+        self.trusted_networks = trusted_networks
+        self.client_header = client_header
+        self._check_client_header()
+
+    def _check_client_header(self):
+        """
+        Raises:
+            ValueError: Si hay CLIENT_IP_HEADER sin TRUSTED_PROXY_CIDRS
+        """
+        if self.client_header and not self._trusted_masks:
+            raise ValueError('CLIENT_IP_HEADER requiere TRUSTED_PROXY_CIDRS')
+
+    @property
+    def trusted_networks(self):
+        return self._trusted_networks
+
+    @trusted_networks.setter
+    def trusted_networks(self, networks):
+        self._trusted_networks = tuple(networks)
+        # Cada red como (familia, prefijo, máscara) para comparar enteros
+        self._trusted_masks = tuple(
+            (socket.AF_INET if network.version == 4 else socket.AF_INET6,
+             int(network.network_address), int(network.netmask))
+            for network in self._trusted_networks
+        )
+
+    def init_app(self, app):
+        """Lee la configuración e instala ClientIpMiddleware en la aplicación"""
+        self.proxy_count = app.config.get('TRUSTED_PROXY_COUNT', 1)
+        self.trusted_networks = parse_networks(app.config.get('TRUSTED_PROXY_CIDRS'))
+        self.client_header = app.config.get('CLIENT_IP_HEADER') or None
+        self._check_client_header()
+        app.wsgi_app = ClientIpMiddleware(app.wsgi_app, self)
+
+    def _is_trusted(self, parsed):
+        family, packed = parsed
+        address = int.from_bytes(packed, 'big')
+        return any(family == network_family and address & mask == prefix
+                   for network_family, prefix, mask in self._trusted_masks)
+
+    def resolve(self, remote_addr, forwarded_for=None, client_header_value=None):
+        """
+        Retorna la IP del cliente o None si no hay ninguna válida
+
+        Args:
+            remote_addr (str): Dirección de la conexión directa
+            forwarded_for (str): Valor de X-Forwarded-For
+            client_header_value (str): Valor de CLIENT_IP_HEADER
+        """
+        if self._trusted_masks:
+            peer = _parse(remote_addr)
+            if peer is None or not self._is_trusted(peer):
+                return _format(peer)
+            client = _parse(client_header_value)
+            if client is not None:
+                return _format(client)
+            # De derecha a izquierda, el primer salto que no es un proxy propio
+            for value in reversed((forwarded_for or '').split(',')):
+                ip = _parse(value)
+                if ip is None:
+                    break
+                peer = ip
+                if not self._is_trusted(ip):
+                    break
+            return _format(peer)
+
+        if self.proxy_count > 0:
+            hops = forwarded_for.split(',') if forwarded_for else []
+            if len(hops) >= self.proxy_count:
+                client = _parse(hops[-self.proxy_count])
+                if client is not None:
+                    return _format(client)
+
+        return parse_ip(remote_addr)
+
+    def resolve_environ(self, environ):
+        """Resuelve la IP a partir de un environ WSGI"""
+        return self.resolve(
+            environ.get('REMOTE_ADDR'),
+            environ.get(FORWARDED_FOR_ENVIRON),
+            environ.get(_environ_key(self.client_header)) if self.client_header else None,
+        )
+
+    def resolve_headers(self, headers, remote_addr):
+        """Resuelve la IP a partir de los headers (werkzeug Headers) de una petición ASGI"""
+        return self.resolve(
+            remote_addr,
+            ', '.join(headers.getlist(FORWARDED_FOR_HEADER)) or None,
+            headers.get(self.client_header) if self.client_header else None,
+        )
+
+
+class ClientIpMiddleware:
+    """Middleware WSGI que guarda la IP del cliente en environ[CLIENT_IP_ENVIRON_KEY]"""
+
+    def __init__(self, wsgi_app, resolver):
+        self.wsgi_app = wsgi_app
+        self.resolver = resolver
+
+    def __call__(self, environ, start_response):
+        environ[CLIENT_IP_ENVIRON_KEY] = self.resolver.resolve_environ(environ)
+        return self.wsgi_app(environ, start_response)
+
+
+client_ip_resolver = ClientIpResolver()
@@ -1,5 +1,41 @@
 import os
 
+from .pool_metrics import TimedQueuePool
+
+
+def _env_bool(name, default):
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+def engine_options_from_env():
+    """
+    Construye SQLALCHEMY_ENGINE_OPTIONS a partir de variables de entorno.
+
+    Los timeouts por conexión (statement_timeout y lock_timeout, en ms) se
+    envían a Postgres como opciones de arranque de la sesión.
+    """
+    options = {
+        "poolclass": TimedQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", "true"),
+    }
+
+    session_options = []
+    statement_timeout = os.getenv("DB_STATEMENT_TIMEOUT_MS")
+    if statement_timeout:
+        session_options.append(f"-c statement_timeout={int(statement_timeout)}")
+    lock_timeout = os.getenv("DB_LOCK_TIMEOUT_MS")
+    if lock_timeout:
+        session_options.append(f"-c lock_timeout={int(lock_timeout)}")
+    if session_options:
+        options["connect_args"] = {"options": " ".join(session_options)}
+
+    return options
+
+
 class BaseConfig:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "clave-super-secreta")
@@ -10,6 +46,108 @@ class BaseConfig:
         "eyJ1c2VyIjoic3RhdGljLXVzZXIiLCJyb2xlIjoiYWRtaW4ifQ."
         "6bUHdYJk1cRnn-SVZEXAMPLEpR0fZ2mJb_YWbl8pW1lM"
     )
+    # Tokens estáticos adicionales separados por comas (rotación sin cortes)
+    STATIC_JWT_TOKENS = os.getenv("STATIC_JWT_TOKENS", "")
+
+    # Verificación de JWT firmados; requiere AUTH_JWT_SECRET o AUTH_JWT_PUBLIC_KEY
+    AUTH_JWT_ENABLED = _env_bool("AUTH_JWT_ENABLED", "false")
+    AUTH_JWT_ALGORITHMS = os.getenv("AUTH_JWT_ALGORITHMS", "HS256")
+    AUTH_JWT_SECRET = os.getenv("AUTH_JWT_SECRET")
+    AUTH_JWT_PUBLIC_KEY = os.getenv("AUTH_JWT_PUBLIC_KEY")
+    AUTH_JWT_AUDIENCE = os.getenv("AUTH_JWT_AUDIENCE")
+    AUTH_JWT_ISSUER = os.getenv("AUTH_JWT_ISSUER")
+    AUTH_JWT_LEEWAY = float(os.getenv("AUTH_JWT_LEEWAY", "0"))
+    AUTH_JWT_CACHE_SIZE = int(os.getenv("AUTH_JWT_CACHE_SIZE", "10000"))
+    AUTH_JWT_CACHE_TTL = float(os.getenv("AUTH_JWT_CACHE_TTL", "300"))
+
+    # IP del cliente: proxies de confianza por saltos (1 = ALB) o por redes
+    # (CIDR, tienen prioridad) y header opcional fijado por el borde
+    TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "1"))
+    TRUSTED_PROXY_CIDRS = os.getenv("TRUSTED_PROXY_CIDRS", "")
+    CLIENT_IP_HEADER = os.getenv("CLIENT_IP_HEADER", "")
+
+    # Histogramas de latencia por etapa en /metrics (ver app/api/request_metrics.py)
+    METRICS_ENABLED = _env_bool("METRICS_ENABLED", "true")
+
+    # Consultas lentas (ms, 0 = sin registro) y presupuesto de sentencias por
+    # ruta (query_budget): con QUERY_BUDGET_ENFORCED la petición falla
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+    QUERY_BUDGET_ENFORCED = _env_bool("QUERY_BUDGET_ENFORCED", "false")
+
+    # Serialización JSON de la API: orjson (si está instalado) o json
+    API_JSON_BACKEND = os.getenv("API_JSON_BACKEND", "orjson")
+
+    # Caché de consultas a la blacklist (0 = deshabilitado). Backend: local
+    # (por worker), shared (mmap compartido por los workers del host) o redis
+    BLACKLIST_CACHE_MAX_SIZE = int(os.getenv("BLACKLIST_CACHE_MAX_SIZE", "10000"))
+    BLACKLIST_CACHE_TTL = float(os.getenv("BLACKLIST_CACHE_TTL", "30"))
+    BLACKLIST_CACHE_BACKEND = os.getenv("BLACKLIST_CACHE_BACKEND", "local")
+    BLACKLIST_CACHE_SHARED_PATH = os.getenv("BLACKLIST_CACHE_SHARED_PATH", "")
+    BLACKLIST_CACHE_REDIS_URL = os.getenv("BLACKLIST_CACHE_REDIS_URL", "redis://localhost:6379/0")
+    BLACKLIST_CACHE_REDIS_TIMEOUT = float(os.getenv("BLACKLIST_CACHE_REDIS_TIMEOUT", "0.1"))
+
+    # Filtro de Bloom para responder consultas negativas sin ir a la base de datos
+    BLACKLIST_BLOOM_ENABLED = _env_bool("BLACKLIST_BLOOM_ENABLED", "false")
+    BLACKLIST_BLOOM_CAPACITY = int(os.getenv("BLACKLIST_BLOOM_CAPACITY", "1000000"))
+    BLACKLIST_BLOOM_FP_RATE = float(os.getenv("BLACKLIST_BLOOM_FP_RATE", "0.01"))
+    BLACKLIST_BLOOM_REBUILD_SECONDS = float(os.getenv("BLACKLIST_BLOOM_REBUILD_SECONDS", "300"))
+
+    # Carga masiva: máximo de elementos por petición y filas por INSERT
+    BLACKLIST_BULK_MAX_ITEMS = int(os.getenv("BLACKLIST_BULK_MAX_ITEMS", "50000"))
+    BLACKLIST_BULK_CHUNK_SIZE = int(os.getenv("BLACKLIST_BULK_CHUNK_SIZE", "1000"))
+
+    # Creación: sync (INSERT por petición) o async (cola local en SQLite WAL
+    # que un hilo vacía por lotes; responde 202 y 503 con la cola llena)
+    BLACKLIST_CREATE_MODE = os.getenv("BLACKLIST_CREATE_MODE", "sync")
+    BLACKLIST_INGEST_QUEUE_PATH = os.getenv("BLACKLIST_INGEST_QUEUE_PATH", "blacklist-ingest.db")
+    BLACKLIST_INGEST_MAX_DEPTH = int(os.getenv("BLACKLIST_INGEST_MAX_DEPTH", "100000"))
+    BLACKLIST_INGEST_BATCH_SIZE = int(os.getenv("BLACKLIST_INGEST_BATCH_SIZE", "1000"))
+    BLACKLIST_INGEST_FLUSH_INTERVAL = float(os.getenv("BLACKLIST_INGEST_FLUSH_INTERVAL", "0.2"))
+    BLACKLIST_INGEST_SYNCHRONOUS = os.getenv("BLACKLIST_INGEST_SYNCHRONOUS", "NORMAL")
+    BLACKLIST_INGEST_FLUSHER_ENABLED = _env_bool("BLACKLIST_INGEST_FLUSHER_ENABLED", "true")
+
+    # Purga de filas expiradas (expires_at): hilo por proceso opcional, cada
+    # cuánto corre, filas por lote (una transacción corta cada uno), máximo de
+    # lotes por corrida (0 = hasta terminar) y pausa entre lotes
+    BLACKLIST_RETENTION_ENABLED = _env_bool("BLACKLIST_RETENTION_ENABLED", "false")
+    BLACKLIST_RETENTION_INTERVAL = float(os.getenv("BLACKLIST_RETENTION_INTERVAL", "300"))
+    BLACKLIST_RETENTION_BATCH_SIZE = int(os.getenv("BLACKLIST_RETENTION_BATCH_SIZE", "1000"))
+    BLACKLIST_RETENTION_MAX_BATCHES = int(os.getenv("BLACKLIST_RETENTION_MAX_BATCHES", "0"))
+    BLACKLIST_RETENTION_PAUSE = float(os.getenv("BLACKLIST_RETENTION_PAUSE", "0.1"))
+
+    # Listado paginado (GET /blacklists): máximo de filas por página
+    BLACKLIST_LIST_MAX_LIMIT = int(os.getenv("BLACKLIST_LIST_MAX_LIMIT", "500"))
+
+    # Exportación: filas leídas por bloque del cursor del servidor
+    BLACKLIST_EXPORT_BATCH_SIZE = int(os.getenv("BLACKLIST_EXPORT_BATCH_SIZE", "1000"))
+
+    # Feed de cambios: tamaño de lote, long-polling y margen para commits lentos
+    BLACKLIST_CHANGES_MAX_LIMIT = int(os.getenv("BLACKLIST_CHANGES_MAX_LIMIT", "5000"))
+    BLACKLIST_CHANGES_MAX_WAIT = float(os.getenv("BLACKLIST_CHANGES_MAX_WAIT", "20"))
+    BLACKLIST_CHANGES_POLL_INTERVAL = float(os.getenv("BLACKLIST_CHANGES_POLL_INTERVAL", "0.5"))
+    BLACKLIST_CHANGES_SETTLE_SECONDS = float(os.getenv("BLACKLIST_CHANGES_SETTLE_SECONDS", "2"))
+
+    # Réplicas de lectura (URLs separadas por comas) para consultas, listado y
+    # exportación: read-your-writes por cliente tras una creación, tiempo
+    # fuera de rotación tras un fallo, revisión periódica y retraso máximo
+    # tolerado en Postgres (0 = sin revisar el retraso)
+    DATABASE_REPLICA_URLS = os.getenv("DATABASE_REPLICA_URLS", "")
+    DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
+    DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "10"))
+    DB_REPLICA_HEALTH_INTERVAL = float(os.getenv("DB_REPLICA_HEALTH_INTERVAL", "5"))
+    DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "0"))
+
+    # URL para el engine asíncrono de app.asgi (por defecto se deriva de la URL síncrona)
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+    # Consultas desde la base de datos (db) o desde el snapshot en mmap
+    # (snapshot, réplicas de solo lectura; ver flask blacklist snapshot)
+    BLACKLIST_LOOKUP_MODE = os.getenv("BLACKLIST_LOOKUP_MODE", "db")
+    BLACKLIST_SNAPSHOT_PATH = os.getenv("BLACKLIST_SNAPSHOT_PATH", "blacklist.snapshot")
+    BLACKLIST_SNAPSHOT_CHECK_SECONDS = float(os.getenv("BLACKLIST_SNAPSHOT_CHECK_SECONDS", "5"))
+
+    # Consulta por lotes: máximo de emails por petición
+    BLACKLIST_LOOKUP_MAX_BATCH = int(os.getenv("BLACKLIST_LOOKUP_MAX_BATCH", "1000"))
 
 class DevelopmentConfig(BaseConfig):
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///dev.db")
@@ -18,9 +156,15 @@ class DevelopmentConfig(BaseConfig):
 class TestingConfig(BaseConfig):
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     TESTING = True
+    BLACKLIST_CACHE_MAX_SIZE = 0
+    BLACKLIST_BLOOM_ENABLED = False
+    BLACKLIST_CHANGES_SETTLE_SECONDS = 0
+    QUERY_BUDGET_ENFORCED = True
+    DATABASE_REPLICA_URLS = ""
 
 class ProductionConfig(BaseConfig):
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options_from_env()
 
 config_by_name = {
     "development": DevelopmentConfig,
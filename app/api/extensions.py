@@ -1,5 +1,24 @@
+from contextvars import ContextVar
+
 from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager
+from flask_sqlalchemy.session import Session
+from flask_migrate import Migrate
+
+# Engine de la réplica donde se ejecuta la lectura en curso (None = primario);
+# lo fija replica_router.read (ver app/services/read_replicas.py)
+read_engine = ContextVar('blacklist_read_engine', default=None)
+
+
+class RoutingSession(Session):
+    """Sesión que envía a la réplica elegida las lecturas enrutadas; el resto va al primario"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = read_engine.get()
+        # Los flush y las sentencias DML nunca salen del primario
+        if engine is not None and bind is None and not self._flushing and not getattr(clause, 'is_dml', False):
+            return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
 
-db = SQLAlchemy()
-jwt = JWTManager()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+migrate = Migrate()
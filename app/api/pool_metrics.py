@@ -0,0 +1,123 @@
+import threading
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from .request_metrics import LATENCY_BUCKETS
+
+# max_overflow por defecto de QueuePool
+DEFAULT_MAX_OVERFLOW = 10
+
+CHECKOUT_WAIT = Histogram(
+    'blacklist_db_pool_checkout_wait_seconds', 'Espera para obtener una conexión del pool',
+    buckets=LATENCY_BUCKETS,
+)
+CHECKOUT_TIMEOUTS = Counter(
+    'blacklist_db_pool_checkout_timeouts_total', 'Checkouts que agotaron pool_timeout',
+)
+# Cada worker tiene su propio pool: en multiproceso se suman las conexiones
+# en uso y se reporta la saturación del worker más cargado
+CHECKED_OUT = Gauge('blacklist_db_pool_checked_out', 'Conexiones del pool en uso',
+                    multiprocess_mode='livesum')
+SATURATION = Gauge('blacklist_db_pool_saturation', 'Conexiones en uso sobre pool_size + max_overflow',
+                   multiprocess_mode='livemax')
+
+
+class PoolMetrics:
+    """
+    Métricas del pool de conexiones: tiempo de espera al obtener una conexión
+    (checkout) y saturación del pool.
+
+    Los tiempos los registra TimedQueuePool; la ocupación se lee del pool del
+    engine configurado en init_app. Además de /stats se exportan en /metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engine = None
+        self.max_overflow = DEFAULT_MAX_OVERFLOW
+        self.reset()
+
+    def init_app(self, app, engine):
+        """Asocia las métricas al engine de la aplicación"""
+        self._engine = engine
+        engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        self.max_overflow = engine_options.get('max_overflow', DEFAULT_MAX_OVERFLOW)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def record_checkout(self, wait_seconds, pool=None):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+        CHECKOUT_WAIT.observe(wait_seconds)
+        self.record_usage(pool)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+        CHECKOUT_TIMEOUTS.inc()
+
+    def record_usage(self, pool):
+        """Actualiza los gauges de ocupación (solo para el pool del engine principal)"""
+        if pool is not None and self._engine is not None and pool is self._engine.pool:
+            CHECKED_OUT.set(pool.checkedout())
+            SATURATION.set(self._saturation(pool))
+
+    def _saturation(self, pool):
+        capacity = pool.size() + max(self.max_overflow, 0)
+        return pool.checkedout() / capacity if capacity else 0.0
+
+    def stats(self, pool=None):
+        """Retorna contadores de espera y ocupación actual del pool"""
+        with self._lock:
+            stats = {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_max': self.wait_seconds_max,
+                'wait_seconds_avg': self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+            }
+
+        if pool is None and self._engine is not None:
+            pool = self._engine.pool
+        if isinstance(pool, QueuePool):
+            stats.update({
+                'pool_size': pool.size(),
+                'max_overflow': self.max_overflow,
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow(),
+                'saturation': self._saturation(pool),
+            })
+        return stats
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mide cuánto espera cada checkout de conexión"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        pool_metrics.record_checkout(time.perf_counter() - start, self)
+        return connection
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        pool_metrics.record_usage(self)
+
+
+# Instancia compartida; se asocia al engine en create_app
+pool_metrics = PoolMetrics()
@@ -0,0 +1,170 @@
+"""
+Registro de consultas lentas y presupuesto de consultas por petición.
+
+Los eventos de cursor de SQLAlchemy miden cada sentencia: las que superan
+SLOW_QUERY_THRESHOLD_MS se registran con los parámetros ocultos (solo sus
+nombres o su cantidad), y cada una suma al contador de la petición en curso.
+
+query_budget(n) declara cuántas sentencias puede ejecutar una ruta. Si la
+supera se registra una advertencia; con QUERY_BUDGET_ENFORCED (activo en
+TestingConfig) la petición falla con QueryBudgetExceeded, de modo que una
+consulta extra en el camino caliente rompe las pruebas en CI.
+"""
+import inspect
+import logging
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+REDACTED = '?'
+MAX_LOGGED_STATEMENT = 1000
+
+# Contador de sentencias de la petición en curso; None fuera de una petición
+_counter = ContextVar('blacklist_query_counter', default=None)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Una ruta ejecutó más sentencias SQL que su presupuesto"""
+
+
+class QueryCounter:
+    """Sentencias ejecutadas en la petición en curso"""
+
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count = 0
+
+
+def current_query_count():
+    """Sentencias ejecutadas hasta ahora en la petición en curso (None fuera de una)"""
+    counter = _counter.get()
+    return counter.count if counter is not None else None
+
+
+def redact_parameters(parameters, executemany=False):
+    """Reemplaza los valores de los parámetros conservando su forma"""
+    if executemany:
+        return f'<{len(parameters)} filas>'
+    if isinstance(parameters, dict):
+        return {key: REDACTED for key in parameters}
+    if isinstance(parameters, (list, tuple)):
+        return [REDACTED] * len(parameters)
+    return REDACTED
+
+
+class QueryMonitor:
+    """Mide las sentencias del engine y lleva la cuenta por petición"""
+
+    def __init__(self):
+        self.slow_threshold = None
+        self.enforce_budget = False
+
+    def init_app(self, app, engine):
+        """Instala los eventos del engine y los hooks de la petición"""
+        threshold_ms = app.config.get('SLOW_QUERY_THRESHOLD_MS', 200)
+        self.slow_threshold = threshold_ms / 1000.0 if threshold_ms and threshold_ms > 0 else None
+        self.enforce_budget = app.config.get('QUERY_BUDGET_ENFORCED', False)
+
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        self.instrument_engine(engine)
+
+    def instrument_engine(self, engine):
+        """Cuenta y mide las sentencias del engine (también réplicas)"""
+        if not event.contains(engine, 'before_cursor_execute', self._before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    @staticmethod
+    def _before_request():
+        _counter.set(QueryCounter())
+
+    @staticmethod
+    def _teardown_request(exc):
+        _counter.set(None)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # En el contexto de ejecución: se descarta aunque la sentencia falle
+        if self.slow_threshold is not None and context is not None:
+            context.query_monitor_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        counter = _counter.get()
+        if counter is not None:
+            counter.count += 1
+
+        start = getattr(context, 'query_monitor_start', None)
+        if self.slow_threshold is None or start is None:
+            return
+        elapsed = time.perf_counter() - start
+        if elapsed >= self.slow_threshold:
+            logger.warning(
+                'Consulta lenta (%.1f ms): %s; parámetros: %s',
+                elapsed * 1000, statement[:MAX_LOGGED_STATEMENT], redact_parameters(parameters, executemany),
+            )
+
+    def check_budget(self, name, executed, budget):
+        """
+        Compara las sentencias ejecutadas con el presupuesto de una ruta
+
+        Raises:
+            QueryBudgetExceeded: Si se superó y QUERY_BUDGET_ENFORCED está activo
+        """
+        if executed <= budget:
+            return
+        message = f'{name} ejecutó {executed} sentencias SQL (presupuesto: {budget})'
+        if self.enforce_budget:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+query_monitor = QueryMonitor()
+
+
+def query_budget(budget):
+    """
+    Decorador que limita las sentencias SQL que puede ejecutar una ruta.
+    También acepta corrutinas (las rutas que app/asgi.py atiende en el event loop)
+    """
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                counter = _counter.get()
+                token = None
+                if counter is None:
+                    counter = QueryCounter()
+                    token = _counter.set(counter)
+                start = counter.count
+                try:
+                    result = await fn(*args, **kwargs)
+                finally:
+                    if token is not None:
+                        _counter.reset(token)
+                query_monitor.check_budget(fn.__qualname__, counter.count - start, budget)
+                return result
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            counter = _counter.get()
+            token = None
+            if counter is None:
+                # Llamada fuera de una petición (p. ej. directa en una prueba)
+                counter = QueryCounter()
+                token = _counter.set(counter)
+            start = counter.count
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                if token is not None:
+                    _counter.reset(token)
+            query_monitor.check_budget(fn.__qualname__, counter.count - start, budget)
+            return result
+        return wrapper
+    return decorator
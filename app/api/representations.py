@@ -0,0 +1,86 @@
+"""
+Serialización JSON de la API.
+
+Con orjson instalado las respuestas y los cuerpos de las peticiones se
+procesan con orjson; sin él (o con API_JSON_BACKEND=json) se usa el módulo
+json de la librería estándar. Ambos producen JSON equivalente: orjson escribe
+los caracteres no ASCII en UTF-8 en lugar de escaparlos y serializa datetime
+en ISO 8601.
+"""
+import json
+import time
+
+from flask import make_response
+from flask.json.provider import DefaultJSONProvider
+
+from .request_metrics import STAGE_SERIALIZATION, add_stage_time
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+BACKEND_ORJSON = 'orjson'
+BACKEND_JSON = 'json'
+
+
+def _stdlib_dumps(data):
+    return json.dumps(data).encode('utf-8')
+
+
+def _orjson_dumps(data):
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+
+def resolve_backend(name=None):
+    """Retorna el backend a usar: el pedido si está disponible, orjson si no se indica"""
+    if name == BACKEND_JSON or orjson is None:
+        return BACKEND_JSON
+    return BACKEND_ORJSON
+
+
+def get_dumps(name=None):
+    """Función data -> bytes del backend indicado"""
+    return _orjson_dumps if resolve_backend(name) == BACKEND_ORJSON else _stdlib_dumps
+
+
+def get_loads(name=None):
+    """Función bytes/str -> objeto del backend indicado (errores como ValueError)"""
+    return orjson.loads if resolve_backend(name) == BACKEND_ORJSON else json.loads
+
+
+# Backend por defecto para los servicios que serializan fuera de una respuesta
+dumps = get_dumps()
+loads = get_loads()
+
+
+def make_output_json(backend=None):
+    """
+    Crea la representación application/json para flask_restful.Api.
+
+    Igual que flask_restful.representations.json.output_json, el cuerpo
+    termina con un salto de línea.
+    """
+    backend_dumps = get_dumps(backend)
+
+    def output_json(data, code, headers=None):
+        start = time.perf_counter()
+        body = backend_dumps(data) + b'\n'
+        add_stage_time(STAGE_SERIALIZATION, time.perf_counter() - start)
+        resp = make_response(body, code)
+        resp.headers.extend(headers or {})
+        return resp
+
+    return output_json
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Proveedor JSON de Flask que parsea los cuerpos (request.get_json) con
+    orjson; la serialización de jsonify sigue siendo la de Flask.
+    """
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
@@ -0,0 +1,210 @@
+"""
+Latencia por etapa de cada petición, expuesta en /metrics (Prometheus).
+
+Cada petición de Flask acumula su tiempo en autenticación, validación, base
+de datos (eventos de cursor de SQLAlchemy) y serialización; el resto queda en
+la etapa "other". Al terminar se registran histogramas por endpoint.
+
+Con varios workers de gunicorn cada proceso tiene sus propios contadores. Si
+PROMETHEUS_MULTIPROC_DIR está definido al arrancar, prometheus_client los
+escribe en archivos de ese directorio y /metrics agrega los de todos los
+workers (ver gunicorn.conf.py).
+"""
+import os
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from flask import request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+
+STAGE_AUTH = 'auth'
+STAGE_VALIDATION = 'validation'
+STAGE_DB = 'db'
+STAGE_SERIALIZATION = 'serialization'
+STAGE_OTHER = 'other'
+MEASURED_STAGES = (STAGE_AUTH, STAGE_VALIDATION, STAGE_DB, STAGE_SERIALIZATION)
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+REQUEST_DURATION = Histogram(
+    'blacklist_http_request_duration_seconds', 'Duración de las peticiones HTTP',
+    ['method', 'endpoint', 'status'], buckets=LATENCY_BUCKETS,
+)
+STAGE_DURATION = Histogram(
+    'blacklist_http_request_stage_duration_seconds', 'Tiempo de cada etapa de la petición',
+    ['endpoint', 'stage'], buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'blacklist_http_request_db_queries', 'Sentencias SQL ejecutadas por petición',
+    ['endpoint'], buckets=QUERY_BUCKETS,
+)
+
+# Tiempos de la petición en curso (por hilo o greenlet); None fuera de una petición
+_current = ContextVar('blacklist_request_timings', default=None)
+
+
+class RequestTimings:
+    """Tiempos acumulados de una petición"""
+
+    __slots__ = ('start', 'stages', 'queries')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = dict.fromkeys(MEASURED_STAGES, 0.0)
+        self.queries = 0
+
+
+def current_timings():
+    """Retorna los tiempos de la petición en curso o None"""
+    return _current.get()
+
+
+def add_stage_time(stage, seconds):
+    """Suma tiempo a una etapa de la petición en curso (sin petición no hace nada)"""
+    timings = _current.get()
+    if timings is not None:
+        timings.stages[stage] += seconds
+
+
+def timed_stage(stage):
+    """Decorador que suma la duración de la función a la etapa indicada"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                add_stage_time(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# El inicio se guarda en el contexto de ejecución y no en conn.info: si la
+# sentencia falla after_cursor_execute no se llama y el contexto se descarta
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None and context is not None:
+        context.request_metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = _current.get()
+    start = getattr(context, 'request_metrics_start', None)
+    if timings is not None and start is not None:
+        timings.stages[STAGE_DB] += time.perf_counter() - start
+        timings.queries += 1
+
+
+class RequestMetrics:
+    """Registra los tiempos por etapa de cada petición en los histogramas"""
+
+    def __init__(self):
+        self.enabled = False
+        self._children = {}
+        self._duration_children = {}
+
+    def init_app(self, app, engine):
+        """Instala los hooks de la petición y los eventos del engine"""
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        self.instrument_engine(engine)
+
+    def instrument_engine(self, engine):
+        """Mide el tiempo de base de datos de las sentencias del engine (también réplicas)"""
+        if self.enabled and not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def _endpoint_children(self, endpoint):
+        # labels() toma un lock y arma la llave en cada llamada; por endpoint
+        # los hijos de los histogramas se resuelven una sola vez
+        children = self._children.get(endpoint)
+        if children is None:
+            children = (
+                {stage: STAGE_DURATION.labels(endpoint, stage) for stage in MEASURED_STAGES + (STAGE_OTHER,)},
+                DB_QUERIES.labels(endpoint),
+            )
+            self._children[endpoint] = children
+        return children
+
+    @staticmethod
+    def _before_request():
+        _current.set(RequestTimings())
+
+    def _after_request(self, response):
+        timings = _current.get()
+        if timings is not None:
+            # En respuestas en streaming (exportación) no incluye el envío del cuerpo
+            self.record(timings, request.method, request.endpoint or 'unmatched', response.status_code)
+        return response
+
+    def record(self, timings, method, endpoint, status):
+        """Registra en los histogramas los tiempos de una petición terminada"""
+        total = time.perf_counter() - timings.start
+        stage_children, queries_child = self._endpoint_children(endpoint)
+
+        key = (method, endpoint, status)
+        duration_child = self._duration_children.get(key)
+        if duration_child is None:
+            duration_child = self._duration_children[key] = REQUEST_DURATION.labels(*key)
+        duration_child.observe(total)
+        for stage, seconds in timings.stages.items():
+            stage_children[stage].observe(seconds)
+        stage_children[STAGE_OTHER].observe(max(total - sum(timings.stages.values()), 0.0))
+        queries_child.observe(timings.queries)
+
+    @staticmethod
+    def _teardown_request(exc):
+        _current.set(None)
+
+    def start_request(self):
+        """
+        Inicia los tiempos de una petición que no pasa por los hooks de Flask
+        (rutas que app/asgi.py atiende en el event loop). Retorna el token
+        para end_request
+        """
+        return _current.set(RequestTimings()) if self.enabled else None
+
+    def finish_request(self, method, endpoint, status):
+        """Registra la petición iniciada con start_request"""
+        timings = _current.get()
+        if timings is not None:
+            self.record(timings, method, endpoint, status)
+
+    @staticmethod
+    def end_request(token):
+        if token is not None:
+            _current.reset(token)
+
+    @staticmethod
+    def export():
+        """
+        Retorna (cuerpo, content type) en formato de exposición de Prometheus,
+        agregando los archivos de todos los workers en modo multiproceso
+        """
+        registry = REGISTRY
+        if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+request_metrics = RequestMetrics()
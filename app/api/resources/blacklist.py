@@ -1,24 +1,43 @@
 from flask_restful import Resource
-from flask import request
+from flask import request, current_app, Response, stream_with_context
 from http import HTTPStatus
 from ..auth import static_bearer_required
+from ..query_monitor import query_budget
 from ...services.blacklist_create_service import BlacklistCreateService
 from ...services.blacklist_get_service import BlacklistGetService
+from ...services.blacklist_ingest_service import BlacklistIngestService, blacklist_ingest_queue
+from ...services.blacklist_bulk_create_service import BlacklistBulkCreateService
+from ...services.blacklist_export_service import BlacklistExportService
+from ...services.blacklist_changes_service import BlacklistChangesService
+from ...services.blacklist_list_service import BlacklistListService
+
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
 
 class BlacklistCreateResource(Resource):
 
     @static_bearer_required
+    @query_budget(1)
     def post(self):
         # Obtener datos del request
         data = request.get_json()
         
-        # Procesar la petición a través del servicio
-        result = BlacklistCreateService.process_create_request(data)
+        # Procesar la petición a través del servicio; en modo async se encola
+        if blacklist_ingest_queue.enabled:
+            result = BlacklistIngestService.process_create_request(data)
+        else:
+            result = BlacklistCreateService.process_create_request(data)
         
         if not result['success']:
             # Manejar errores
             error_message = result['errors'][0] if len(result['errors']) == 1 else result['errors']
-            return {'error': error_message}, result['status_code']
+            return {'error': error_message}, result['status_code'], result.get('headers', {})
+        
+        if result['status_code'] == HTTPStatus.ACCEPTED:
+            # Encolado: se inserta cuando se vacía la cola
+            return {
+                'message': result['message'],
+                'data': result['data']
+            }, result['status_code']
         
         # Respuesta exitosa
         return {
@@ -27,13 +46,78 @@ class BlacklistCreateResource(Resource):
                 'email': result['data'].email,
                 'app_uuid': result['data'].app_uuid,
                 'blocked_reason': result['data'].blocked_reason,
-                'ip_address': result['data'].ip_address
+                'ip_address': result['data'].ip_address,
+                'expires_at': result['data'].expires_at.isoformat() if result['data'].expires_at else None
             }
         }, result['status_code']
 
+class BlacklistListResource(Resource):
+
+    @static_bearer_required
+    @query_budget(1)
+    def get(self):
+        """
+        Lista la blacklist con paginación por cursor y filtros
+        
+        Query params:
+            app_uuid, ip_address: filtros por igualdad
+            created_from, created_to: rango de created_at (ISO 8601, [from, to))
+            order: desc (por defecto, más recientes primero) o asc
+            limit: tamaño de página
+            cursor: next_cursor de la página anterior
+            
+        Returns:
+            dict: items (campos de to_dict), next_cursor y limit
+        """
+        max_limit = current_app.config.get('BLACKLIST_LIST_MAX_LIMIT', BlacklistListService.DEFAULT_MAX_LIMIT)
+        
+        try:
+            filters = BlacklistListService.parse_filters(request.args, max_limit)
+            return BlacklistListService.list_page(**filters), HTTPStatus.OK
+            
+        except ValueError as e:
+            # Error de validación
+            return {'error': str(e)}, HTTPStatus.BAD_REQUEST
+            
+        except Exception as e:
+            # Error interno del servidor
+            return {'error': 'Error interno del servidor'}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+class BlacklistBulkCreateResource(Resource):
+
+    @static_bearer_required
+    def post(self):
+        """
+        Crea muchos elementos en la blacklist en una sola transacción
+        
+        Acepta un arreglo JSON o un flujo NDJSON (un objeto por línea) y
+        retorna el estado de cada elemento: created, duplicate o invalid.
+        """
+        if request.mimetype in NDJSON_MIMETYPES:
+            # El flujo se consume línea por línea sin cargarlo completo en memoria
+            items = BlacklistBulkCreateService.iter_ndjson(request.stream)
+        else:
+            try:
+                items = BlacklistBulkCreateService.parse_json_array(request.get_data())
+            except ValueError as e:
+                return {'error': str(e)}, HTTPStatus.BAD_REQUEST
+        
+        client_ip = BlacklistCreateService.get_client_ip()
+        result = BlacklistBulkCreateService.process_bulk_request(items, client_ip)
+        
+        if not result['success']:
+            error_message = result['errors'][0] if len(result['errors']) == 1 else result['errors']
+            return {'error': error_message}, result['status_code']
+        
+        return {
+            'message': result['message'],
+            'data': result['data']
+        }, result['status_code']
+
 class BlacklistGetResource(Resource):
 
     @static_bearer_required
+    @query_budget(1)
     def get(self, email: str):
         """
         Obtiene información sobre si un email está en la blacklist
@@ -58,3 +142,105 @@ class BlacklistGetResource(Resource):
         except Exception as e:
             # Error interno del servidor
             return {'error': 'Error interno del servidor'}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+class BlacklistLookupResource(Resource):
+
+    @static_bearer_required
+    @query_budget(1)
+    def post(self):
+        """
+        Consulta un lote de emails en la blacklist con una sola query
+        
+        Body:
+            {"emails": ["a@ejemplo.com", ...]}
+            
+        Returns:
+            dict: results con email normalizado -> {is_blocked, blocked_reason}
+        """
+        data = request.get_json(silent=True) or {}
+        max_batch = current_app.config.get('BLACKLIST_LOOKUP_MAX_BATCH', BlacklistGetService.DEFAULT_MAX_BATCH)
+        
+        try:
+            results = BlacklistGetService.get_blacklist_by_emails(data.get('emails'), max_batch)
+            return {'results': results}, HTTPStatus.OK
+            
+        except ValueError as e:
+            # Error de validación
+            return {'error': str(e)}, HTTPStatus.BAD_REQUEST
+            
+        except Exception as e:
+            # Error interno del servidor
+            return {'error': 'Error interno del servidor'}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+class BlacklistExportResource(Resource):
+
+    @static_bearer_required
+    def get(self):
+        """
+        Exporta la blacklist completa como NDJSON (por defecto) o CSV
+        
+        Query params:
+            format: ndjson o csv (si no se indica se usa el header Accept)
+            updated_since: fecha ISO 8601; solo filas actualizadas desde entonces
+            
+        Returns:
+            Response: Flujo con una fila por elemento, con los campos de to_dict
+        """
+        try:
+            export_format = BlacklistExportService.resolve_format(
+                request.args.get('format'), request.accept_mimetypes
+            )
+            updated_since = BlacklistExportService.parse_updated_since(request.args.get('updated_since'))
+        except ValueError as e:
+            return {'error': str(e)}, HTTPStatus.BAD_REQUEST
+        
+        batch_size = current_app.config.get('BLACKLIST_EXPORT_BATCH_SIZE', BlacklistExportService.DEFAULT_BATCH_SIZE)
+        body = BlacklistExportService.stream(export_format, updated_since, batch_size)
+        
+        # stream_with_context mantiene la sesión de base de datos mientras se envía el cuerpo
+        return Response(
+            stream_with_context(body),
+            mimetype=BlacklistExportService.MIMETYPES[export_format],
+            headers={'Content-Disposition': f'attachment; filename=blacklist.{export_format}'}
+        )
+
+class BlacklistChangesResource(Resource):
+
+    @static_bearer_required
+    def get(self):
+        """
+        Feed de cambios (inserciones y actualizaciones) para réplicas
+        
+        Query params:
+            since: cursor retornado por la llamada anterior (vacío = desde el inicio)
+            limit: cantidad máxima de cambios por respuesta
+            wait: segundos de long-polling si no hay cambios
+            
+        Returns:
+            dict: changes (campos de to_dict), next_cursor y has_more
+        """
+        config = current_app.config
+        try:
+            limit = BlacklistChangesService.parse_limit(
+                request.args.get('limit'),
+                config.get('BLACKLIST_CHANGES_MAX_LIMIT', BlacklistChangesService.DEFAULT_MAX_LIMIT)
+            )
+            wait = BlacklistChangesService.parse_wait(
+                request.args.get('wait'), config.get('BLACKLIST_CHANGES_MAX_WAIT', 20.0)
+            )
+            result = BlacklistChangesService.wait_for_changes(
+                request.args.get('since'),
+                limit,
+                wait,
+                poll_interval=config.get('BLACKLIST_CHANGES_POLL_INTERVAL', 0.5),
+                settle_seconds=config.get('BLACKLIST_CHANGES_SETTLE_SECONDS', 0.0),
+            )
+            return result, HTTPStatus.OK
+            
+        except ValueError as e:
+            # Error de validación
+            return {'error': str(e)}, HTTPStatus.BAD_REQUEST
+            
+        except Exception as e:
+            # Error interno del servidor
+            return {'error': 'Error interno del servidor'}, HTTPStatus.INTERNAL_SERVER_ERROR
@@ -1,6 +1,20 @@
 from flask_restful import Api
-from .resources.blacklist import BlacklistCreateResource, BlacklistGetResource
+from .resources.blacklist import (
+    BlacklistCreateResource,
+    BlacklistListResource,
+    BlacklistBulkCreateResource,
+    BlacklistExportResource,
+    BlacklistChangesResource,
+    BlacklistGetResource,
+    BlacklistLookupResource,
+)
 
 def register_resources(api: Api) -> None:
     api.add_resource(BlacklistCreateResource, "/blacklists")
+    # Misma URL que la creación: POST crea y GET lista
+    api.add_resource(BlacklistListResource, "/blacklists", endpoint="blacklistlistresource")
+    api.add_resource(BlacklistBulkCreateResource, "/blacklists/bulk")
+    api.add_resource(BlacklistLookupResource, "/blacklists/lookup")
+    api.add_resource(BlacklistExportResource, "/blacklists/export")
+    api.add_resource(BlacklistChangesResource, "/blacklists/changes")
     api.add_resource(BlacklistGetResource, "/blacklists/<string:email>")
@@ -0,0 +1,358 @@
+"""
+Aplicación ASGI de la API de blacklist.
+
+Las consultas (GET /blacklists/<email> y POST /blacklists/lookup) y la
+creación individual (POST /blacklists) se atienden en el event loop con un
+engine asíncrono de SQLAlchemy (asyncpg en Postgres, aiosqlite en SQLite), de
+modo que una petición esperando a la base de datos no ocupa un hilo. Reutilizan
+la autenticación, la validación, el caché y el filtro de Bloom de los servicios
+de Flask, y responden con el mismo JSON y los mismos códigos de estado. Con
+un caché compartido (shared o redis), cuyas operaciones bloquean, el caché
+se consulta y actualiza en el pool de hilos en lugar del event loop.
+
+El resto de rutas (carga masiva, /stats, /ping, errores 404/405) y cualquier
+petición con un cuerpo fuera de lo esperado se delegan a la aplicación Flask,
+que corre en un pool de hilos. Con réplicas de lectura configuradas
+(DATABASE_REPLICA_URLS) las consultas también las atiende Flask.
+
+Las rutas del event loop registran los mismos histogramas de /metrics que
+los hooks de Flask y respetan su query_budget.
+"""
+import time
+from datetime import datetime
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from sqlalchemy import insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from werkzeug.datastructures import Headers
+from werkzeug.exceptions import HTTPException
+
+from . import create_app
+from .api.auth import bearer_auth
+from .api.client_ip import client_ip_resolver
+from .api.query_monitor import query_budget, query_monitor
+from .api.representations import get_dumps, get_loads
+from .api.request_metrics import STAGE_AUTH, STAGE_SERIALIZATION, add_stage_time, request_metrics
+from .models.blacklist import Blacklist, normalize_email
+from .services.blacklist_create_service import BlacklistCreateService
+from .services.blacklist_cache import blacklist_cache
+from .services.blacklist_get_service import BlacklistGetService
+from .services.blacklist_ingest_service import blacklist_ingest_queue
+from .services.read_replicas import replica_router
+from .services.sql_helpers import is_duplicate_key_error
+
+# Driver asíncrono equivalente a cada driver síncrono soportado
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+}
+
+# Opciones de SQLALCHEMY_ENGINE_OPTIONS que aplican igual al engine asíncrono
+POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping')
+
+INTERNAL_ERROR = 'Error interno del servidor'
+
+
+def async_database_url(url):
+    """Convierte la URL de la base de datos al driver asíncrono equivalente"""
+    url = make_url(url)
+    if url.drivername not in ASYNC_DRIVERS:
+        raise ValueError(f'No hay driver asíncrono para {url.drivername}')
+    return url.set(drivername=ASYNC_DRIVERS[url.drivername])
+
+
+def async_engine_options(url, engine_options):
+    """
+    Adapta SQLALCHEMY_ENGINE_OPTIONS al engine asíncrono.
+
+    El pool cronometrado (TimedQueuePool) es síncrono, así que se usa el pool
+    por defecto del engine asíncrono con los mismos tamaños. Los timeouts de
+    sesión de Postgres (-c statement_timeout=...) se pasan a asyncpg como
+    server_settings.
+    """
+    options = {key: engine_options[key] for key in POOL_OPTIONS if key in engine_options}
+
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        # Una base en memoria solo existe dentro de su conexión
+        return {'poolclass': StaticPool}
+
+    startup = engine_options.get('connect_args', {}).get('options', '')
+    server_settings = {}
+    for setting in startup.split('-c'):
+        if '=' in setting:
+            name, value = setting.strip().split('=', 1)
+            server_settings[name] = value
+    if server_settings:
+        options['connect_args'] = {'server_settings': server_settings}
+
+    return options
+
+
+class _ThreadedWsgiInstance(WsgiToAsgiInstance):
+    # asgiref ejecuta la app WSGI en un único hilo compartido; aquí cada
+    # petición delegada usa un hilo del pool para no serializarlas
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.run_wsgi_app.__wrapped__, thread_sensitive=False)
+
+
+class _ThreadedWsgiToAsgi(WsgiToAsgi):
+
+    async def __call__(self, scope, receive, send):
+        await _ThreadedWsgiInstance(self.wsgi_application, self.duplicate_header_limit)(
+            scope, receive, send
+        )
+
+
+class _FallbackToFlask(Exception):
+    """La petición se atiende con la aplicación Flask"""
+
+
+class BlacklistAsgiApp:
+    """Aplicación ASGI que atiende las rutas calientes con el engine asíncrono"""
+
+    def __init__(self, flask_app, engine):
+        self.flask_app = flask_app
+        self.engine = engine
+        self.wsgi = _ThreadedWsgiToAsgi(flask_app)
+        self.url_adapter = flask_app.url_map.bind('localhost')
+        self.dumps = get_dumps(flask_app.config.get('API_JSON_BACKEND'))
+        self.loads = get_loads(flask_app.config.get('API_JSON_BACKEND'))
+        self.handlers = {
+            ('api_root.blacklistgetresource', 'GET'): self.get_blacklist,
+            ('api_root.blacklistlookupresource', 'POST'): self.lookup_blacklist,
+            ('api_root.blacklistcreateresource', 'POST'): self.create_blacklist,
+        }
+        # Tiempo de base de datos y conteo de sentencias, igual que en el engine síncrono
+        request_metrics.instrument_engine(engine.sync_engine)
+        query_monitor.instrument_engine(engine.sync_engine)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+
+        endpoint, handler, args = self._match(scope)
+        if handler is None:
+            return await self.wsgi(scope, receive, send)
+
+        body = await self._read_body(receive)
+        headers = Headers([(name.decode('latin1'), value.decode('latin1'))
+                           for name, value in scope['headers']])
+        token = request_metrics.start_request()
+        try:
+            start = time.perf_counter()
+            error = bearer_auth.check(headers.get('Authorization', ''))
+            add_stage_time(STAGE_AUTH, time.perf_counter() - start)
+            if error:
+                payload, status = error
+            else:
+                payload, status = await handler(scope, headers, body, **args)
+
+            start = time.perf_counter()
+            # Mismo formato que la representación JSON de la API de Flask
+            content = self.dumps(payload) + b'\n'
+            add_stage_time(STAGE_SERIALIZATION, time.perf_counter() - start)
+            request_metrics.finish_request(scope['method'], endpoint, int(status))
+        except _FallbackToFlask:
+            content = None
+        finally:
+            request_metrics.end_request(token)
+
+        if content is None:
+            return await self.wsgi(scope, self._replay(body), send)
+        await self._send_json(send, content, status)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _match(self, scope):
+        try:
+            endpoint, args = self.url_adapter.match(scope['path'], scope['method'])
+        except HTTPException:
+            return None, None, None
+        return endpoint, self.handlers.get((endpoint, scope['method'])), args
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    @staticmethod
+    def _replay(body):
+        async def receive():
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        return receive
+
+    def _parse_json(self, headers, body):
+        # Los casos que Flask rechaza con su propio formato (415, 400) los resuelve Flask
+        if headers.get('Content-Type', '').split(';')[0].strip() != 'application/json':
+            raise _FallbackToFlask()
+        try:
+            return self.loads(body)
+        except ValueError:
+            raise _FallbackToFlask()
+
+    @staticmethod
+    async def _send_json(send, content, status):
+        await send({
+            'type': 'http.response.start',
+            'status': int(status),
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(content)).encode('ascii')),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': content})
+
+    @staticmethod
+    async def _run_sync(fn, *args):
+        """
+        Ejecuta una función síncrona de los servicios. Si solo toca memoria
+        (caché local, filtro de Bloom, snapshot) corre en el event loop; con
+        un caché shared o redis corre en el pool de hilos para no bloquearlo
+        """
+        if not blacklist_cache.blocking:
+            return fn(*args)
+        return await sync_to_async(fn, thread_sensitive=False)(*args)
+
+    @query_budget(1)
+    async def get_blacklist(self, scope, headers, body, email):
+        """Equivalente asíncrono de BlacklistGetResource.get"""
+        if replica_router.enabled:
+            # Las lecturas en réplicas las enruta la sesión de Flask
+            raise _FallbackToFlask()
+        try:
+            email = BlacklistGetService.normalize_email(email)
+            result = await self._run_sync(BlacklistGetService.resolve_without_db, email)
+            if result is None:
+                async with self.engine.connect() as connection:
+                    row = (await connection.execute(
+                        BlacklistGetService.BLOCKED_REASON_BY_EMAIL, {'email': email}
+                    )).first()
+                result = await self._run_sync(BlacklistGetService.store_result, email, row)
+            return result, HTTPStatus.OK
+
+        except ValueError as e:
+            return {'error': str(e)}, HTTPStatus.BAD_REQUEST
+
+        except Exception:
+            self.flask_app.logger.exception('Error consultando la blacklist')
+            return {'error': INTERNAL_ERROR}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+    @query_budget(1)
+    async def lookup_blacklist(self, scope, headers, body):
+        """Equivalente asíncrono de BlacklistLookupResource.post"""
+        if replica_router.enabled:
+            raise _FallbackToFlask()
+        try:
+            data = self._parse_json(headers, body)
+        except _FallbackToFlask:
+            # Igual que get_json(silent=True)
+            data = None
+        if not isinstance(data, dict):
+            data = {}
+        max_batch = self.flask_app.config.get('BLACKLIST_LOOKUP_MAX_BATCH', BlacklistGetService.DEFAULT_MAX_BATCH)
+
+        try:
+            results, missing = await self._run_sync(
+                BlacklistGetService.prepare_batch, data.get('emails'), max_batch
+            )
+            if missing:
+                async with self.engine.connect() as connection:
+                    rows = (await connection.execute(
+                        BlacklistGetService.BLOCKED_REASON_BY_EMAILS, {'emails': missing}
+                    )).all()
+                await self._run_sync(BlacklistGetService.complete_batch, results, missing, rows)
+            return {'results': results}, HTTPStatus.OK
+
+        except ValueError as e:
+            return {'error': str(e)}, HTTPStatus.BAD_REQUEST
+
+        except Exception:
+            self.flask_app.logger.exception('Error consultando lote en la blacklist')
+            return {'error': INTERNAL_ERROR}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+    @query_budget(1)
+    async def create_blacklist(self, scope, headers, body):
+        """Equivalente asíncrono de BlacklistCreateResource.post"""
+        if blacklist_ingest_queue.enabled:
+            # La cola local es síncrona (sqlite3): la creación async la atiende Flask
+            raise _FallbackToFlask()
+        data = self._parse_json(headers, body)
+        if data is not None and not isinstance(data, dict):
+            raise _FallbackToFlask()
+        if data and any(not isinstance(data.get(field), (str, type(None)))
+                        for field in ('email', 'app_uuid', 'blocked_reason', 'expires_at')):
+            raise _FallbackToFlask()
+
+        errors = BlacklistCreateService.validate_data(data)
+        if errors:
+            return {'error': errors[0] if len(errors) == 1 else errors}, HTTPStatus.BAD_REQUEST
+
+        client = scope.get('client')
+        values = {
+            'email': normalize_email(data['email']),
+            'app_uuid': data['app_uuid'],
+            'blocked_reason': data.get('blocked_reason'),
+            'ip_address': client_ip_resolver.resolve_headers(headers, client[0] if client else None),
+            'expires_at': BlacklistCreateService.parse_expires_at(data.get('expires_at')),
+        }
+        try:
+            async with self.engine.begin() as connection:
+                await connection.execute(insert(Blacklist.__table__), values)
+        except IntegrityError as e:
+            if not is_duplicate_key_error(e):
+                return {'error': BlacklistCreateService.INTEGRITY_ERROR}, HTTPStatus.INTERNAL_SERVER_ERROR
+            # Igual que en Flask: un bloqueo ya expirado se reemplaza
+            try:
+                async with self.engine.begin() as connection:
+                    revived = await connection.execute(
+                        BlacklistCreateService.revive_expired_statement(values, datetime.utcnow())
+                    )
+            except Exception as e:
+                return {'error': f'{INTERNAL_ERROR}: {str(e)}'}, HTTPStatus.INTERNAL_SERVER_ERROR
+            if revived.rowcount != 1:
+                return {'error': BlacklistCreateService.DUPLICATE_EMAIL_ERROR}, HTTPStatus.CONFLICT
+        except Exception as e:
+            return {'error': f'{INTERNAL_ERROR}: {str(e)}'}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+        await self._run_sync(
+            BlacklistCreateService.after_create, values['email'], values['blocked_reason'], values['expires_at']
+        )
+        await self._run_sync(replica_router.record_write, values['ip_address'])
+        expires_at = values['expires_at']
+        return {
+            'message': 'Email agregado a la lista negra exitosamente',
+            'data': dict(values, expires_at=expires_at.isoformat() if expires_at else None),
+        }, HTTPStatus.CREATED
+
+
+def create_asgi_app(config_name=None, flask_app=None):
+    """
+    Crea la aplicación ASGI sobre la aplicación Flask (creada con create_app si
+    no se pasa una) y un engine asíncrono con la misma configuración.
+
+    ASYNC_DATABASE_URL permite indicar otra URL para el engine asíncrono; por
+    defecto se deriva de SQLALCHEMY_DATABASE_URI.
+    """
+    flask_app = flask_app or create_app(config_name)
+    config = flask_app.config
+    url = async_database_url(config.get('ASYNC_DATABASE_URL') or config['SQLALCHEMY_DATABASE_URI'])
+    engine = create_async_engine(url, **async_engine_options(url, config.get('SQLALCHEMY_ENGINE_OPTIONS', {})))
+    return BlacklistAsgiApp(flask_app, engine)
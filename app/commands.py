@@ -0,0 +1,47 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from .services.blacklist_ingest_service import blacklist_ingest_queue
+from .services.blacklist_retention_service import blacklist_retention
+from .services.blacklist_snapshot import build_snapshot
+
+blacklist_cli = AppGroup("blacklist", help="Tareas de mantenimiento de la blacklist.")
+
+
+@blacklist_cli.command("snapshot")
+@click.option("--output", help="Archivo destino (por defecto BLACKLIST_SNAPSHOT_PATH)")
+@click.option("--batch-size", default=None, type=int, help="Filas leídas por bloque del cursor")
+def snapshot_command(output, batch_size):
+    """Vuelca la blacklist a un snapshot en mmap para BLACKLIST_LOOKUP_MODE=snapshot."""
+    output = output or current_app.config["BLACKLIST_SNAPSHOT_PATH"]
+    batch_size = batch_size or current_app.config.get("BLACKLIST_EXPORT_BATCH_SIZE", 1000)
+    result = build_snapshot(output, batch_size)
+    click.echo(
+        f"Snapshot escrito en {output}: {result['rows']} emails, {result['bytes']} bytes "
+        f"(change_seq {result['change_seq']})"
+    )
+
+
+@blacklist_cli.command("flush-queue")
+def flush_queue_command():
+    """Vacía la cola de creación asíncrona (BLACKLIST_CREATE_MODE=async) hasta dejarla vacía."""
+    if not blacklist_ingest_queue.enabled:
+        raise click.ClickException("BLACKLIST_CREATE_MODE no es async")
+
+    total = 0
+    while True:
+        flushed = blacklist_ingest_queue.flush_once()
+        if not flushed:
+            break
+        total += flushed
+    click.echo(f"Filas retiradas de la cola: {total}; fallidas: {blacklist_ingest_queue.failed_count()}")
+
+
+@blacklist_cli.command("purge-expired")
+@click.option("--batch-size", default=None, type=int, help="Filas borradas por lote (por defecto BLACKLIST_RETENTION_BATCH_SIZE)")
+@click.option("--max-batches", default=0, type=int, help="Máximo de lotes (0 = hasta terminar)")
+def purge_expired_command(batch_size, max_batches):
+    """Borra por lotes las filas cuyo expires_at ya pasó."""
+    purged = blacklist_retention.purge_expired(batch_size=batch_size, max_batches=max_batches)
+    click.echo(f"Filas expiradas purgadas: {purged}")
@@ -1,22 +1,87 @@
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import BigInteger, Column, String, DateTime, Index, Sequence, func, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import validates
+from sqlalchemy.sql.expression import FunctionElement
 from datetime import datetime
 from ..api.extensions import db
 
+
+def normalize_email(email):
+    """Normaliza un email para guardarlo y consultarlo (trim y lowercase)"""
+    if not isinstance(email, str):
+        return email
+    return email.strip().lower()
+
+
+def is_expired(expires_at, now=None):
+    """True si la fecha de expiración (UTC sin zona, como created_at) ya pasó"""
+    return expires_at is not None and expires_at <= (now or datetime.utcnow())
+
+
+# Filas de pg_partitioned_table para blacklist (0 si no existe o no está particionada)
+PARTITIONED_TABLE = text(
+    "SELECT count(*) FROM pg_partitioned_table WHERE partrelid = to_regclass('blacklist')"
+)
+
+
+def is_partitioned(connection):
+    """True si la tabla blacklist está particionada por la migración 0008 (solo Postgres)"""
+    if connection.dialect.name != 'postgresql':
+        return False
+    return connection.execute(PARTITIONED_TABLE).scalar() > 0
+
+
+# Secuencia de cambios de la blacklist en Postgres (en otros motores se ignora)
+change_seq_sequence = Sequence('blacklist_change_seq', metadata=db.metadata)
+
+
+class next_change_seq(FunctionElement):
+    """
+    Siguiente valor de change_seq: nextval de la secuencia en Postgres y
+    max(change_seq) + 1 en los demás motores. En SQLite las escrituras están
+    serializadas, así que el valor crece con el orden de commit; las filas de
+    un mismo INSERT multi-fila pueden compartir valor.
+    """
+    type = BigInteger()
+    inherit_cache = True
+
+
+@compiles(next_change_seq, 'postgresql')
+def _next_change_seq_postgresql(element, compiler, **kw):
+    return "nextval('blacklist_change_seq')"
+
+
+@compiles(next_change_seq)
+def _next_change_seq_default(element, compiler, **kw):
+    return '(SELECT coalesce(max(change_seq), 0) + 1 FROM blacklist)'
+
+
 class Blacklist(db.Model):
     __tablename__ = 'blacklist'
     
     email = Column(String(255), primary_key=True, nullable=False)
     app_uuid = Column(String(36), nullable=False)
     blocked_reason = Column(String(255), nullable=True)
-    ip_address = Column(String(45), nullable=True)  # 45 caracteres para IPv6
+    # INET nativo en Postgres; en otros motores texto (45 caracteres para IPv6)
+    ip_address = Column(String(45).with_variant(postgresql.INET(), 'postgresql'), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Orden de inserciones y actualizaciones para el feed de cambios
+    change_seq = Column(BigInteger, nullable=True, default=next_change_seq(), onupdate=next_change_seq())
+    # Fecha (UTC) desde la que el email deja de estar bloqueado; NULL = sin expiración
+    expires_at = Column(DateTime, nullable=True)
     
-    def __init__(self, email, app_uuid, blocked_reason, ip_address=None):
+    def __init__(self, email, app_uuid, blocked_reason, ip_address=None, expires_at=None):
         self.email = email
         self.app_uuid = app_uuid
         self.blocked_reason = blocked_reason
         self.ip_address = ip_address
+        self.expires_at = expires_at
+    
+    @validates('email')
+    def _normalize_email(self, key, email):
+        return normalize_email(email)
     
     def __repr__(self):
         return f'<Blacklist(email="{self.email}", app_uuid="{self.app_uuid}", blocked_reason="{self.blocked_reason}")>'
@@ -29,5 +94,28 @@ class Blacklist(db.Model):
             'blocked_reason': self.blocked_reason,
             'ip_address': self.ip_address,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
         }
+
+
+# Garantiza unicidad sin distinguir mayúsculas aunque se inserte por fuera del ORM.
+# En la tabla particionada (migración 0008) la reemplaza el CHECK
+# ck_blacklist_email_lower; autogenerate no la compara ahí (migrations/env.py)
+Index('ix_blacklist_email_lower', func.lower(Blacklist.email), unique=True,
+      info={'unpartitioned_only': True})
+
+# Recorrido incremental por updated_at (exportación con updated_since)
+Index('ix_blacklist_updated_at', Blacklist.updated_at, Blacklist.email)
+
+# Listado paginado por (created_at, email), con y sin filtro por igualdad
+Index('ix_blacklist_created_at', Blacklist.created_at, Blacklist.email)
+Index('ix_blacklist_app_uuid_created_at', Blacklist.app_uuid, Blacklist.created_at, Blacklist.email)
+Index('ix_blacklist_ip_address_created_at', Blacklist.ip_address, Blacklist.created_at, Blacklist.email)
+
+# Cursor del feed de cambios (change_seq, email)
+Index('ix_blacklist_change_seq', Blacklist.change_seq, Blacklist.email)
+
+# Purga de filas expiradas; parcial porque la mayoría no expira
+Index('ix_blacklist_expires_at', Blacklist.expires_at,
+      postgresql_where=Blacklist.expires_at.is_not(None), sqlite_where=Blacklist.expires_at.is_not(None))
@@ -0,0 +1,201 @@
+import hashlib
+import math
+import os
+import threading
+import time
+
+from sqlalchemy import func, select
+
+from ..api.extensions import db
+from ..models.blacklist import Blacklist
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom sobre un bytearray.
+
+    Usa doble hashing (Kirsch-Mitzenmacher) a partir de un único digest
+    blake2b de 128 bits para obtener los k índices de cada clave.
+    """
+
+    def __init__(self, capacity, fp_rate):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _indexes(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        num_bits = self.num_bits
+        return ((h1 + i * h2) % num_bits for i in range(self.num_hashes))
+
+    def add(self, key):
+        bits = self.bits
+        for index in self._indexes(key):
+            bits[index >> 3] |= 1 << (index & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[index >> 3] & (1 << (index & 7)) for index in self._indexes(key))
+
+    @property
+    def memory_bytes(self):
+        return len(self.bits)
+
+    def estimated_fp_rate(self):
+        """Tasa de falsos positivos esperada con los elementos cargados"""
+        if not self.count:
+            return 0.0
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class BlacklistBloomFilter:
+    """
+    Camino rápido para consultas negativas: si el filtro dice que el email
+    no está, se responde sin consultar la base de datos.
+
+    El filtro se construye en segundo plano desde la tabla blacklist la primera
+    vez que se usa en cada proceso, se actualiza con cada creación exitosa de
+    este proceso y se reconstruye cada BLACKLIST_BLOOM_REBUILD_SECONDS. Las
+    creaciones hechas por otros workers solo se ven tras la siguiente
+    reconstrucción, así que ese intervalo acota el tiempo en que un email recién
+    bloqueado en otro worker puede reportarse como no bloqueado.
+
+    Mientras el filtro no está construido todas las consultas van a la base de
+    datos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._app = None
+        self.enabled = False
+        self.capacity = 1_000_000
+        self.fp_rate = 0.01
+        self.rebuild_interval = 300.0
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._filter = None
+        self._built_at = None
+        self._building = False
+        self._pending = []
+        self.rebuilds = 0
+        self.negatives = 0
+
+    def init_app(self, app):
+        """Configura el filtro a partir de la configuración de la aplicación"""
+        self._app = app
+        self.enabled = app.config.get('BLACKLIST_BLOOM_ENABLED', False)
+        self.capacity = app.config.get('BLACKLIST_BLOOM_CAPACITY', 1_000_000)
+        self.fp_rate = app.config.get('BLACKLIST_BLOOM_FP_RATE', 0.01)
+        self.rebuild_interval = app.config.get('BLACKLIST_BLOOM_REBUILD_SECONDS', 300.0)
+        with self._lock:
+            self._reset()
+
+    def might_contain(self, email):
+        """
+        Retorna False solo si el email con seguridad no está en la blacklist.
+
+        Si el filtro está deshabilitado, aún no se construyó o está en
+        construcción inicial, retorna True para que se consulte la base de datos.
+        """
+        if not self.enabled:
+            return True
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # Proceso hijo (fork de gunicorn): el estado heredado no sirve
+                self._reset()
+            bloom = self._filter
+            stale = bloom is None or time.monotonic() - self._built_at >= self.rebuild_interval
+            start_rebuild = stale and not self._building and self._app is not None
+            if start_rebuild:
+                self._building = True
+
+        if start_rebuild:
+            threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+        if bloom is None or email in bloom:
+            return True
+
+        self.negatives += 1
+        return False
+
+    def add(self, email):
+        """Registra un email recién creado en la blacklist"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(email)
+            if self._building:
+                # La reconstrucción en curso pudo leer la tabla antes de este insert
+                self._pending.append(email)
+
+    def _rebuild_in_background(self):
+        try:
+            with self._app.app_context():
+                self.rebuild()
+                db.session.remove()
+        except Exception:
+            self._app.logger.exception('No se pudo construir el filtro de Bloom de la blacklist')
+            with self._lock:
+                self._building = False
+
+    def rebuild(self):
+        """Construye un filtro nuevo leyendo todos los emails de la tabla"""
+        with self._lock:
+            self._building = True
+            self._pending = []
+
+        total = db.session.execute(select(func.count()).select_from(Blacklist)).scalar() or 0
+        bloom = BloomFilter(max(self.capacity, int(total * 1.1)), self.fp_rate)
+        rows = db.session.execute(select(Blacklist.email).execution_options(yield_per=10000))
+        for (email,) in rows:
+            bloom.add(email)
+
+        with self._lock:
+            for email in self._pending:
+                bloom.add(email)
+            self._pending = []
+            self._filter = bloom
+            self._built_at = time.monotonic()
+            self._building = False
+            self.rebuilds += 1
+        return bloom
+
+    def stats(self):
+        """Retorna tamaño, memoria y tasa de falsos positivos del filtro"""
+        with self._lock:
+            bloom = self._filter
+            stats = {
+                'enabled': self.enabled,
+                'built': bloom is not None,
+                'rebuilds': self.rebuilds,
+                'negatives': self.negatives,
+                'target_fp_rate': self.fp_rate,
+                'rebuild_interval': self.rebuild_interval,
+            }
+            if bloom is not None:
+                stats.update({
+                    'items': bloom.count,
+                    'capacity': bloom.capacity,
+                    'num_bits': bloom.num_bits,
+                    'num_hashes': bloom.num_hashes,
+                    'memory_bytes': bloom.memory_bytes,
+                    'estimated_fp_rate': bloom.estimated_fp_rate(),
+                    'age_seconds': time.monotonic() - self._built_at,
+                })
+            return stats
+
+
+# Instancia compartida por los servicios; se configura en create_app
+blacklist_bloom = BlacklistBloomFilter()
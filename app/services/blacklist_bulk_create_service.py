@@ -0,0 +1,191 @@
+from datetime import datetime
+
+from flask import current_app
+from ..api.extensions import db
+from ..api.representations import loads
+from ..api.request_metrics import STAGE_SERIALIZATION, timed_stage
+from ..models.blacklist import Blacklist, normalize_email
+from .blacklist_create_service import BlacklistCreateService
+from .read_replicas import replica_router
+from .sql_helpers import insert_reviving_expired
+
+
+class BlacklistBulkCreateService:
+    """Servicio para crear muchos elementos de la blacklist en una sola transacción"""
+
+    STATUS_CREATED = 'created'
+    STATUS_DUPLICATE = 'duplicate'
+    STATUS_INVALID = 'invalid'
+
+    DEFAULT_MAX_ITEMS = 50000
+    DEFAULT_CHUNK_SIZE = 1000
+
+    @staticmethod
+    @timed_stage(STAGE_SERIALIZATION)
+    def parse_json_array(raw_body):
+        """Convierte un cuerpo JSON (arreglo de objetos) en una lista de elementos"""
+        try:
+            items = loads(raw_body)
+        except (TypeError, ValueError):
+            raise ValueError('El cuerpo debe ser un arreglo JSON válido')
+
+        if not isinstance(items, list):
+            raise ValueError('El cuerpo debe ser un arreglo JSON válido')
+        return items
+
+    @staticmethod
+    def iter_ndjson(lines):
+        """
+        Recorre un flujo NDJSON (un objeto JSON por línea) sin cargarlo completo.
+
+        Las líneas vacías se ignoran y las que no son JSON (o UTF-8) válido se
+        entregan como None para que se reporten como inválidas. Las líneas en
+        bytes se parsean sin decodificarlas antes.
+        """
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield loads(line)
+            except ValueError:
+                yield None
+
+    @staticmethod
+    def insert_chunk(rows):
+        """Inserta un bloque de filas con un INSERT multi-fila y retorna los emails creados"""
+        if not rows:
+            return set()
+
+        # Los duplicados se ignoran salvo que el bloqueo existente ya haya expirado
+        stmt = insert_reviving_expired(Blacklist.__table__, db.engine.dialect.name, datetime.utcnow())
+        stmt = stmt.returning(Blacklist.__table__.c.email)
+        result = db.session.execute(stmt, rows)
+        return {row[0] for row in result}
+
+    @classmethod
+    def process_bulk_request(cls, items, client_ip=None):
+        """
+        Procesa una carga masiva de elementos para la blacklist.
+
+        Cada elemento se valida con BlacklistCreateService.validate_data y los
+        válidos se insertan por bloques con INSERT ... ON CONFLICT, todo dentro
+        de una única transacción. Un email existente cuenta como duplicado
+        salvo que su bloqueo ya haya expirado: en ese caso se reemplaza.
+
+        Args:
+            items (iterable): Elementos (dict) a crear
+            client_ip (str): IP del cliente que realiza la carga
+
+        Returns:
+            dict: Resultado con el estado de cada elemento y un resumen
+        """
+        max_items = current_app.config.get('BLACKLIST_BULK_MAX_ITEMS', cls.DEFAULT_MAX_ITEMS)
+        chunk_size = current_app.config.get('BLACKLIST_BULK_CHUNK_SIZE', cls.DEFAULT_CHUNK_SIZE)
+
+        results = []
+        pending = []
+        pending_indexes = {}
+        seen_emails = set()
+        created_emails = {}
+
+        def flush():
+            created = cls.insert_chunk(pending)
+            for row in pending:
+                index = pending_indexes[row['email']]
+                if row['email'] in created:
+                    results[index]['status'] = cls.STATUS_CREATED
+                    created_emails[row['email']] = (row['blocked_reason'], row['expires_at'])
+                else:
+                    results[index]['status'] = cls.STATUS_DUPLICATE
+            pending.clear()
+            pending_indexes.clear()
+
+        try:
+            for index, item in enumerate(items):
+                if index >= max_items:
+                    db.session.rollback()
+                    return {
+                        'success': False,
+                        'errors': [f'La carga supera el máximo de {max_items} elementos'],
+                        'status_code': 413
+                    }
+
+                if not isinstance(item, dict):
+                    results.append({
+                        'index': index,
+                        'email': None,
+                        'status': cls.STATUS_INVALID,
+                        'errors': ['El elemento debe ser un objeto JSON']
+                    })
+                    continue
+
+                email = item.get('email')
+                validation_errors = BlacklistCreateService.validate_data(item)
+                if validation_errors:
+                    results.append({
+                        'index': index,
+                        'email': email if isinstance(email, str) else None,
+                        'status': cls.STATUS_INVALID,
+                        'errors': validation_errors
+                    })
+                    continue
+
+                # Core INSERT no pasa por el ORM: se normaliza aquí como en el modelo
+                email = normalize_email(email)
+                results.append({'index': index, 'email': email, 'status': None})
+                if email in seen_emails:
+                    # Repetido dentro de la misma carga
+                    results[index]['status'] = cls.STATUS_DUPLICATE
+                    continue
+
+                seen_emails.add(email)
+                pending_indexes[email] = index
+                pending.append({
+                    'email': email,
+                    'app_uuid': item.get('app_uuid'),
+                    'blocked_reason': item.get('blocked_reason'),
+                    'ip_address': client_ip,
+                    'expires_at': BlacklistCreateService.parse_expires_at(item.get('expires_at'))
+                })
+                if len(pending) >= chunk_size:
+                    flush()
+
+            if not results:
+                return {
+                    'success': False,
+                    'errors': ['No se proporcionaron datos'],
+                    'status_code': 400
+                }
+
+            flush()
+            db.session.commit()
+
+        except Exception as e:
+            db.session.rollback()
+            return {
+                'success': False,
+                'errors': [f'Error interno del servidor: {str(e)}'],
+                'status_code': 500
+            }
+
+        for email, (blocked_reason, expires_at) in created_emails.items():
+            BlacklistCreateService.after_create(email, blocked_reason, expires_at)
+        if created_emails:
+            replica_router.record_write(client_ip)
+
+        summary = {
+            'total': len(results),
+            cls.STATUS_CREATED: 0,
+            cls.STATUS_DUPLICATE: 0,
+            cls.STATUS_INVALID: 0
+        }
+        for item_result in results:
+            summary[item_result['status']] += 1
+
+        return {
+            'success': True,
+            'data': {'summary': summary, 'results': results},
+            'message': 'Carga masiva procesada',
+            'status_code': 200
+        }
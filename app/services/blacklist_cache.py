@@ -0,0 +1,176 @@
+import copy
+import threading
+import time
+
+from .cache_backends import BACKEND_LOCAL, LocalCacheBackend, create_backend
+
+
+class _Call:
+    """Consulta en curso de SingleFlight"""
+
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Agrupa las cargas concurrentes de una misma llave: el primer hilo ejecuta
+    la carga y los demás esperan su resultado (o su excepción) en lugar de
+    repetirla. Evita que muchos fallos simultáneos del caché sobre el mismo
+    email lleguen todos a la base de datos.
+
+    Agrupa los hilos de un proceso; entre workers cada uno hace a lo sumo
+    una carga por llave.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.copy(call.result)
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+class BlacklistCache:
+    """
+    Caché (LRU + TTL) para los resultados de consulta de la blacklist.
+
+    Guarda tanto resultados positivos (email bloqueado) como negativos
+    (email no bloqueado), de forma que las consultas repetidas sobre un
+    conjunto pequeño de emails no lleguen a la base de datos.
+
+    Dónde se guardan las entradas lo decide BLACKLIST_CACHE_BACKEND (ver
+    cache_backends): en memoria de cada worker (local), en memoria
+    compartida por los workers del host (shared) o en Redis (redis). Con
+    ``max_size`` igual a 0 el caché queda deshabilitado.
+    """
+
+    def __init__(self, max_size=0, ttl=60.0, clock=time.monotonic, backend=None):
+        self._lock = threading.Lock()
+        self._clock = clock
+        self._max_size = max_size
+        self.ttl = ttl
+        self.backend = backend or LocalCacheBackend(max_size, clock)
+        self.single_flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """Configura el caché y su backend a partir de la configuración de la aplicación"""
+        self._max_size = app.config.get("BLACKLIST_CACHE_MAX_SIZE", 0)
+        self.ttl = app.config.get("BLACKLIST_CACHE_TTL", 60.0)
+        self.backend = create_backend(app.config, self._max_size, self._clock)
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, value):
+        self._max_size = value
+        self.backend.max_size = value
+
+    @property
+    def enabled(self):
+        return self._max_size > 0
+
+    @property
+    def blocking(self):
+        """True si el backend hace E/S bloqueante (shared con fcntl o redis)"""
+        return self.enabled and self.backend.name != BACKEND_LOCAL
+
+    def get(self, email):
+        """Retorna una copia del resultado cacheado o None si no existe o expiró"""
+        if not self.enabled:
+            return None
+
+        value = self.backend.get(email)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, email, value, ttl=None):
+        """
+        Guarda el resultado de una consulta (también tras crear el email:
+        write-through); ttl menor que el configurado para bloqueos que expiran
+        """
+        if not self.enabled:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl > 0:
+            self.backend.set(email, value, ttl)
+        else:
+            self.backend.delete(email)
+
+    def invalidate(self, email):
+        """Elimina la entrada asociada a un email"""
+        if self.enabled:
+            self.backend.delete(email)
+
+    def load(self, email, loader):
+        """
+        Ejecuta loader (consulta a la base de datos que cachea su resultado)
+        una sola vez por email aunque lleguen varios fallos concurrentes
+        """
+        return self.single_flight.do(email, loader)
+
+    def clear(self):
+        """Vacía el caché y reinicia los contadores"""
+        self.backend.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.single_flight.coalesced = 0
+
+    def stats(self):
+        """Retorna los contadores del caché"""
+        with self._lock:
+            stats = {
+                'enabled': self.enabled,
+                'backend': self.backend.name,
+                'max_size': self._max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.single_flight.coalesced,
+            }
+        stats.update(self.backend.stats())
+        return stats
+
+
+# Instancia compartida por los servicios; se configura en create_app
+blacklist_cache = BlacklistCache()
@@ -0,0 +1,137 @@
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, tuple_
+
+from ..api.extensions import db
+from ..models.blacklist import Blacklist
+from .query_params import decode_cursor, encode_cursor, parse_limit
+
+
+class BlacklistChangesService:
+    """
+    Feed de cambios de la blacklist para réplicas (caches de borde).
+
+    Cada inserción o actualización recibe un change_seq creciente; el cursor es
+    el par (change_seq, email) de la última fila entregada, codificado de forma
+    opaca. Una réplica pide los cambios posteriores a su cursor y guarda el
+    next_cursor de la respuesta para la siguiente llamada. Cada cambio trae el
+    estado actual de la fila (inserción o actualización), que la réplica
+    aplica como upsert.
+    """
+
+    DEFAULT_LIMIT = 500
+    DEFAULT_MAX_LIMIT = 5000
+
+    @staticmethod
+    def encode_cursor(change_seq, email):
+        """Codifica (change_seq, email) como cursor opaco"""
+        return encode_cursor(change_seq, email)
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Decodifica un cursor; sin cursor se empieza desde el principio
+
+        Raises:
+            ValueError: Si el cursor no es válido
+        """
+        values = decode_cursor(cursor, 2)
+        if values is None:
+            return None
+
+        change_seq, email = values
+        if not isinstance(change_seq, int) or not isinstance(email, str):
+            raise ValueError('El cursor no es válido')
+        return change_seq, email
+
+    @classmethod
+    def parse_limit(cls, value, max_limit=DEFAULT_MAX_LIMIT):
+        """
+        Valida el tamaño de lote pedido
+
+        Raises:
+            ValueError: Si no es un entero entre 1 y max_limit
+        """
+        return parse_limit(value, cls.DEFAULT_LIMIT, max_limit)
+
+    @staticmethod
+    def parse_wait(value, max_wait):
+        """
+        Segundos de long-polling pedidos, acotados a max_wait
+
+        Raises:
+            ValueError: Si no es un número no negativo
+        """
+        if value in (None, ''):
+            return 0.0
+        try:
+            wait = float(value)
+        except (TypeError, ValueError):
+            raise ValueError('wait debe ser un número de segundos')
+
+        if wait < 0:
+            raise ValueError('wait debe ser un número de segundos')
+        return min(wait, max_wait)
+
+    @classmethod
+    def fetch_changes(cls, cursor=None, limit=DEFAULT_LIMIT, settle_seconds=0.0):
+        """
+        Retorna los cambios posteriores al cursor en orden de change_seq.
+
+        En Postgres un change_seq se asigna al insertar pero la fila solo es
+        visible al hacer commit, así que una transacción lenta puede aparecer
+        después de otra con un valor mayor. Para no saltarla, solo se entregan
+        filas con updated_at de hace al menos settle_seconds y el lote se corta
+        en la primera fila más reciente.
+
+        Returns:
+            dict: changes, next_cursor y has_more
+        """
+        position = cls.decode_cursor(cursor)
+
+        stmt = select(Blacklist).where(Blacklist.change_seq.is_not(None))
+        if position is not None:
+            stmt = stmt.where(tuple_(Blacklist.change_seq, Blacklist.email) > tuple_(*position))
+        stmt = stmt.order_by(Blacklist.change_seq, Blacklist.email).limit(limit + 1)
+        entries = db.session.execute(stmt).scalars().all()
+
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        if settle_seconds > 0:
+            settled_before = datetime.utcnow() - timedelta(seconds=settle_seconds)
+            for index, entry in enumerate(entries):
+                if entry.updated_at is not None and entry.updated_at > settled_before:
+                    entries = entries[:index]
+                    has_more = True
+                    break
+
+        if entries:
+            last = entries[-1]
+            cursor = cls.encode_cursor(last.change_seq, last.email)
+
+        return {
+            'changes': [entry.to_dict() for entry in entries],
+            'next_cursor': cursor,
+            'has_more': has_more,
+        }
+
+    @classmethod
+    def wait_for_changes(cls, cursor=None, limit=DEFAULT_LIMIT, wait=0.0, poll_interval=0.5,
+                         settle_seconds=0.0, clock=time.monotonic, sleep=time.sleep):
+        """
+        Como fetch_changes, pero si no hay cambios espera hasta wait segundos
+        consultando cada poll_interval (long-polling).
+
+        Entre consultas se libera la conexión para no retener el pool.
+        """
+        deadline = clock() + wait
+        while True:
+            result = cls.fetch_changes(cursor, limit, settle_seconds)
+            remaining = deadline - clock()
+            if result['changes'] or remaining <= 0:
+                return result
+
+            db.session.rollback()
+            sleep(min(poll_interval, remaining))
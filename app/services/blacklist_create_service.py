@@ -1,41 +1,48 @@
+from datetime import datetime
 from flask import request
+from sqlalchemy import update
 from sqlalchemy.exc import IntegrityError
+from ..api.client_ip import CLIENT_IP_ENVIRON_KEY, client_ip_resolver
 from ..api.extensions import db
-from ..models.blacklist import Blacklist
+from ..api.request_metrics import STAGE_VALIDATION, timed_stage
+from ..models.blacklist import Blacklist, normalize_email
+from .blacklist_bloom import blacklist_bloom
+from .blacklist_get_service import BlacklistGetService
+from .query_params import parse_iso_datetime
+from .read_replicas import replica_router
+from .sql_helpers import is_duplicate_key_error
 import uuid
 
+_blacklist = Blacklist.__table__
+
+
 class BlacklistCreateService:
     """Servicio para manejar la lógica de creación de elementos en la blacklist"""
     
+    INTEGRITY_ERROR = 'Error de integridad en la base de datos'
+    # Error que retorna create_blacklist_item cuando el email ya existe
+    DUPLICATE = object()
+    DUPLICATE_EMAIL_ERROR = 'El email ya está en la lista negra'
+    TEXT_FIELDS = ('email', 'app_uuid', 'blocked_reason')
+    TEXT_FIELDS_ERROR = 'Los campos email, app_uuid y blocked_reason deben ser texto'
+    NOT_OBJECT_ERROR = 'Los datos deben ser un objeto JSON'
+    
     @staticmethod
     def get_client_ip():
-      """Obtiene la dirección IP del cliente, considerando proxies y load balancers"""
-      # Lista de headers que pueden contener la IP real del cliente
-      ip_headers = [
-          'X-Forwarded-For',      # Estándar para proxies y load balancers
-          'X-Real-IP',            # Nginx y otros proxies
-          'X-Forwarded-Proto',    # Protocolo usado (contiene IP en algunos casos)
-          'CF-Connecting-IP',     # Cloudflare
-          'True-Client-IP',       # Akamai
-          'X-Cluster-Client-IP',  # Load balancers en clusters
-          # AWS Headers
-          'X-Amzn-Trace-Id',      # AWS Application Load Balancer
-          'X-Forwarded-Port',     # AWS ALB/ELB (puede incluir IP)
-          'X-Amz-Cf-Id'           # AWS CloudFront
-      ]
-      
-      # Verificar cada header en orden de prioridad
-      for header in ip_headers:
-          ip = request.headers.get(header)
-          if ip:
-              # X-Forwarded-For puede contener múltiples IPs separadas por comas
-              # La primera es la IP original del cliente
-              return ip.split(',')[0].strip()
-      
-      # Si no hay headers de proxy, usar la IP remota directa
-      return request.environ.get('REMOTE_ADDR', 'unknown')
+      """
+      Obtiene la IP del cliente, considerando solo los proxies de confianza.
+
+      ClientIpMiddleware la resuelve una vez por petición; sin el middleware
+      (p. ej. en una app sin create_app) se resuelve aquí. Retorna None si no
+      hay una IP válida.
+      """
+      environ = request.environ
+      if CLIENT_IP_ENVIRON_KEY in environ:
+          return environ[CLIENT_IP_ENVIRON_KEY]
+      return client_ip_resolver.resolve_environ(environ)
     
     @staticmethod
+    @timed_stage(STAGE_VALIDATION)
     def validate_data(data):
         """Valida los datos de entrada para crear un elemento en la blacklist"""
         errors = []
@@ -44,11 +51,22 @@ class BlacklistCreateService:
             errors.append('No se proporcionaron datos')
             return errors
         
+        # Un cuerpo JSON válido puede ser una lista, un número o un texto
+        if not isinstance(data, dict):
+            errors.append(BlacklistCreateService.NOT_OBJECT_ERROR)
+            return errors
+        
+        # Un objeto o lista en estos campos llegaría tal cual al driver
+        if any(not isinstance(data.get(field), (str, type(None)))
+               for field in BlacklistCreateService.TEXT_FIELDS):
+            errors.append(BlacklistCreateService.TEXT_FIELDS_ERROR)
+            return errors
+        
         email = data.get('email')
         app_uuid = data.get('app_uuid')
         
         # Validaciones de campos requeridos
-        if not email:
+        if not email or (isinstance(email, str) and not email.strip()):
             errors.append('El campo email es requerido')
         
         if not app_uuid:
@@ -61,16 +79,79 @@ class BlacklistCreateService:
             except ValueError:
                 errors.append('El app_uuid debe ser un UUID válido')
         
+        try:
+            BlacklistCreateService.parse_expires_at(data.get('expires_at'))
+        except ValueError as e:
+            errors.append(str(e))
+        
         return errors
     
     @staticmethod
-    def email_exists(email):
-        """Verifica si un email ya existe en la blacklist"""
-        return Blacklist.query.filter_by(email=email).first() is not None
+    def parse_expires_at(value, now=None):
+        """
+        Convierte el campo opcional expires_at (ISO 8601) en un datetime UTC
+        sin zona horaria
+        
+        Raises:
+            ValueError: Si no es una fecha ISO 8601 o no es futura
+        """
+        if value is None:
+            return None
+        if not isinstance(value, str):
+            raise ValueError('expires_at debe ser una fecha ISO 8601 válida')
+        expires_at = parse_iso_datetime(value, 'expires_at')
+        if expires_at is not None and expires_at <= (now or datetime.utcnow()):
+            raise ValueError('expires_at debe ser una fecha futura')
+        return expires_at
+    
+    @staticmethod
+    def after_create(email, blocked_reason, expires_at=None):
+        """Actualiza caché y filtro de Bloom tras crear un email en la blacklist"""
+        # Write-through: reemplaza un posible resultado negativo cacheado, y
+        # con el caché compartido (shared o redis) lo ven todos los workers
+        BlacklistGetService.store_created(email, blocked_reason, expires_at)
+        blacklist_bloom.add(email)
     
     @staticmethod
-    def create_blacklist_item(email, app_uuid, blocked_reason):
-        """Crea un nuevo elemento en la blacklist"""
+    def revive_expired_statement(values, now):
+        """
+        UPDATE que reemplaza con values la fila de un email cuyo bloqueo ya
+        expiró pero todavía no se purgó; no afecta filas vigentes
+        """
+        return update(_blacklist).where(
+            _blacklist.c.email == values['email'],
+            _blacklist.c.expires_at <= now,
+        ).values(
+            app_uuid=values['app_uuid'],
+            blocked_reason=values['blocked_reason'],
+            ip_address=values['ip_address'],
+            expires_at=values['expires_at'],
+            created_at=now,
+            updated_at=now,
+        )
+    
+    @staticmethod
+    def revive_expired(entry):
+        """Reemplaza con entry una fila expirada del mismo email; False si no había una"""
+        now = datetime.utcnow()
+        values = {column: getattr(entry, column)
+                  for column in ('email', 'app_uuid', 'blocked_reason', 'ip_address', 'expires_at')}
+        if db.session.execute(BlacklistCreateService.revive_expired_statement(values, now)).rowcount != 1:
+            return False
+        db.session.commit()
+        entry.created_at = entry.updated_at = now
+        return True
+    
+    @staticmethod
+    def create_blacklist_item(email, app_uuid, blocked_reason, expires_at=None):
+        """
+        Crea un nuevo elemento en la blacklist
+
+        Returns:
+            tuple: (elemento, None) o (None, error); error es DUPLICATE si el
+            email ya está bloqueado, o el mensaje de cualquier otro error
+        """
+        email = normalize_email(email)
         try:
             # Obtener la IP del cliente
             client_ip = BlacklistCreateService.get_client_ip()
@@ -80,21 +161,41 @@ class BlacklistCreateService:
                 email=email,
                 app_uuid=app_uuid,
                 blocked_reason=blocked_reason,
-                ip_address=client_ip
+                ip_address=client_ip,
+                expires_at=expires_at
             )
             
-            # Guardar en la base de datos
+            # Guardar en la base de datos con un único INSERT. Si el email ya
+            # existe, la llave primaria lo rechaza con IntegrityError.
             db.session.add(new_blacklist)
+            db.session.flush()
+            # Se desasocia de la sesión para que el commit no expire sus atributos
+            # y leerlos después no dispare un SELECT adicional
+            db.session.expunge(new_blacklist)
             db.session.commit()
             
-            return new_blacklist, None
-            
         except IntegrityError as e:
             db.session.rollback()
-            return None, 'Error de integridad en la base de datos'
+            # Solo una llave duplicada es un email existente; NOT NULL, CHECK,
+            # etc. son errores internos
+            if not is_duplicate_key_error(e):
+                return None, BlacklistCreateService.INTEGRITY_ERROR
+            # Si el bloqueo existente ya expiró, se reemplaza como si fuera nuevo
+            try:
+                if not BlacklistCreateService.revive_expired(new_blacklist):
+                    return None, BlacklistCreateService.DUPLICATE
+            except Exception as e:
+                db.session.rollback()
+                return None, f'Error interno del servidor: {str(e)}'
         except Exception as e:
             db.session.rollback()
             return None, f'Error interno del servidor: {str(e)}'
+        
+        BlacklistCreateService.after_create(email, blocked_reason, expires_at)
+        # Las lecturas siguientes de este cliente van al primario (read-your-writes)
+        replica_router.record_write(client_ip)
+        
+        return new_blacklist, None
     
     @classmethod
     def process_create_request(cls, data):
@@ -108,21 +209,23 @@ class BlacklistCreateService:
                 'status_code': 400
             }
         
-        email = data.get('email')
+        email = normalize_email(data.get('email'))
         app_uuid = data.get('app_uuid')
         blocked_reason = data.get('blocked_reason')
+        expires_at = cls.parse_expires_at(data.get('expires_at'))
+        
+        # Crear el elemento sin consultar antes si existe: la restricción de
+        # llave primaria detecta el duplicado de forma atómica, incluso con
+        # peticiones concurrentes
+        blacklist_item, error = cls.create_blacklist_item(email, app_uuid, blocked_reason, expires_at)
         
-        # Verificar si el email ya existe
-        if cls.email_exists(email):
+        if error is cls.DUPLICATE:
             return {
                 'success': False,
-                'errors': ['El email ya está en la lista negra'],
+                'errors': [cls.DUPLICATE_EMAIL_ERROR],
                 'status_code': 409
             }
         
-        # Crear el elemento
-        blacklist_item, error = cls.create_blacklist_item(email, app_uuid, blocked_reason)
-        
         if error:
             return {
                 'success': False,
@@ -0,0 +1,107 @@
+import csv
+import io
+
+from sqlalchemy import select
+
+from ..api.extensions import db
+from ..api.representations import dumps
+from ..models.blacklist import Blacklist
+from .query_params import parse_iso_datetime
+from .read_replicas import replica_router
+
+
+class BlacklistExportService:
+    """Servicio para exportar la blacklist completa como NDJSON o CSV"""
+
+    FORMAT_NDJSON = 'ndjson'
+    FORMAT_CSV = 'csv'
+
+    MIMETYPES = {
+        FORMAT_NDJSON: 'application/x-ndjson',
+        FORMAT_CSV: 'text/csv',
+    }
+
+    # Mismos campos y en el mismo orden que Blacklist.to_dict
+    FIELDS = ('email', 'app_uuid', 'blocked_reason', 'ip_address', 'created_at', 'updated_at', 'expires_at')
+
+    DEFAULT_BATCH_SIZE = 1000
+
+    @classmethod
+    def resolve_format(cls, requested, accept_mimetypes=None):
+        """
+        Determina el formato a partir del parámetro format o del header Accept
+
+        Raises:
+            ValueError: Si el formato pedido no está soportado
+        """
+        if requested:
+            requested = requested.strip().lower()
+            if requested not in cls.MIMETYPES:
+                raise ValueError(f'Formato no soportado: {requested}. Use ndjson o csv')
+            return requested
+
+        if accept_mimetypes is not None:
+            best = accept_mimetypes.best_match(list(cls.MIMETYPES.values()))
+            if best == cls.MIMETYPES[cls.FORMAT_CSV]:
+                return cls.FORMAT_CSV
+        return cls.FORMAT_NDJSON
+
+    @staticmethod
+    def parse_updated_since(value):
+        """
+        Convierte updated_since (ISO 8601) en un datetime UTC sin zona horaria
+
+        Raises:
+            ValueError: Si la fecha no es ISO 8601 válida
+        """
+        return parse_iso_datetime(value, 'updated_since')
+
+    @staticmethod
+    def iter_items(updated_since=None, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Recorre la tabla con un cursor del lado del servidor (yield_per) y
+        entrega cada fila con el formato de Blacklist.to_dict.
+
+        Las filas salen ordenadas por (updated_at, email), de modo que el
+        consumidor puede usar el updated_at de la última fila como
+        updated_since de la siguiente sincronización (el filtro es inclusivo).
+        """
+        stmt = select(Blacklist).order_by(Blacklist.updated_at, Blacklist.email)
+        if updated_since is not None:
+            stmt = stmt.where(Blacklist.updated_at >= updated_since)
+
+        # El identity map de la sesión guarda referencias débiles, así que los
+        # objetos de cada bloque se liberan al pasar al siguiente. La réplica
+        # se elige al abrir el cursor; los bloques siguientes salen de la
+        # misma conexión
+        result = replica_router.read(lambda: db.session.execute(stmt.execution_options(yield_per=batch_size)))
+        for entry in result.scalars():
+            yield entry.to_dict()
+
+    @staticmethod
+    def iter_ndjson(items):
+        """Serializa los elementos como NDJSON, una línea por fila"""
+        for item in items:
+            yield dumps(item) + b'\n'
+
+    @classmethod
+    def iter_csv(cls, items):
+        """Serializa los elementos como CSV con encabezado"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=cls.FIELDS, lineterminator='\n')
+
+        writer.writeheader()
+        for item in items:
+            writer.writerow(item)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    @classmethod
+    def stream(cls, export_format, updated_since=None, batch_size=DEFAULT_BATCH_SIZE):
+        """Retorna el generador de texto para el formato pedido"""
+        items = cls.iter_items(updated_since, batch_size)
+        if export_format == cls.FORMAT_CSV:
+            return cls.iter_csv(items)
+        return cls.iter_ndjson(items)
@@ -1,12 +1,133 @@
+from datetime import datetime
 from http import HTTPStatus
-from ..models.blacklist import Blacklist
+from ..models.blacklist import Blacklist, is_expired, normalize_email
 from ..api.extensions import db
+from ..api.request_metrics import STAGE_VALIDATION, timed_stage
+from .blacklist_cache import blacklist_cache
+from .blacklist_bloom import blacklist_bloom
+from .blacklist_snapshot import blacklist_snapshot
+from .read_replicas import replica_router
+from sqlalchemy import bindparam, select
 from sqlalchemy.exc import SQLAlchemyError
 
+_blacklist = Blacklist.__table__
+
+# Llave de single-flight de las cargas que deben ir al primario
+PRIMARY_LOAD_PREFIX = 'primary:'
+
 
 class BlacklistGetService:
     """Servicio para obtener información de un email en la blacklist"""
     
+    DEFAULT_MAX_BATCH = 1000
+    
+    # Sentencias construidas una sola vez sobre las columnas de la tabla: no
+    # hidratan instancias Blacklist y su clave de caché de compilación queda
+    # memorizada, así que cada consulta solo vincula el parámetro. La
+    # expiración se evalúa en Python para limitar también el TTL del caché
+    BLOCKED_REASON_BY_EMAIL = select(_blacklist.c.blocked_reason, _blacklist.c.expires_at) \
+        .where(_blacklist.c.email == bindparam('email'))
+    BLOCKED_REASON_BY_EMAILS = select(_blacklist.c.email, _blacklist.c.blocked_reason, _blacklist.c.expires_at) \
+        .where(_blacklist.c.email.in_(bindparam('emails', expanding=True)))
+    
+    @staticmethod
+    @timed_stage(STAGE_VALIDATION)
+    def normalize_email(email: str | None) -> str:
+        """
+        Valida y normaliza un email (trim y lowercase) para consultarlo
+        
+        Raises:
+            ValueError: Si el email está vacío o no es un texto
+        """
+        if not isinstance(email, str) or not email.strip():
+            raise ValueError('El email no puede estar vacío')
+        
+        return normalize_email(email)
+    
+    @staticmethod
+    def _build_result(blacklist_entry, now=None) -> dict:
+        """
+        Construye la respuesta a partir de la fila encontrada (o None); solo
+        usa blocked_reason y expires_at. Una fila expirada no bloquea.
+        """
+        if blacklist_entry and not is_expired(blacklist_entry.expires_at, now):
+            # Email encontrado en blacklist
+            return {
+                'is_blocked': True,
+                'blocked_reason': blacklist_entry.blocked_reason
+            }
+        # Email no encontrado en blacklist
+        return {
+            'is_blocked': False
+        }
+    
+    @staticmethod
+    def resolve_without_db(email: str) -> dict | None:
+        """
+        Resuelve un email ya normalizado con el caché (resultados positivos y
+        negativos), el snapshot en mmap (BLACKLIST_LOOKUP_MODE=snapshot) o el
+        filtro de Bloom; retorna None si hay que consultar la base de datos
+        """
+        cached = blacklist_cache.get(email)
+        if cached is not None:
+            return cached
+        
+        # En modo snapshot responde siempre, salvo que no haya snapshot cargado
+        result = blacklist_snapshot.lookup(email)
+        if result is not None:
+            return result
+        
+        # Si el filtro de Bloom descarta el email, no está bloqueado
+        if not blacklist_bloom.might_contain(email):
+            result = BlacklistGetService._build_result(None)
+            blacklist_cache.set(email, result)
+            return result
+        
+        return None
+    
+    @staticmethod
+    def _cache_ttl(expires_at, now) -> float | None:
+        """TTL del caché para un bloqueo que expira: no más que lo que le queda"""
+        if expires_at is None:
+            return None
+        return min(blacklist_cache.ttl, (expires_at - now).total_seconds())
+    
+    @staticmethod
+    def store_result(email: str, blacklist_entry, from_replica: bool = False) -> dict:
+        """
+        Construye la respuesta para la fila leída de la base de datos y la
+        cachea. Un "no bloqueado" leído de una réplica no se cachea: puede
+        ser una creación que la réplica aún no recibió, y pisaría el
+        resultado que after_create dejó en el caché.
+        """
+        now = datetime.utcnow()
+        result = BlacklistGetService._build_result(blacklist_entry, now)
+        if result['is_blocked']:
+            blacklist_cache.set(email, result, BlacklistGetService._cache_ttl(blacklist_entry.expires_at, now))
+        elif not from_replica:
+            blacklist_cache.set(email, result)
+        return result
+    
+    @staticmethod
+    def store_created(email: str, blocked_reason: str | None, expires_at: datetime | None = None) -> dict:
+        """Cachea como bloqueado un email recién creado (write-through)"""
+        result = {
+            'is_blocked': True,
+            'blocked_reason': blocked_reason
+        }
+        blacklist_cache.set(email, result, BlacklistGetService._cache_ttl(expires_at, datetime.utcnow()))
+        return result
+    
+    @staticmethod
+    def load_from_db(email: str) -> dict:
+        """Consulta un email ya normalizado en la base de datos y cachea el resultado"""
+        # La fila (blocked_reason, expires_at) o None se ejecuta en la conexión de la
+        # sesión, sin pasar por el ORM, en una réplica si hay configuradas
+        row, from_replica = replica_router.read_with_source(lambda: db.session.connection().execute(
+            BlacklistGetService.BLOCKED_REASON_BY_EMAIL, {'email': email}
+        ).first())
+        return BlacklistGetService.store_result(email, row, from_replica)
+    
     @staticmethod
     def get_blacklist_by_email(email: str | None) -> dict:
         """
@@ -18,24 +139,77 @@ class BlacklistGetService:
         Returns:
             dict: Solo is_blocked (boolean) y blocked_reason (si está bloqueado)
         """
-        # Validar que el email no esté vacío
-        if not email or not email.strip():
-            raise ValueError('El email no puede estar vacío')
+        # Validar y normalizar email (lowercase y trim)
+        email = BlacklistGetService.normalize_email(email)
         
-        # Normalizar email (lowercase y trim)
-        email = email.strip().lower()
+        # Resolver sin base de datos cuando el caché o el filtro de Bloom lo permiten
+        result = BlacklistGetService.resolve_without_db(email)
+        if result is not None:
+            return result
         
-        # Buscar el email en la blacklist
-        blacklist_entry = db.session.query(Blacklist).filter_by(email=email).first()
+        # Buscar el email en la blacklist; si otros hilos lo están buscando
+        # al mismo tiempo se espera su resultado en lugar de repetir la
+        # consulta. Un cliente con read-your-writes no espera a un hilo que
+        # lee de una réplica: agrupa solo con otras lecturas del primario.
+        key = email
+        if replica_router.enabled and replica_router.is_sticky():
+            key = PRIMARY_LOAD_PREFIX + email
+        return blacklist_cache.load(key, lambda: BlacklistGetService.load_from_db(email))
+    
+    @staticmethod
+    def get_blacklist_by_emails(emails, max_batch: int = DEFAULT_MAX_BATCH) -> dict:
+        """
+        Consulta un lote de emails con una sola query (WHERE email IN (...))
         
-        if blacklist_entry:
-            # Email encontrado en blacklist
-            return {
-                'is_blocked': True,
-                'blocked_reason': blacklist_entry.blocked_reason
-            }
-        else:
-            # Email no encontrado en blacklist
-            return {
-                'is_blocked': False
-            }
+        Args:
+            emails (list): Emails a buscar en la blacklist
+            max_batch (int): Cantidad máxima de emails permitida por lote
+            
+        Returns:
+            dict: Email normalizado -> {is_blocked, blocked_reason}
+        """
+        results, missing = BlacklistGetService.prepare_batch(emails, max_batch)
+        
+        if missing:
+            rows, from_replica = replica_router.read_with_source(lambda: db.session.connection().execute(
+                BlacklistGetService.BLOCKED_REASON_BY_EMAILS, {'emails': missing}
+            ).all())
+            BlacklistGetService.complete_batch(results, missing, rows, from_replica)
+        
+        return results
+    
+    @staticmethod
+    @timed_stage(STAGE_VALIDATION)
+    def prepare_batch(emails, max_batch: int = DEFAULT_MAX_BATCH) -> tuple:
+        """
+        Valida y normaliza un lote y lo resuelve con caché y filtro de Bloom
+        
+        Returns:
+            tuple: (resultados ya resueltos, emails que hay que buscar en la base de datos)
+        """
+        if not isinstance(emails, list) or not emails:
+            raise ValueError('Se requiere una lista de emails no vacía')
+        
+        if len(emails) > max_batch:
+            raise ValueError(f'El lote supera el máximo de {max_batch} emails')
+        
+        normalized = [BlacklistGetService.normalize_email(email) for email in emails]
+        
+        results = {}
+        missing = []
+        for email in dict.fromkeys(normalized):
+            result = BlacklistGetService.resolve_without_db(email)
+            if result is not None:
+                results[email] = result
+            else:
+                missing.append(email)
+        
+        return results, missing
+    
+    @staticmethod
+    def complete_batch(results: dict, missing: list, rows, from_replica: bool = False) -> dict:
+        """Completa el lote con las filas (email, blocked_reason, expires_at) leídas de la base de datos"""
+        found = {row.email: row for row in rows}
+        for email in missing:
+            results[email] = BlacklistGetService.store_result(email, found.get(email), from_replica)
+        return results
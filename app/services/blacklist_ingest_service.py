@@ -0,0 +1,424 @@
+"""
+Creación asíncrona (write-behind) de elementos de la blacklist.
+
+Con BLACKLIST_CREATE_MODE=async, POST /blacklists valida el cuerpo, lo
+guarda en una cola local durable (SQLite en modo WAL, compartida por los
+workers del host) y responde 202 sin esperar a la base de datos. Un hilo
+de fondo vacía la cola por lotes con el mismo INSERT ... ON CONFLICT de la
+carga masiva, así que una ráfaga de creaciones se convierte en pocos INSERT
+multi-fila.
+
+- Un solo worker del host vacía la cola a la vez (lock con flock); si
+  termina, otro toma su lugar en un segundo.
+- Las filas se borran de la cola después del commit en la base de datos. Si
+  el proceso muere entre ambos pasos se vuelven a insertar, y el ON
+  CONFLICT las descarta.
+- Con la base de datos caída los lotes se reintentan con espera creciente.
+  Si un lote falla por sus datos se inserta fila por fila y las que siguen
+  fallando pasan a la tabla ingest_failed.
+- Con BLACKLIST_INGEST_MAX_DEPTH filas pendientes la creación responde 503
+  (Retry-After) en lugar de encolar.
+
+Un email que ya existía (y cuyo bloqueo no expiró) se descarta al vaciar la
+cola: en modo async no hay 409.
+"""
+import fcntl
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.exc import InterfaceError, OperationalError, SQLAlchemyError
+
+from ..api.extensions import db
+from ..models.blacklist import normalize_email
+from .blacklist_bulk_create_service import BlacklistBulkCreateService
+from .blacklist_create_service import BlacklistCreateService
+from .read_replicas import replica_router
+
+logger = logging.getLogger(__name__)
+
+CREATE_MODE_SYNC = 'sync'
+CREATE_MODE_ASYNC = 'async'
+
+# Errores de conexión: el lote se reintenta completo más tarde
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+LEADER_RETRY_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+
+QUEUE_DEPTH = Gauge('blacklist_ingest_queue_depth', 'Filas pendientes en la cola de creación',
+                    multiprocess_mode='livemax')
+QUEUE_LAG = Gauge('blacklist_ingest_queue_lag_seconds', 'Antigüedad de la fila pendiente más antigua',
+                  multiprocess_mode='livemax')
+INGEST_ROWS = Counter('blacklist_ingest_rows', 'Filas de la cola procesadas por resultado', ['result'])
+INGEST_REJECTED = Counter('blacklist_ingest_rejected', 'Creaciones rechazadas con la cola llena')
+FLUSH_DURATION = Histogram('blacklist_ingest_flush_duration_seconds', 'Duración de cada lote enviado a la base de datos')
+
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS ingest_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT NOT NULL,
+        app_uuid TEXT NOT NULL,
+        blocked_reason TEXT,
+        ip_address TEXT,
+        enqueued_at REAL NOT NULL,
+        expires_at TEXT
+    )''',
+    '''CREATE TABLE IF NOT EXISTS ingest_failed (
+        id INTEGER PRIMARY KEY,
+        email TEXT NOT NULL,
+        app_uuid TEXT NOT NULL,
+        blocked_reason TEXT,
+        ip_address TEXT,
+        enqueued_at REAL NOT NULL,
+        failed_at REAL NOT NULL,
+        error TEXT,
+        expires_at TEXT
+    )''',
+)
+QUEUE_COLUMNS = ('email', 'app_uuid', 'blocked_reason', 'ip_address', 'expires_at')
+# Columnas agregadas después de la primera versión de la cola (archivos existentes)
+ADDED_COLUMNS = {
+    'ingest_queue': ('expires_at TEXT',),
+    'ingest_failed': ('expires_at TEXT',),
+}
+
+
+class BlacklistIngestQueue:
+    """Cola local durable de creaciones y el hilo que la vacía"""
+
+    def __init__(self, clock=time.time):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._clock = clock
+        self._app = None
+        self.enabled = False
+        self.path = None
+        self.max_depth = 100000
+        self.batch_size = 1000
+        self.flush_interval = 0.2
+        self.synchronous = 'NORMAL'
+        self.flusher_enabled = True
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._thread = None
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._leader_fd = None
+        self.enqueued = 0
+        self.rejected = 0
+        self.flushed = 0
+
+    def init_app(self, app):
+        """
+        Configura la cola a partir de la configuración de la aplicación
+
+        Raises:
+            ValueError: Si BLACKLIST_CREATE_MODE no es sync ni async
+        """
+        mode = app.config.get('BLACKLIST_CREATE_MODE', CREATE_MODE_SYNC)
+        if mode not in (CREATE_MODE_SYNC, CREATE_MODE_ASYNC):
+            raise ValueError(f'Modo de creación no soportado: {mode}')
+
+        self.stop()
+        self._app = app
+        self.enabled = mode == CREATE_MODE_ASYNC
+        self.path = app.config.get('BLACKLIST_INGEST_QUEUE_PATH', 'blacklist-ingest.db')
+        self.max_depth = app.config.get('BLACKLIST_INGEST_MAX_DEPTH', 100000)
+        self.batch_size = app.config.get('BLACKLIST_INGEST_BATCH_SIZE', 1000)
+        self.flush_interval = app.config.get('BLACKLIST_INGEST_FLUSH_INTERVAL', 0.2)
+        self.synchronous = app.config.get('BLACKLIST_INGEST_SYNCHRONOUS', 'NORMAL')
+        self.flusher_enabled = app.config.get('BLACKLIST_INGEST_FLUSHER_ENABLED', True)
+        with self._lock:
+            self._reset()
+        if self.enabled:
+            # Crea el archivo y las tablas al arrancar para detectar errores de configuración
+            self._connection()
+            app.before_request(self.ensure_flusher)
+
+    def _connection(self):
+        """Conexión a la cola del hilo actual (sqlite3 no comparte conexiones entre hilos)"""
+        key = (os.getpid(), self.path)
+        if getattr(self._local, 'key', None) != key:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(f'PRAGMA synchronous={self.synchronous}')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            for table, columns in ADDED_COLUMNS.items():
+                existing = {row[1] for row in connection.execute(f'PRAGMA table_info({table})')}
+                for column in columns:
+                    if column.split()[0] not in existing:
+                        connection.execute(f'ALTER TABLE {table} ADD COLUMN {column}')
+            self._local.connection = connection
+            self._local.key = key
+        return self._local.connection
+
+    def depth(self):
+        """Filas pendientes (ids consecutivos: se calcula sin recorrer la tabla)"""
+        first, last = self._connection().execute('SELECT min(id), max(id) FROM ingest_queue').fetchone()
+        return 0 if first is None else last - first + 1
+
+    def lag(self):
+        """Segundos desde que se encoló la fila pendiente más antigua"""
+        row = self._connection().execute('SELECT enqueued_at FROM ingest_queue ORDER BY id LIMIT 1').fetchone()
+        return max(self._clock() - row[0], 0.0) if row else 0.0
+
+    def enqueue(self, item):
+        """
+        Guarda una creación en la cola
+
+        El límite de profundidad es aproximado: varios workers pueden
+        encolar a la vez después de leerla.
+
+        Returns:
+            bool: False si la cola está llena
+        """
+        depth = self.depth()
+        if depth >= self.max_depth:
+            self.rejected += 1
+            INGEST_REJECTED.inc()
+            self._wakeup.set()
+            return False
+
+        self._connection().execute(
+            'INSERT INTO ingest_queue (email, app_uuid, blocked_reason, ip_address, expires_at, enqueued_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            tuple(item.get(column) for column in QUEUE_COLUMNS) + (self._clock(),),
+        )
+        self.enqueued += 1
+        self.ensure_flusher()
+        if depth + 1 >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def ensure_flusher(self):
+        """Arranca el hilo que vacía la cola en este proceso si no está corriendo"""
+        if not self.flusher_enabled or (self._thread is not None and self._pid == os.getpid()):
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Proceso hijo (fork de gunicorn): el hilo del padre no existe aquí
+                self._reset()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='blacklist-ingest', daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Detiene el hilo de este proceso; las filas pendientes quedan en la cola"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stop.set()
+            self._wakeup.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        if self._leader_fd is not None:
+            os.close(self._leader_fd)
+            self._leader_fd = None
+
+    def _acquire_leadership(self):
+        if self._leader_fd is not None:
+            return True
+        fd = os.open(f'{self.path}.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._leader_fd = fd
+        return True
+
+    def _run(self):
+        stop = self._stop
+        backoff = self.flush_interval
+        while not stop.is_set():
+            if not self._acquire_leadership():
+                stop.wait(LEADER_RETRY_SECONDS)
+                continue
+            try:
+                flushed = self.flush_once()
+                backoff = self.flush_interval
+            except Exception:
+                logger.exception('No se pudo vaciar la cola de creación de la blacklist')
+                backoff = min(max(backoff, 0.1) * 2, MAX_BACKOFF_SECONDS)
+                stop.wait(backoff)
+                continue
+            if flushed < self.batch_size:
+                # Lote incompleto: se espera a que se junten más filas
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+
+    def flush_once(self):
+        """
+        Envía a la base de datos el lote más antiguo de la cola
+
+        Raises:
+            OperationalError, InterfaceError: Si la base de datos no está
+                disponible; el lote queda en la cola
+
+        Returns:
+            int: Filas retiradas de la cola
+        """
+        connection = self._connection()
+        rows = connection.execute(
+            'SELECT id, email, app_uuid, blocked_reason, ip_address, expires_at, enqueued_at '
+            'FROM ingest_queue ORDER BY id LIMIT ?', (self.batch_size,)
+        ).fetchall()
+        if not rows:
+            QUEUE_DEPTH.set(0)
+            QUEUE_LAG.set(0)
+            return 0
+
+        # Un mismo email encolado varias veces se inserta una sola vez
+        batch = {}
+        for row in rows:
+            batch.setdefault(row[1], row)
+
+        start = time.perf_counter()
+        with self._app.app_context():
+            try:
+                created, failed = self._insert(list(batch.values()))
+            finally:
+                db.session.remove()
+        FLUSH_DURATION.observe(time.perf_counter() - start)
+
+        # La conexión está en autocommit: la transacción se abre explícitamente
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            if failed:
+                connection.executemany(
+                    'INSERT OR REPLACE INTO ingest_failed '
+                    '(id, email, app_uuid, blocked_reason, ip_address, expires_at, enqueued_at, failed_at, error) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [row + (self._clock(), error) for row, error in failed],
+                )
+            connection.execute('DELETE FROM ingest_queue WHERE id <= ?', (rows[-1][0],))
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+        for values in created.values():
+            BlacklistCreateService.after_create(values['email'], values['blocked_reason'], values['expires_at'])
+
+        self.flushed += len(rows)
+        INGEST_ROWS.labels('created').inc(len(created))
+        INGEST_ROWS.labels('duplicate').inc(len(rows) - len(created) - len(failed))
+        INGEST_ROWS.labels('failed').inc(len(failed))
+        QUEUE_DEPTH.set(self.depth())
+        QUEUE_LAG.set(self.lag())
+        return len(rows)
+
+    @staticmethod
+    def _values(row):
+        values = dict(zip(QUEUE_COLUMNS, row[1:6]))
+        if values['expires_at'] is not None:
+            values['expires_at'] = datetime.fromisoformat(values['expires_at'])
+        return values
+
+    def _insert(self, rows):
+        """Inserta el lote; si falla por sus datos, fila por fila. Retorna (creados, fallidos)"""
+        values = [self._values(row) for row in rows]
+        try:
+            created = BlacklistBulkCreateService.insert_chunk(values)
+            db.session.commit()
+        except TRANSIENT_ERRORS:
+            db.session.rollback()
+            raise
+        except SQLAlchemyError:
+            db.session.rollback()
+            logger.warning('Lote de la cola rechazado; se inserta fila por fila', exc_info=True)
+        else:
+            return {item['email']: item for item in values if item['email'] in created}, []
+
+        created = {}
+        failed = []
+        for row, item in zip(rows, values):
+            try:
+                if BlacklistBulkCreateService.insert_chunk([item]):
+                    created[item['email']] = item
+                db.session.commit()
+            except TRANSIENT_ERRORS:
+                db.session.rollback()
+                raise
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                logger.error('Fila de la cola descartada (email %s): %s', row[1], e)
+                failed.append((row, str(e)))
+        return created, failed
+
+    def failed_count(self):
+        """Filas que no se pudieron insertar (tabla ingest_failed)"""
+        return self._connection().execute('SELECT count(*) FROM ingest_failed').fetchone()[0]
+
+    def stats(self):
+        """Retorna profundidad, lag y contadores de la cola"""
+        stats = {
+            'enabled': self.enabled,
+            'max_depth': self.max_depth,
+            'enqueued': self.enqueued,
+            'rejected': self.rejected,
+            'flushed': self.flushed,
+            'leader': self._leader_fd is not None,
+        }
+        if self.enabled:
+            stats.update({
+                'depth': self.depth(),
+                'lag_seconds': self.lag(),
+                'failed': self.failed_count(),
+            })
+        return stats
+
+
+# Instancia compartida por los servicios; se configura en create_app
+blacklist_ingest_queue = BlacklistIngestQueue()
+
+
+class BlacklistIngestService:
+    """Servicio para la creación asíncrona (BLACKLIST_CREATE_MODE=async)"""
+
+    QUEUE_FULL_ERROR = 'La cola de creación está llena, intente más tarde'
+    RETRY_AFTER_SECONDS = 1
+
+    @classmethod
+    def process_create_request(cls, data):
+        """Valida una petición de creación y la encola"""
+        validation_errors = BlacklistCreateService.validate_data(data)
+        if validation_errors:
+            return {
+                'success': False,
+                'errors': validation_errors,
+                'status_code': 400
+            }
+
+        expires_at = BlacklistCreateService.parse_expires_at(data.get('expires_at'))
+        item = {
+            'email': normalize_email(data.get('email')),
+            'app_uuid': data.get('app_uuid'),
+            'blocked_reason': data.get('blocked_reason'),
+            'ip_address': BlacklistCreateService.get_client_ip(),
+            'expires_at': expires_at.isoformat() if expires_at else None
+        }
+        if not blacklist_ingest_queue.enqueue(item):
+            return {
+                'success': False,
+                'errors': [cls.QUEUE_FULL_ERROR],
+                'status_code': 503,
+                'headers': {'Retry-After': str(cls.RETRY_AFTER_SECONDS)}
+            }
+        # La marca cubre también la espera hasta que el lote llega a la base de datos
+        replica_router.record_write(item['ip_address'])
+
+        return {
+            'success': True,
+            'data': item,
+            'message': 'Email encolado para agregarse a la lista negra',
+            'status_code': 202
+        }
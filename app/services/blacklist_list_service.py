@@ -0,0 +1,153 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import select, tuple_
+
+from ..api.client_ip import parse_ip
+from ..api.extensions import db
+from ..api.request_metrics import STAGE_VALIDATION, timed_stage
+from ..models.blacklist import Blacklist
+from .query_params import decode_cursor, encode_cursor, parse_iso_datetime, parse_limit
+from .read_replicas import replica_router
+
+
+class BlacklistListService:
+    """
+    Servicio para listar la blacklist con paginación por llave (keyset).
+
+    Las páginas se recorren por (created_at, email): el cursor guarda la
+    última fila entregada y la siguiente página continúa desde ella con un
+    rango sobre el índice, sin OFFSET, así que cualquier página cuesta lo
+    mismo que la primera.
+    """
+
+    ORDER_ASC = 'asc'
+    ORDER_DESC = 'desc'
+
+    DEFAULT_LIMIT = 50
+    DEFAULT_MAX_LIMIT = 500
+
+    @classmethod
+    @timed_stage(STAGE_VALIDATION)
+    def parse_filters(cls, args, max_limit=DEFAULT_MAX_LIMIT):
+        """
+        Valida los parámetros de la consulta
+
+        Args:
+            args (dict): app_uuid, ip_address, created_from, created_to,
+                order, limit y cursor
+
+        Raises:
+            ValueError: Si algún parámetro no es válido
+
+        Returns:
+            dict: Filtros normalizados para list_page
+        """
+        app_uuid = args.get('app_uuid') or None
+        if app_uuid:
+            try:
+                app_uuid = str(uuid.UUID(app_uuid))
+            except ValueError:
+                raise ValueError('El app_uuid debe ser un UUID válido')
+
+        ip_address = (args.get('ip_address') or '').strip() or None
+        if ip_address:
+            # Se guarda en forma compacta (y en Postgres como INET)
+            ip_address = parse_ip(ip_address)
+            if ip_address is None:
+                raise ValueError('El ip_address debe ser una IP válida')
+
+        order = (args.get('order') or cls.ORDER_DESC).strip().lower()
+        if order not in (cls.ORDER_ASC, cls.ORDER_DESC):
+            raise ValueError('order debe ser asc o desc')
+
+        return {
+            'app_uuid': app_uuid,
+            'ip_address': ip_address,
+            'created_from': parse_iso_datetime(args.get('created_from'), 'created_from'),
+            'created_to': parse_iso_datetime(args.get('created_to'), 'created_to'),
+            'order': order,
+            'limit': parse_limit(args.get('limit'), cls.DEFAULT_LIMIT, max_limit),
+            'cursor': cls.decode_cursor(args.get('cursor')),
+        }
+
+    @staticmethod
+    def encode_cursor(created_at, email):
+        """Codifica (created_at, email) como cursor opaco"""
+        return encode_cursor(created_at.isoformat(), email)
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Decodifica un cursor de listado
+
+        Raises:
+            ValueError: Si el cursor no es válido
+        """
+        values = decode_cursor(cursor, 2)
+        if values is None:
+            return None
+
+        created_at, email = values
+        if not isinstance(created_at, str) or not isinstance(email, str):
+            raise ValueError('El cursor no es válido')
+        try:
+            return datetime.fromisoformat(created_at), email
+        except ValueError:
+            raise ValueError('El cursor no es válido')
+
+    @classmethod
+    def build_query(cls, app_uuid=None, ip_address=None, created_from=None, created_to=None,
+                    order=ORDER_DESC, limit=DEFAULT_LIMIT, cursor=None):
+        """
+        Construye el SELECT de una página.
+
+        Cada filtro por igualdad tiene un índice compuesto que termina en
+        (created_at, email), así que filtro, rango de fechas, cursor y orden
+        se resuelven con un solo recorrido del índice.
+        """
+        stmt = select(Blacklist)
+        if app_uuid is not None:
+            stmt = stmt.where(Blacklist.app_uuid == app_uuid)
+        if ip_address is not None:
+            stmt = stmt.where(Blacklist.ip_address == ip_address)
+        if created_from is not None:
+            stmt = stmt.where(Blacklist.created_at >= created_from)
+        if created_to is not None:
+            stmt = stmt.where(Blacklist.created_at < created_to)
+
+        key = tuple_(Blacklist.created_at, Blacklist.email)
+        if order == cls.ORDER_ASC:
+            if cursor is not None:
+                stmt = stmt.where(key > tuple_(*cursor))
+            stmt = stmt.order_by(Blacklist.created_at.asc(), Blacklist.email.asc())
+        else:
+            if cursor is not None:
+                stmt = stmt.where(key < tuple_(*cursor))
+            stmt = stmt.order_by(Blacklist.created_at.desc(), Blacklist.email.desc())
+
+        # Una fila extra indica si hay página siguiente
+        return stmt.limit(limit + 1)
+
+    @classmethod
+    def list_page(cls, **filters):
+        """
+        Retorna una página del listado
+
+        Returns:
+            dict: items (campos de to_dict), next_cursor (None en la última página) y limit
+        """
+        limit = filters.get('limit', cls.DEFAULT_LIMIT)
+        entries = replica_router.read(lambda: db.session.execute(cls.build_query(**filters)).scalars().all())
+
+        next_cursor = None
+        if len(entries) > limit:
+            entries = entries[:limit]
+            last = entries[-1]
+            next_cursor = cls.encode_cursor(last.created_at, last.email)
+
+        return {
+            'items': [entry.to_dict() for entry in entries],
+            'next_cursor': next_cursor,
+            'limit': limit,
+        }
@@ -0,0 +1,172 @@
+"""
+Retención: purga de las filas expiradas de la blacklist.
+
+Las consultas ya ignoran las filas con expires_at vencido; la purga las
+borra para que no ocupen espacio en la tabla ni en los índices. Borra por
+lotes de BLACKLIST_RETENTION_BATCH_SIZE filas, cada uno en su propia
+transacción corta:
+
+    DELETE FROM blacklist WHERE email IN (
+        SELECT email FROM blacklist WHERE expires_at <= :now
+        ORDER BY expires_at LIMIT :batch_size FOR UPDATE SKIP LOCKED)
+
+El SELECT usa el índice parcial ix_blacklist_expires_at y SKIP LOCKED evita
+esperar filas que otra transacción tiene tomadas, así que la purga no
+bloquea creaciones ni a otro proceso que esté purgando al mismo tiempo.
+Entre lotes espera BLACKLIST_RETENTION_PAUSE segundos para que autovacuum y
+las réplicas no se atrasen.
+
+Con BLACKLIST_RETENTION_ENABLED un hilo por proceso purga cada
+BLACKLIST_RETENTION_INTERVAL segundos; sin él se puede correr como tarea
+programada con `flask blacklist purge-expired`.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from prometheus_client import Counter
+from sqlalchemy import bindparam, delete, select
+
+from ..api.extensions import db
+from ..models.blacklist import Blacklist
+
+logger = logging.getLogger(__name__)
+
+_blacklist = Blacklist.__table__
+
+PURGED_ROWS = Counter('blacklist_retention_purged_rows', 'Filas expiradas borradas por la purga')
+
+EXPIRED_BATCH = select(_blacklist.c.email) \
+    .where(_blacklist.c.expires_at <= bindparam('now')) \
+    .order_by(_blacklist.c.expires_at) \
+    .limit(bindparam('batch_size')) \
+    .with_for_update(skip_locked=True)
+PURGE_BATCH = delete(_blacklist).where(_blacklist.c.email.in_(EXPIRED_BATCH.scalar_subquery()))
+
+
+class BlacklistRetention:
+    """Purga por lotes de filas expiradas y el hilo que la ejecuta periódicamente"""
+
+    def __init__(self, clock=time.monotonic, sleep=time.sleep):
+        self._lock = threading.Lock()
+        self._clock = clock
+        self._sleep = sleep
+        self._app = None
+        self.enabled = False
+        self.interval = 300.0
+        self.batch_size = 1000
+        self.max_batches = 0
+        self.pause = 0.1
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._thread = None
+        self._stop = threading.Event()
+        self.runs = 0
+        self.purged = 0
+        self.last_run_seconds = None
+
+    def init_app(self, app):
+        """Configura la purga a partir de la configuración de la aplicación"""
+        self.stop()
+        self._app = app
+        self.enabled = app.config.get('BLACKLIST_RETENTION_ENABLED', False)
+        self.interval = app.config.get('BLACKLIST_RETENTION_INTERVAL', 300.0)
+        self.batch_size = app.config.get('BLACKLIST_RETENTION_BATCH_SIZE', 1000)
+        self.max_batches = app.config.get('BLACKLIST_RETENTION_MAX_BATCHES', 0)
+        self.pause = app.config.get('BLACKLIST_RETENTION_PAUSE', 0.1)
+        with self._lock:
+            self._reset()
+        if self.enabled:
+            app.before_request(self.ensure_worker)
+
+    def purge_expired(self, now=None, batch_size=None, max_batches=None):
+        """
+        Borra las filas expiradas hasta now por lotes; requiere contexto de aplicación
+
+        Args:
+            batch_size (int): Filas por lote (por defecto BLACKLIST_RETENTION_BATCH_SIZE)
+            max_batches (int): Máximo de lotes en esta corrida (0 = hasta terminar)
+
+        Returns:
+            int: Filas borradas
+        """
+        now = now or datetime.utcnow()
+        batch_size = batch_size or self.batch_size
+        max_batches = self.max_batches if max_batches is None else max_batches
+
+        start = self._clock()
+        purged = batches = 0
+        while True:
+            try:
+                deleted = db.session.execute(PURGE_BATCH, {'now': now, 'batch_size': batch_size}).rowcount
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            purged += deleted
+            batches += 1
+            PURGED_ROWS.inc(deleted)
+            if deleted < batch_size or (max_batches and batches >= max_batches):
+                break
+            if self.pause > 0:
+                self._sleep(self.pause)
+
+        with self._lock:
+            self.runs += 1
+            self.purged += purged
+            self.last_run_seconds = self._clock() - start
+        return purged
+
+    def ensure_worker(self):
+        """Arranca el hilo de purga en este proceso si no está corriendo"""
+        if not self.enabled or (self._thread is not None and self._pid == os.getpid()):
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Proceso hijo (fork de gunicorn): el hilo del padre no existe aquí
+                self._reset()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, args=(self._stop,),
+                                                name='blacklist-retention', daemon=True)
+                self._thread.start()
+
+    def _run(self, stop):
+        while not stop.wait(self.interval):
+            with self._app.app_context():
+                try:
+                    purged = self.purge_expired()
+                    if purged:
+                        logger.info('Filas expiradas purgadas: %d', purged)
+                except Exception:
+                    logger.exception('No se pudieron purgar las filas expiradas de la blacklist')
+                finally:
+                    db.session.remove()
+
+    def stop(self, timeout=5.0):
+        """Detiene el hilo de este proceso"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stop.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def stats(self):
+        """Retorna la configuración y los contadores de la purga"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'interval': self.interval,
+                'batch_size': self.batch_size,
+                'runs': self.runs,
+                'purged': self.purged,
+                'last_run_seconds': self.last_run_seconds,
+            }
+
+
+# Instancia compartida; se configura en create_app
+blacklist_retention = BlacklistRetention()
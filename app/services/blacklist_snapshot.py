@@ -0,0 +1,326 @@
+"""
+Snapshot estático de la blacklist en un archivo mapeado en memoria.
+
+`flask blacklist snapshot` vuelca la tabla a un archivo compacto y, con
+BLACKLIST_LOOKUP_MODE=snapshot, BlacklistGetService responde las consultas
+desde ese archivo sin tocar la base de datos (réplicas de solo lectura).
+
+Formato (orden de bytes nativo, indicado en el encabezado):
+
+- encabezado (HEADER)
+- llaves: hash de 64 bits (blake2b) de cada email, ordenadas
+- expiraciones: por cada llave, su expires_at en segundos epoch con signo
+  de 64 bits (0 si no expira); una llave expirada se responde como no
+  bloqueada
+- motivos: por cada llave, el offset de su motivo en la tabla de motivos
+  (NO_REASON si es nulo)
+- tabla de motivos: cada motivo distinto una sola vez, con su largo (u16)
+  y el texto en UTF-8
+
+La consulta es una búsqueda binaria sobre las llaves directamente en el
+mmap, así que los workers de gunicorn comparten las páginas del archivo
+(page cache) sin copiarlas. Con hashes de 64 bits, la probabilidad de que un
+email que no está se reporte bloqueado es del orden de n / 2^64 (5e-13 con
+10 millones de filas).
+
+Un snapshot nuevo se escribe en un archivo temporal del mismo directorio y
+se publica con os.replace (atómico); cada proceso revisa el archivo cada
+BLACKLIST_SNAPSHOT_CHECK_SECONDS y cambia al nuevo sin cortar consultas.
+"""
+import bisect
+import calendar
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+
+from datetime import datetime
+
+from sqlalchemy import func, or_, select
+
+from ..api.extensions import db
+from ..models.blacklist import Blacklist
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_MODE_DB = 'db'
+LOOKUP_MODE_SNAPSHOT = 'snapshot'
+
+MAGIC = b'BLSNAP01'
+VERSION = 3
+# magic, versión, orden de bytes (0 little, 1 big), filas, offset de llaves,
+# offset de motivos por llave, offset de expiraciones, offset y tamaño de la
+# tabla de motivos, change_seq máximo (-1 si no hay) y fecha de creación (epoch)
+HEADER = struct.Struct('<8sIIQQQQQQqd')
+REASON_LENGTH = struct.Struct('<H')
+NO_REASON = 0xFFFFFFFF
+BYTE_ORDER = 0 if sys.byteorder == 'little' else 1
+
+
+def email_hash(email):
+    """Llave de 64 bits de un email ya normalizado"""
+    return int.from_bytes(hashlib.blake2b(email.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _align(offset, size=8):
+    return -(-offset // size) * size
+
+
+def _expires_epoch(expires_at):
+    """expires_at (UTC sin zona) en segundos epoch redondeados hacia arriba; 0 si no expira"""
+    if expires_at is None:
+        return 0
+    return calendar.timegm(expires_at.utctimetuple()) + (1 if expires_at.microsecond else 0)
+
+
+def write_snapshot(path, rows, change_seq=None):
+    """
+    Escribe un snapshot con las filas (email normalizado, blocked_reason) o
+    (email normalizado, blocked_reason, expires_at) y lo publica de forma
+    atómica en path
+
+    Returns:
+        int: Cantidad de llaves escritas
+    """
+    reasons = {}
+    blob = bytearray()
+    entries = []
+    for email, blocked_reason, *expires_at in rows:
+        if blocked_reason is None:
+            reason_offset = NO_REASON
+        else:
+            reason_offset = reasons.get(blocked_reason)
+            if reason_offset is None:
+                encoded = blocked_reason.encode('utf-8')[:0xFFFF]
+                reason_offset = reasons[blocked_reason] = len(blob)
+                blob += REASON_LENGTH.pack(len(encoded)) + encoded
+        # Hash y motivo en un solo entero para ordenar sin índices auxiliares
+        entries.append((email_hash(email) << 32 | reason_offset,
+                        _expires_epoch(expires_at[0] if expires_at else None)))
+    entries.sort()
+
+    keys = array('Q')
+    offsets = array('I')
+    expirations = array('q')
+    previous = None
+    for entry, expires in entries:
+        key = entry >> 32
+        if key != previous:
+            keys.append(key)
+            offsets.append(entry & NO_REASON)
+            expirations.append(expires)
+            previous = key
+
+    count = len(keys)
+    # Los arreglos de 8 bytes primero para que queden alineados
+    keys_offset = _align(HEADER.size)
+    expires_offset = keys_offset + count * keys.itemsize
+    offsets_offset = expires_offset + count * expirations.itemsize
+    reasons_offset = offsets_offset + count * offsets.itemsize
+    header = HEADER.pack(MAGIC, VERSION, BYTE_ORDER, count, keys_offset, offsets_offset, expires_offset,
+                         reasons_offset, len(blob), -1 if change_seq is None else change_seq, time.time())
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.blacklist-snapshot-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            output.write(header.ljust(keys_offset, b'\0'))
+            keys.tofile(output)
+            expirations.tofile(output)
+            offsets.tofile(output)
+            output.write(blob)
+            output.flush()
+            os.fsync(output.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return count
+
+
+def build_snapshot(path, batch_size=1000):
+    """
+    Vuelca la tabla blacklist a un snapshot en path, sin las filas ya expiradas
+
+    Returns:
+        dict: Filas, change_seq incluido y tamaño del archivo
+    """
+    change_seq = db.session.execute(select(func.max(Blacklist.change_seq))).scalar()
+    rows = db.session.execute(
+        select(Blacklist.email, Blacklist.blocked_reason, Blacklist.expires_at)
+        .where(or_(Blacklist.expires_at.is_(None), Blacklist.expires_at > datetime.utcnow()))
+        .execution_options(yield_per=batch_size)
+    )
+    count = write_snapshot(path, rows, change_seq)
+    return {'rows': count, 'change_seq': change_seq, 'bytes': os.path.getsize(path)}
+
+
+class SnapshotFile:
+    """
+    Snapshot abierto con mmap de solo lectura
+
+    Raises:
+        ValueError: Si el archivo no es un snapshot válido para este proceso
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as snapshot:
+            self._map = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        if len(self._map) < HEADER.size:
+            raise ValueError(f'Snapshot inválido: {path}')
+
+        (magic, version, byte_order, self.count, keys_offset, offsets_offset, expires_offset,
+         reasons_offset, reasons_size, change_seq, self.created_at) = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'Snapshot inválido: {path}')
+        if byte_order != BYTE_ORDER:
+            raise ValueError(f'Snapshot generado con otro orden de bytes: {path}')
+        if reasons_offset + reasons_size != len(self._map):
+            raise ValueError(f'Snapshot incompleto: {path}')
+
+        self.change_seq = None if change_seq < 0 else change_seq
+        view = memoryview(self._map)
+        self._keys = view[keys_offset:expires_offset].cast('Q')
+        self._expirations = view[expires_offset:offsets_offset].cast('q')
+        self._offsets = view[offsets_offset:reasons_offset].cast('I')
+        self._reasons_offset = reasons_offset
+
+    def get(self, email):
+        """Retorna el resultado de consulta de un email ya normalizado"""
+        key = email_hash(email)
+        index = bisect.bisect_left(self._keys, key)
+        if index == self.count or self._keys[index] != key:
+            return {'is_blocked': False}
+        expires = self._expirations[index]
+        if expires and expires <= time.time():
+            return {'is_blocked': False}
+
+        reason_offset = self._offsets[index]
+        if reason_offset == NO_REASON:
+            return {'is_blocked': True, 'blocked_reason': None}
+        start = self._reasons_offset + reason_offset
+        (length,) = REASON_LENGTH.unpack_from(self._map, start)
+        start += REASON_LENGTH.size
+        return {'is_blocked': True, 'blocked_reason': self._map[start:start + length].decode('utf-8')}
+
+    @property
+    def size(self):
+        return len(self._map)
+
+
+class BlacklistSnapshot:
+    """
+    Consultas desde el snapshot cuando BLACKLIST_LOOKUP_MODE=snapshot.
+
+    El archivo se abre en init_app (con preload_app, en el master: los
+    workers heredan el mapeo) y se vuelve a abrir cuando cambia en disco.
+    Sin snapshot cargado las consultas siguen yendo a la base de datos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enabled = False
+        self.path = None
+        self.check_interval = 5.0
+        self._reset()
+
+    def _reset(self):
+        self._current = None
+        self._signature = None
+        self._next_check = 0.0
+        self.swaps = 0
+        self.lookups = 0
+
+    def init_app(self, app):
+        """
+        Configura el modo de consulta a partir de la configuración de la aplicación
+
+        Raises:
+            ValueError: Si BLACKLIST_LOOKUP_MODE no es db ni snapshot
+        """
+        mode = app.config.get('BLACKLIST_LOOKUP_MODE', LOOKUP_MODE_DB)
+        if mode not in (LOOKUP_MODE_DB, LOOKUP_MODE_SNAPSHOT):
+            raise ValueError(f'Modo de consulta no soportado: {mode}')
+        self.enabled = mode == LOOKUP_MODE_SNAPSHOT
+        self.path = app.config.get('BLACKLIST_SNAPSHOT_PATH')
+        self.check_interval = app.config.get('BLACKLIST_SNAPSHOT_CHECK_SECONDS', 5.0)
+        with self._lock:
+            self._reset()
+        if self.enabled:
+            self.reload()
+
+    def lookup(self, email):
+        """Resultado del snapshot para un email normalizado, o None si no hay snapshot"""
+        if not self.enabled:
+            return None
+
+        if time.monotonic() >= self._next_check:
+            self.reload()
+        snapshot = self._current
+        if snapshot is None:
+            return None
+        self.lookups += 1
+        return snapshot.get(email)
+
+    def reload(self):
+        """Abre el snapshot si el archivo cambió desde la última revisión"""
+        # Un solo hilo revisa el archivo; los demás siguen con el snapshot actual
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = time.monotonic() + self.check_interval
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                if self._signature != 'missing':
+                    logger.warning('No existe el snapshot de la blacklist %s', self.path)
+                    self._signature = 'missing'
+                return
+
+            signature = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if signature == self._signature:
+                return
+            self._signature = signature
+            try:
+                snapshot = SnapshotFile(self.path)
+            except (OSError, ValueError):
+                logger.exception('No se pudo abrir el snapshot de la blacklist %s', self.path)
+                return
+            # Las consultas en curso terminan con el mapeo anterior, que se
+            # libera cuando deja de estar referenciado
+            if self._current is not None:
+                self.swaps += 1
+            self._current = snapshot
+        finally:
+            self._lock.release()
+
+    def stats(self):
+        """Retorna el estado del snapshot cargado"""
+        snapshot = self._current
+        stats = {
+            'enabled': self.enabled,
+            'loaded': snapshot is not None,
+            'path': self.path,
+            'swaps': self.swaps,
+            'lookups': self.lookups,
+        }
+        if snapshot is not None:
+            stats.update({
+                'rows': snapshot.count,
+                'bytes': snapshot.size,
+                'change_seq': snapshot.change_seq,
+                'age_seconds': time.time() - snapshot.created_at,
+            })
+        return stats
+
+
+# Instancia compartida por los servicios; se configura en create_app
+blacklist_snapshot = BlacklistSnapshot()
@@ -0,0 +1,362 @@
+"""
+Backends del caché de consultas de la blacklist (ver BlacklistCache).
+
+- local: LRU en memoria del proceso; cada worker tiene el suyo.
+- shared: tabla hash en un archivo mapeado en memoria (mmap, por defecto en
+  /dev/shm) que comparten todos los workers del mismo host.
+- redis: servidor Redis (o compatible) que comparten todas las tareas.
+
+Todos guardan el resultado de la consulta con un TTL y exponen get, set,
+delete, clear y stats. shared y redis lo guardan serializado en JSON.
+"""
+import copy
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - depende del entorno
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+BACKEND_LOCAL = 'local'
+BACKEND_SHARED = 'shared'
+BACKEND_REDIS = 'redis'
+
+
+def _dumps(value):
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def _loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class LocalCacheBackend:
+    """LRU + TTL en memoria del proceso"""
+
+    name = BACKEND_LOCAL
+
+    def __init__(self, max_size=0, clock=time.monotonic):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._clock = clock
+        self.max_size = max_size
+        self.evictions = 0
+
+    def get(self, key):
+        """Retorna una copia del valor o None si no existe o expiró"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                # Entrada vencida: se descarta y cuenta como fallo
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return copy.copy(value)
+
+    def set(self, key, value, ttl):
+        """Guarda un valor, expulsando el menos usado si está lleno"""
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, copy.copy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'evictions': self.evictions}
+
+
+def default_shared_path():
+    """Archivo del caché compartido: en /dev/shm (RAM) si existe"""
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, 'blacklist-cache')
+
+
+class SharedMemoryCacheBackend:
+    """
+    Tabla hash de tamaño fijo en un archivo mapeado en memoria.
+
+    El archivo se divide en buckets de WAYS slots de SLOT_SIZE bytes; cada
+    email va al bucket de su crc32 y ocupa un slot con su expiración, el
+    email y el resultado en JSON. Con el bucket lleno se reemplaza la
+    entrada que vence primero (con TTL fijo, la más antigua). Las entradas
+    que no caben en un slot no se cachean.
+
+    Entre procesos cada bucket se protege con un lock de rango (fcntl.lockf)
+    y entre los hilos de un proceso con un threading.Lock, porque los locks
+    de fcntl pertenecen al proceso. Con preload_app los workers heredan el
+    mapeo del master; sin él cada uno abre el mismo archivo. Los procesos
+    que comparten el archivo deben usar el mismo BLACKLIST_CACHE_MAX_SIZE:
+    si la estructura no coincide, el archivo se reinicia.
+    """
+
+    name = BACKEND_SHARED
+
+    MAGIC = b'BLCACHE1'
+    HEADER = struct.Struct('<8sIII')
+    HEADER_SIZE = 64
+    SLOT_HEADER = struct.Struct('<dHH')
+    SLOT_SIZE = 512
+    WAYS = 8
+
+    def __init__(self, path, max_size, clock=time.time):
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.path = path
+        self.max_size = max_size
+        self.num_buckets = max(1, -(-max_size // self.WAYS))
+        self._bucket_size = self.WAYS * self.SLOT_SIZE
+        self._data_size = self.num_buckets * self._bucket_size
+        self.evictions = 0
+        self.oversize = 0
+
+        size = self.HEADER_SIZE + self._data_size
+        header = self.HEADER.pack(self.MAGIC, self.num_buckets, self.WAYS, self.SLOT_SIZE)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != size or os.pread(self._fd, self.HEADER.size, 0) != header:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, header, 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+
+    def _bucket_offset(self, key_bytes):
+        return self.HEADER_SIZE + (zlib.crc32(key_bytes) % self.num_buckets) * self._bucket_size
+
+    def _find(self, base, key_bytes):
+        """Offset, expiración y largo del valor del slot del email, o None"""
+        data = self._map
+        key_len = len(key_bytes)
+        start = self.SLOT_HEADER.size
+        for offset in range(base, base + self._bucket_size, self.SLOT_SIZE):
+            expires_at, slot_key_len, value_len = self.SLOT_HEADER.unpack_from(data, offset)
+            if slot_key_len == key_len and data[offset + start:offset + start + key_len] == key_bytes:
+                return offset, expires_at, value_len
+        return None
+
+    def _lock_bucket(self, base, mode):
+        self._lock.acquire()
+        try:
+            fcntl.lockf(self._fd, mode, self._bucket_size, base)
+        except BaseException:
+            self._lock.release()
+            raise
+
+    def _unlock_bucket(self, base):
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, self._bucket_size, base)
+        finally:
+            self._lock.release()
+
+    def get(self, key):
+        key_bytes = key.encode('utf-8')
+        base = self._bucket_offset(key_bytes)
+        self._lock_bucket(base, fcntl.LOCK_SH)
+        try:
+            found = self._find(base, key_bytes)
+            if found is None:
+                return None
+            offset, expires_at, value_len = found
+            if expires_at <= self._clock():
+                return None
+            start = offset + self.SLOT_HEADER.size + len(key_bytes)
+            raw = self._map[start:start + value_len]
+        finally:
+            self._unlock_bucket(base)
+        return _loads(raw)
+
+    def set(self, key, value, ttl):
+        key_bytes = key.encode('utf-8')
+        value_bytes = _dumps(value)
+        if self.SLOT_HEADER.size + len(key_bytes) + len(value_bytes) > self.SLOT_SIZE:
+            # No cabe en un slot: se descarta también la entrada anterior del email
+            self.oversize += 1
+            self.delete(key)
+            return
+
+        now = self._clock()
+        base = self._bucket_offset(key_bytes)
+        self._lock_bucket(base, fcntl.LOCK_EX)
+        try:
+            found = self._find(base, key_bytes)
+            if found is not None:
+                offset = found[0]
+            else:
+                offset, victim_expires_at = self._victim(base)
+                if victim_expires_at > now:
+                    self.evictions += 1
+            self.SLOT_HEADER.pack_into(self._map, offset, now + ttl, len(key_bytes), len(value_bytes))
+            start = offset + self.SLOT_HEADER.size
+            self._map[start:start + len(key_bytes) + len(value_bytes)] = key_bytes + value_bytes
+        finally:
+            self._unlock_bucket(base)
+
+    def _victim(self, base):
+        """Slot libre del bucket o, si no hay, el que vence primero"""
+        victim = None
+        for offset in range(base, base + self._bucket_size, self.SLOT_SIZE):
+            expires_at, key_len, _ = self.SLOT_HEADER.unpack_from(self._map, offset)
+            if key_len == 0:
+                return offset, 0.0
+            if victim is None or expires_at < victim[1]:
+                victim = (offset, expires_at)
+        return victim
+
+    def delete(self, key):
+        key_bytes = key.encode('utf-8')
+        base = self._bucket_offset(key_bytes)
+        self._lock_bucket(base, fcntl.LOCK_EX)
+        try:
+            found = self._find(base, key_bytes)
+            if found is not None:
+                self.SLOT_HEADER.pack_into(self._map, found[0], 0.0, 0, 0)
+        finally:
+            self._unlock_bucket(base)
+
+    def clear(self):
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self._data_size, self.HEADER_SIZE)
+            try:
+                self._map[self.HEADER_SIZE:] = bytes(self._data_size)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self._data_size, self.HEADER_SIZE)
+            self.evictions = 0
+            self.oversize = 0
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+    def stats(self):
+        # Recorrido sin locks: el tamaño es aproximado
+        now = self._clock()
+        size = 0
+        for offset in range(self.HEADER_SIZE, self.HEADER_SIZE + self._data_size, self.SLOT_SIZE):
+            expires_at, key_len, _ = self.SLOT_HEADER.unpack_from(self._map, offset)
+            if key_len and expires_at > now:
+                size += 1
+        return {
+            'size': size,
+            'capacity': self.num_buckets * self.WAYS,
+            'evictions': self.evictions,
+            'oversize': self.oversize,
+            'path': self.path,
+        }
+
+
+class RedisCacheBackend:
+    """
+    Caché en Redis: SET con PX (el servidor expira las entradas) y GET.
+
+    El tamaño lo controla la política de memoria del servidor (p. ej.
+    maxmemory-policy allkeys-lru). Un error de Redis no hace fallar la
+    consulta: se registra, cuenta como fallo y se consulta la base de datos.
+    """
+
+    name = BACKEND_REDIS
+    PREFIX = 'blacklist:cache:'
+
+    def __init__(self, client):
+        self.client = client
+        self.errors = 0
+
+    @classmethod
+    def from_url(cls, url, timeout=0.1):
+        """Crea el backend con un cliente para la URL (redis://host:puerto/db)"""
+        if redis is None:
+            raise RuntimeError('BLACKLIST_CACHE_BACKEND=redis requiere el paquete redis')
+        return cls(redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout))
+
+    def _error(self, operation):
+        self.errors += 1
+        logger.warning('Error de Redis en %s del caché de la blacklist', operation, exc_info=True)
+
+    def get(self, key):
+        try:
+            raw = self.client.get(self.PREFIX + key)
+        except redis.RedisError:
+            self._error('get')
+            return None
+        return _loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        try:
+            self.client.set(self.PREFIX + key, _dumps(value), px=max(int(ttl * 1000), 1))
+        except redis.RedisError:
+            self._error('set')
+
+    def delete(self, key):
+        try:
+            self.client.delete(self.PREFIX + key)
+        except redis.RedisError:
+            self._error('delete')
+
+    def clear(self):
+        try:
+            keys = list(self.client.scan_iter(match=self.PREFIX + '*', count=1000))
+            for start in range(0, len(keys), 1000):
+                self.client.delete(*keys[start:start + 1000])
+        except redis.RedisError:
+            self._error('clear')
+        self.errors = 0
+
+    def stats(self):
+        # Contar las claves requiere recorrer el keyspace: no se reporta tamaño
+        return {'size': None, 'errors': self.errors}
+
+
+def create_backend(config, max_size, clock=time.monotonic):
+    """
+    Crea el backend indicado en BLACKLIST_CACHE_BACKEND
+
+    Raises:
+        ValueError: Si el backend no existe
+    """
+    name = config.get('BLACKLIST_CACHE_BACKEND') or BACKEND_LOCAL
+    if name == BACKEND_LOCAL or max_size <= 0:
+        return LocalCacheBackend(max_size, clock)
+    if name == BACKEND_SHARED:
+        return SharedMemoryCacheBackend(config.get('BLACKLIST_CACHE_SHARED_PATH') or default_shared_path(), max_size)
+    if name == BACKEND_REDIS:
+        return RedisCacheBackend.from_url(config.get('BLACKLIST_CACHE_REDIS_URL'),
+                                          config.get('BLACKLIST_CACHE_REDIS_TIMEOUT', 0.1))
+    raise ValueError(f'Backend de caché no soportado: {name}')
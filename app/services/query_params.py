@@ -0,0 +1,69 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+
+
+def parse_iso_datetime(value, name):
+    """
+    Convierte un parámetro ISO 8601 en un datetime UTC sin zona horaria, como
+    se guardan created_at y updated_at. Las fechas sin zona se toman como UTC.
+
+    Raises:
+        ValueError: Si la fecha no es ISO 8601 válida
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f'{name} debe ser una fecha ISO 8601 válida')
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_limit(value, default, max_limit):
+    """
+    Valida el tamaño de página pedido
+
+    Raises:
+        ValueError: Si no es un entero entre 1 y max_limit
+    """
+    if value in (None, ''):
+        return min(default, max_limit)
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('limit debe ser un entero')
+
+    if limit < 1 or limit > max_limit:
+        raise ValueError(f'limit debe estar entre 1 y {max_limit}')
+    return limit
+
+
+def encode_cursor(*values):
+    """Codifica los valores de la última fila entregada como cursor opaco"""
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """
+    Decodifica un cursor de `size` valores; sin cursor retorna None
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, TypeError, ValueError):
+        raise ValueError('El cursor no es válido')
+
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('El cursor no es válido')
+    return values
@@ -0,0 +1,306 @@
+"""
+Enrutamiento de lecturas a réplicas de la base de datos.
+
+Con DATABASE_REPLICA_URLS (URLs separadas por comas) las consultas de
+BlacklistGetService, el listado y la exportación se ejecutan en una réplica
+de lectura; las creaciones y el resto de sentencias siguen yendo a
+SQLALCHEMY_DATABASE_URI (primario). Sin réplicas todo va al primario.
+
+- Las réplicas disponibles se usan en round-robin.
+- Si una lectura falla por la conexión, la réplica sale de rotación por
+  DB_REPLICA_RETRY_SECONDS y la lectura se repite en la siguiente réplica
+  y, por último, en el primario.
+- Un hilo por proceso revisa las réplicas cada DB_REPLICA_HEALTH_INTERVAL
+  (SELECT 1; en Postgres, con DB_REPLICA_MAX_LAG_SECONDS, también el
+  retraso de replicación) y saca o devuelve cada una a la rotación.
+- Read-your-writes: tras una creación, las lecturas del mismo cliente (IP)
+  van al primario durante DB_REPLICA_STICKY_SECONDS. La marca se guarda en
+  el backend del caché cuando es compartido (shared o redis), así la ven
+  todos los workers; si no, en la memoria del worker.
+- Un "no bloqueado" leído de una réplica puede ser una creación que aún no
+  llegó: BlacklistGetService no lo guarda en el caché, para no pisar el
+  resultado que la creación dejó ahí (write-through).
+"""
+import itertools
+import logging
+import os
+import threading
+import time
+
+from flask import has_request_context, request
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from ..api.client_ip import CLIENT_IP_ENVIRON_KEY, client_ip_resolver
+from ..api.extensions import db, read_engine
+from ..api.query_monitor import query_monitor
+from ..api.request_metrics import request_metrics
+from .blacklist_cache import blacklist_cache
+from .cache_backends import LocalCacheBackend
+
+logger = logging.getLogger(__name__)
+
+# Errores que indican que la réplica no responde (no errores de la consulta)
+FAILOVER_ERRORS = (OperationalError, InterfaceError, PoolTimeoutError)
+
+STICKY_PREFIX = 'replica-sticky:'
+STICKY_MAX_CLIENTS = 100000
+
+SELECT_ONE = text('SELECT 1')
+# Segundos de retraso de la réplica; 0 si ya aplicó todo lo recibido (o si
+# no es una réplica) aunque el primario lleve tiempo sin escrituras
+POSTGRES_LAG = text(
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END'
+)
+
+
+def parse_replica_urls(value):
+    """Lista de URLs a partir de un texto separado por comas"""
+    return [url.strip() for url in (value or '').split(',') if url.strip()]
+
+
+class Replica:
+    """Engine de una réplica y su estado en este proceso"""
+
+    def __init__(self, url, engine):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = engine
+        self.down_until = 0.0
+        self.lag = None
+        self.reads = 0
+        self.failures = 0
+        self.last_error = None
+
+    def available(self, now):
+        return now >= self.down_until
+
+
+class ReplicaRouter:
+    """
+    Elige dónde se ejecuta cada lectura: una réplica disponible o el primario.
+
+    Las lecturas se ejecutan con read(fn): mientras corre fn, db.session
+    (RoutingSession) envía las sentencias que no son escrituras al engine
+    de la réplica elegida.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.replicas = []
+        self.sticky_seconds = 5.0
+        self.retry_seconds = 10.0
+        self.health_interval = 5.0
+        self.max_lag = 0.0
+        self._sticky = LocalCacheBackend(STICKY_MAX_CLIENTS, clock)
+        self._counter = itertools.count()
+        self._thread = None
+        self._stop = threading.Event()
+        self._pid = None
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.primary_reads = 0
+        self.sticky_reads = 0
+        self.failovers = 0
+
+    def init_app(self, app):
+        """Crea un engine por réplica con las mismas opciones que el primario"""
+        self.stop()
+        self.dispose()
+        self.sticky_seconds = app.config.get('DB_REPLICA_STICKY_SECONDS', 5.0)
+        self.retry_seconds = app.config.get('DB_REPLICA_RETRY_SECONDS', 10.0)
+        self.health_interval = app.config.get('DB_REPLICA_HEALTH_INTERVAL', 5.0)
+        self.max_lag = app.config.get('DB_REPLICA_MAX_LAG_SECONDS', 0.0)
+
+        engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        self.replicas = []
+        for url in parse_replica_urls(app.config.get('DATABASE_REPLICA_URLS')):
+            engine = create_engine(url, **engine_options)
+            request_metrics.instrument_engine(engine)
+            query_monitor.instrument_engine(engine)
+            self.replicas.append(Replica(url, engine))
+
+        # Con un backend compartido la marca de read-your-writes la ven todos
+        # los workers; con el local cada worker tiene la suya
+        if blacklist_cache.blocking:
+            self._sticky = blacklist_cache.backend
+        else:
+            self._sticky = LocalCacheBackend(STICKY_MAX_CLIENTS, self._clock)
+        with self._lock:
+            self._reset_counters()
+
+    @property
+    def enabled(self):
+        return bool(self.replicas)
+
+    def dispose(self, close=True):
+        """Libera las conexiones de las réplicas (close=False tras un fork)"""
+        for replica in self.replicas:
+            replica.engine.dispose(close=close)
+
+    @staticmethod
+    def _current_client():
+        if not has_request_context():
+            return None
+        environ = request.environ
+        if CLIENT_IP_ENVIRON_KEY in environ:
+            return environ[CLIENT_IP_ENVIRON_KEY]
+        return client_ip_resolver.resolve_environ(environ)
+
+    def record_write(self, client):
+        """Envía al primario las lecturas del cliente durante DB_REPLICA_STICKY_SECONDS"""
+        if self.enabled and client and self.sticky_seconds > 0:
+            self._sticky.set(STICKY_PREFIX + client, True, self.sticky_seconds)
+
+    def is_sticky(self):
+        """True si el cliente de la petición en curso escribió hace poco"""
+        client = self._current_client()
+        return client is not None and self._sticky.get(STICKY_PREFIX + client) is not None
+
+    def _candidates(self):
+        """Réplicas disponibles desde la siguiente en el round-robin y al final el primario (None)"""
+        now = self._clock()
+        available = [replica for replica in self.replicas if replica.available(now)]
+        if available:
+            start = next(self._counter) % len(available)
+            available = available[start:] + available[:start]
+        return available + [None]
+
+    def read(self, fn):
+        """
+        Ejecuta la lectura fn en una réplica y, si no responde, en la
+        siguiente o en el primario
+
+        Returns:
+            El resultado de fn
+        """
+        return self.read_with_source(fn)[0]
+
+    def read_with_source(self, fn):
+        """
+        Como read, pero indica si el resultado viene de una réplica (y
+        puede no incluir escrituras recientes del primario)
+
+        Returns:
+            tuple: (resultado de fn, True si se leyó de una réplica)
+        """
+        if not self.replicas:
+            return fn(), False
+        if self.is_sticky():
+            with self._lock:
+                self.sticky_reads += 1
+            return fn(), False
+
+        self.ensure_health_checker()
+        for replica in self._candidates():
+            if replica is None:
+                with self._lock:
+                    self.primary_reads += 1
+                return fn(), False
+
+            token = read_engine.set(replica.engine)
+            try:
+                result = fn()
+            except FAILOVER_ERRORS as e:
+                # La transacción de la sesión quedó inválida para esa réplica
+                db.session.rollback()
+                self.mark_down(replica, e)
+                with self._lock:
+                    self.failovers += 1
+                continue
+            finally:
+                read_engine.reset(token)
+            with self._lock:
+                replica.reads += 1
+            return result, True
+
+    def mark_down(self, replica, error):
+        """Saca la réplica de rotación por DB_REPLICA_RETRY_SECONDS"""
+        with self._lock:
+            was_available = replica.available(self._clock())
+            replica.down_until = self._clock() + self.retry_seconds
+            replica.failures += 1
+            replica.last_error = str(error)
+        if was_available:
+            logger.warning('Réplica %s fuera de rotación: %s', replica.name, error)
+
+    def check_health(self):
+        """Revisa cada réplica y actualiza su disponibilidad y retraso"""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as connection:
+                    if self.max_lag > 0 and connection.dialect.name == 'postgresql':
+                        lag = float(connection.execute(POSTGRES_LAG).scalar())
+                    else:
+                        connection.execute(SELECT_ONE)
+                        lag = None
+            except FAILOVER_ERRORS as e:
+                self.mark_down(replica, e)
+                continue
+
+            replica.lag = lag
+            if lag is not None and lag > self.max_lag:
+                self.mark_down(replica, f'retraso de replicación de {lag:.1f} s')
+                continue
+            with self._lock:
+                if not replica.available(self._clock()):
+                    logger.info('Réplica %s de vuelta en rotación', replica.name)
+                replica.down_until = 0.0
+
+    def ensure_health_checker(self):
+        """Arranca el hilo que revisa las réplicas en este proceso si no está corriendo"""
+        if self.health_interval <= 0 or (self._thread is not None and self._pid == os.getpid()):
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Proceso hijo (fork de gunicorn): el hilo del padre no existe aquí
+                self._thread = None
+                self._pid = os.getpid()
+            if self._thread is None:
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stop,),
+                                                name='blacklist-replicas', daemon=True)
+                self._thread.start()
+
+    def _run(self, stop):
+        while not stop.wait(self.health_interval):
+            try:
+                self.check_health()
+            except Exception:
+                logger.exception('Error revisando las réplicas')
+
+    def stop(self, timeout=5.0):
+        """Detiene el hilo de revisión de este proceso"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stop.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def stats(self):
+        """Retorna el destino de las lecturas y el estado de cada réplica"""
+        now = self._clock()
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'primary_reads': self.primary_reads,
+                'sticky_reads': self.sticky_reads,
+                'failovers': self.failovers,
+                'replicas': [{
+                    'name': replica.name,
+                    'available': replica.available(now),
+                    'reads': replica.reads,
+                    'failures': replica.failures,
+                    'lag_seconds': replica.lag,
+                    'last_error': replica.last_error,
+                } for replica in self.replicas],
+            }
+
+
+# Instancia compartida por los servicios; se configura en create_app
+replica_router = ReplicaRouter()
@@ -0,0 +1,49 @@
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+
+# SQLSTATE de Postgres para unique_violation
+UNIQUE_VIOLATION = "23505"
+SQLITE_UNIQUE_ERRORS = ("SQLITE_CONSTRAINT_PRIMARYKEY", "SQLITE_CONSTRAINT_UNIQUE")
+MYSQL_DUPLICATE_ENTRY = 1062
+
+
+def is_duplicate_key_error(error):
+    """
+    True si el IntegrityError (o la excepción del driver) es una violación
+    de llave primaria o de unicidad; False para NOT NULL, CHECK, etc.
+    """
+    orig = getattr(error, "orig", error)
+    code = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    if code is not None:
+        return code == UNIQUE_VIOLATION
+    name = getattr(orig, "sqlite_errorname", None)
+    if name is not None:
+        return name in SQLITE_UNIQUE_ERRORS
+    args = getattr(orig, "args", ())
+    return bool(args) and args[0] == MYSQL_DUPLICATE_ENTRY
+
+
+def insert_reviving_expired(table, dialect_name, now, index_elements=("email",)):
+    """
+    Construye un INSERT que omite los duplicados vigentes y reemplaza con los
+    valores nuevos las filas ya expiradas (expires_at <= now):
+    INSERT ... ON CONFLICT DO UPDATE ... WHERE. Con RETURNING se obtienen
+    tanto las filas insertadas como las reemplazadas.
+
+    Postgres y SQLite soportan la cláusula ON CONFLICT; para cualquier otro
+    dialecto se retorna un INSERT simple y los duplicados se reportan como
+    IntegrityError.
+    """
+    if dialect_name == "postgresql":
+        stmt = postgresql.insert(table)
+    elif dialect_name == "sqlite":
+        stmt = sqlite.insert(table)
+    else:
+        return insert(table)
+
+    return stmt.on_conflict_do_update(
+        index_elements=list(index_elements),
+        set_={column.name: stmt.excluded[column.name]
+              for column in table.columns if column.name not in index_elements},
+        where=table.c.expires_at <= now,
+    )
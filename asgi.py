@@ -0,0 +1,16 @@
+"""
+Punto de entrada ASGI (alternativo a application.py).
+
+Uso:
+    uvicorn asgi:application --host 0.0.0.0 --port 8000 --workers 4
+
+Las consultas y la creación individual se atienden con un engine asíncrono;
+el resto de rutas se delegan a la aplicación Flask (ver app/asgi.py).
+"""
+import os
+from app.asgi import create_asgi_app
+
+# Determinar el entorno basado en variables de entorno
+config_name = os.getenv('FLASK_ENV', 'production')
+
+application = create_asgi_app(config_name)
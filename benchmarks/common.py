@@ -0,0 +1,102 @@
+"""Utilidades compartidas por los benchmarks: estadísticas y salida JSON."""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BENCH_APP_UUID = "550e8400-e29b-41d4-a716-446655440000"
+DEFAULT_TOKEN = (
+    "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9."
+    "eyJ1c2VyIjoic3RhdGljLXVzZXIiLCJyb2xlIjoiYWRtaW4ifQ."
+    "6bUHdYJk1cRnn-SVZEXAMPLEpR0fZ2mJb_YWbl8pW1lM"
+)
+
+
+def seed_email(index):
+    """Email determinístico para las filas sembradas en la tabla"""
+    return f"seed-{index}@bench.local"
+
+
+def percentile(sorted_values, fraction):
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies_seconds, elapsed_seconds):
+    """Resume una lista de latencias (segundos) en throughput y percentiles (µs)"""
+    values = sorted(latencies_seconds)
+    count = len(values)
+    to_us = 1_000_000
+    return {
+        "count": count,
+        "ops_per_sec": count / elapsed_seconds if elapsed_seconds else 0.0,
+        "mean_us": (sum(values) / count) * to_us if count else 0.0,
+        "p50_us": percentile(values, 0.50) * to_us,
+        "p95_us": percentile(values, 0.95) * to_us,
+        "p99_us": percentile(values, 0.99) * to_us,
+    }
+
+
+def time_calls(fn, iterations, warmup=100):
+    """Ejecuta fn(i) varias veces y retorna el resumen de latencias por llamada"""
+    for i in range(warmup):
+        fn(-1 - i)
+
+    latencies = []
+    perf_counter = time.perf_counter
+    start = perf_counter()
+    for i in range(iterations):
+        call_start = perf_counter()
+        fn(i)
+        latencies.append(perf_counter() - call_start)
+    return summarize(latencies, perf_counter() - start)
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(kind, results, output_path=None, extra_meta=None):
+    """Escribe los resultados en JSON (archivo o stdout) con metadatos del entorno"""
+    document = {
+        "meta": {
+            "kind": kind,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            **(extra_meta or {}),
+        },
+        "results": results,
+    }
+    payload = json.dumps(document, indent=2, sort_keys=True)
+    if output_path:
+        with open(output_path, "w") as handle:
+            handle.write(payload + "\n")
+    else:
+        print(payload)
+    return document
+
+
+def print_table(results):
+    """Imprime un resumen legible de los resultados en stderr"""
+    for result in results:
+        print(
+            f"{result['name']:<40} size={str(result.get('table_size') or '-'):<8} "
+            f"ops/s={result['ops_per_sec']:>10.0f} "
+            f"p50={result['p50_us']:>9.1f}µs p95={result['p95_us']:>9.1f}µs "
+            f"p99={result['p99_us']:>9.1f}µs",
+            file=sys.stderr,
+        )
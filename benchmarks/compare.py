@@ -0,0 +1,57 @@
+"""
+Compara dos archivos JSON de resultados (micro o load) y marca regresiones.
+
+Uso:
+    python -m benchmarks.compare base.json nuevo.json --threshold 10
+
+Sale con código 1 si algún benchmark empeora más que el umbral (%) en
+ops/s o en p99.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as handle:
+        document = json.load(handle)
+    return {(result["name"], result.get("table_size")): result for result in document["results"]}
+
+
+def compare(base, new, threshold):
+    """Retorna filas de comparación y si hubo alguna regresión"""
+    rows = []
+    regression = False
+    for key in sorted(base.keys() & new.keys(), key=lambda item: (item[0], item[1] or 0)):
+        before, after = base[key], new[key]
+        ops_change = _change(before["ops_per_sec"], after["ops_per_sec"])
+        p99_change = _change(before["p99_us"], after["p99_us"])
+        # Menos ops/s o más latencia p99 es peor
+        regressed = ops_change < -threshold or p99_change > threshold
+        regression = regression or regressed
+        rows.append((key, ops_change, p99_change, regressed))
+    return rows, regression
+
+
+def _change(before, after):
+    if not before:
+        return 0.0
+    return (after - before) / before * 100
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", help="Resultados de referencia")
+    parser.add_argument("new", help="Resultados a comparar")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Umbral de regresión en %% (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    rows, regression = compare(load(args.base), load(args.new), args.threshold)
+    for (name, size), ops_change, p99_change, regressed in rows:
+        flag = "REGRESIÓN" if regressed else ""
+        print(f"{name:<40} size={str(size or '-'):<8} ops/s {ops_change:+7.1f}%  p99 {p99_change:+7.1f}%  {flag}")
+    return 1 if regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Generador de carga HTTP para la API de blacklist.
+
+Siembra la tabla hasta cada tamaño indicado usando POST /blacklists/bulk y
+luego ejecuta una mezcla de GET /blacklists/<email> y POST /blacklists con
+varios clientes concurrentes (conexiones keep-alive). Reporta RPS y
+p50/p95/p99 por operación y en total, y escribe el resultado en JSON.
+
+Uso (con el servidor ya levantado):
+    python -m benchmarks.load --url http://localhost:8000 \\
+        --mix get=90,post=10 --concurrency 32 --duration 20 \\
+        --table-sizes 1000,100000 --output load.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from .common import BENCH_APP_UUID, DEFAULT_TOKEN, print_table, seed_email, summarize, write_results
+
+SEED_CHUNK = 5000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000", help="URL base de la API")
+    parser.add_argument("--token", default=os.getenv("STATIC_JWT_TOKEN", DEFAULT_TOKEN), help="Bearer token")
+    parser.add_argument("--mix", default="get=90,post=10", help="Proporción de operaciones (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes concurrentes")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos de medición por tamaño")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Segundos de calentamiento por tamaño")
+    parser.add_argument("--table-sizes", default="1000,10000", help="Tamaños de tabla separados por coma")
+    parser.add_argument("--hit-ratio", type=float, default=0.5,
+                        help="Fracción de GET sobre emails existentes (default: %(default)s)")
+    parser.add_argument("--output", help="Archivo JSON de salida (por defecto stdout)")
+    return parser.parse_args(argv)
+
+
+def parse_mix(mix):
+    """Convierte 'get=90,post=10' en una lista de (operación, peso)"""
+    weights = []
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip().lower()
+        if name not in ("get", "post"):
+            raise ValueError(f"Operación desconocida en --mix: {name}")
+        weights.append((name, float(weight or 1)))
+    return weights
+
+
+class ApiClient:
+    """Cliente HTTP keep-alive de un solo hilo"""
+
+    def __init__(self, base_url, token):
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.connection = connection_class(parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+        self.prefix = parts.path.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+    def request(self, method, path, body=None):
+        payload = json.dumps(body) if body is not None else None
+        try:
+            self.connection.request(method, self.prefix + path, body=payload, headers=self.headers)
+            response = self.connection.getresponse()
+            response.read()
+            return response.status
+        except (http.client.HTTPException, OSError):
+            # Reabrir la conexión en el siguiente intento
+            self.connection.close()
+            return 0
+
+    def close(self):
+        self.connection.close()
+
+
+def seed(client, current_size, target_size):
+    """Siembra la tabla con POST /blacklists/bulk hasta target_size"""
+    for start in range(current_size, target_size, SEED_CHUNK):
+        items = [
+            {"email": seed_email(i), "app_uuid": BENCH_APP_UUID, "blocked_reason": "benchmark"}
+            for i in range(start, min(start + SEED_CHUNK, target_size))
+        ]
+        status = client.request("POST", "/blacklists/bulk", items)
+        if status != 200:
+            raise RuntimeError(f"La siembra falló con estado HTTP {status}")
+
+
+def run_phase(args, weights, table_size, duration, record):
+    """Ejecuta la mezcla durante `duration` segundos con `concurrency` hilos"""
+    names = [name for name, _ in weights]
+    cumulative = [weight for _, weight in weights]
+    run_id = uuid.uuid4().hex[:8]
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_id):
+        client = ApiClient(args.url, args.token)
+        rng = random.Random(worker_id)
+        local = {name: [] for name in names}
+        local_errors = {name: 0 for name in names}
+        sequence = 0
+        while time.perf_counter() < deadline:
+            operation = rng.choices(names, weights=cumulative)[0]
+            if operation == "get":
+                if rng.random() < args.hit_ratio:
+                    email = seed_email(rng.randrange(table_size))
+                else:
+                    email = f"missing-{rng.randrange(10 ** 9)}@bench.local"
+                start = time.perf_counter()
+                status = client.request("GET", f"/blacklists/{email}")
+                ok = status == 200
+            else:
+                sequence += 1
+                body = {
+                    "email": f"load-{run_id}-{worker_id}-{sequence}@bench.local",
+                    "app_uuid": BENCH_APP_UUID,
+                    "blocked_reason": "benchmark",
+                }
+                start = time.perf_counter()
+                status = client.request("POST", "/blacklists", body)
+                ok = status == 201
+            elapsed = time.perf_counter() - start
+            if ok:
+                local[operation].append(elapsed)
+            else:
+                local_errors[operation] += 1
+        client.close()
+        with lock:
+            for name in names:
+                latencies[name].extend(local[name])
+                errors[name] += local_errors[name]
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if not record:
+        return []
+
+    results = []
+    all_latencies = []
+    for name in names:
+        all_latencies.extend(latencies[name])
+        results.append({"name": f"http_{name}", "table_size": table_size, "errors": errors[name],
+                        **summarize(latencies[name], elapsed)})
+    results.append({"name": "http_total", "table_size": table_size, "errors": sum(errors.values()),
+                    **summarize(all_latencies, elapsed)})
+    return results
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    weights = parse_mix(args.mix)
+    table_sizes = sorted(int(size) for size in args.table_sizes.split(","))
+
+    seeder = ApiClient(args.url, args.token)
+    results = []
+    current_size = 0
+    for size in table_sizes:
+        print(f"Sembrando hasta {size} filas...", file=sys.stderr)
+        seed(seeder, current_size, size)
+        current_size = size
+        run_phase(args, weights, size, args.warmup, record=False)
+        results.extend(run_phase(args, weights, size, args.duration, record=True))
+    seeder.close()
+
+    print_table(results)
+    write_results("load", results, args.output, {
+        "url": args.url,
+        "mix": args.mix,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "hit_ratio": args.hit_ratio,
+    })
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Benchmarks de serialización JSON de la API.
+
+Compara el módulo json de la librería estándar con orjson al serializar
+respuestas de distintos tamaños (consulta individual, lote de /lookup y filas
+de to_dict como en la exportación o el listado) y al parsear cuerpos de carga
+masiva (arreglo JSON y NDJSON).
+
+Uso:
+    python -m benchmarks.serialization --sizes 1,100,1000,10000 --output serialization.json
+
+No necesita base de datos. En los resultados table_size es la cantidad de
+elementos del payload.
+"""
+import argparse
+import sys
+
+from .common import BENCH_APP_UUID, print_table, seed_email, time_calls, write_results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,100,1000,10000",
+                        help="Elementos por payload separados por coma (default: %(default)s)")
+    parser.add_argument("--iterations", type=int, default=200, help="Llamadas medidas por benchmark")
+    parser.add_argument("--output", help="Archivo JSON de salida (por defecto stdout)")
+    return parser.parse_args(argv)
+
+
+def build_payloads(size):
+    """Payloads representativos con `size` elementos"""
+    rows = [
+        {
+            "email": seed_email(i),
+            "app_uuid": BENCH_APP_UUID,
+            "blocked_reason": "benchmark",
+            "ip_address": "127.0.0.1",
+            "created_at": "2026-01-01T12:00:00.123456",
+            "updated_at": "2026-01-01T12:00:00.123456",
+        }
+        for i in range(size)
+    ]
+    lookup = {"results": {seed_email(i): {"is_blocked": i % 2 == 0, "blocked_reason": "benchmark"}
+                          for i in range(size)}}
+    listing = {"items": rows, "next_cursor": None, "limit": size}
+    bulk = [{"email": row["email"], "app_uuid": row["app_uuid"], "blocked_reason": row["blocked_reason"]}
+            for row in rows]
+    return lookup, listing, rows, bulk
+
+
+def run(args):
+    from app.api.representations import get_dumps, get_loads
+
+    backends = ("json", "orjson")
+    results = []
+    for size in sorted(int(size) for size in args.sizes.split(",")):
+        lookup, listing, rows, bulk = build_payloads(size)
+        iterations = max(10, args.iterations // max(1, size // 1000))
+
+        for backend in backends:
+            dumps, loads = get_dumps(backend), get_loads(backend)
+            bulk_body = dumps(bulk)
+            ndjson_lines = [dumps(item) for item in bulk]
+
+            benchmarks = {
+                "dumps[lookup]": lambda i: dumps(lookup),
+                "dumps[listing]": lambda i: dumps(listing),
+                "dumps[ndjson_export]": lambda i: [dumps(row) + b"\n" for row in rows],
+                "loads[bulk_array]": lambda i: loads(bulk_body),
+                "loads[bulk_ndjson]": lambda i: [loads(line) for line in ndjson_lines],
+            }
+            for name, fn in benchmarks.items():
+                results.append({"name": f"{name}[{backend}]", "table_size": size,
+                                **time_calls(fn, iterations, warmup=5)})
+
+    print_table(results)
+    write_results("serialization", results, args.output)
+
+
+def main(argv=None):
+    run(parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
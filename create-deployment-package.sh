@@ -35,6 +35,11 @@ if [ ! -d "app" ]; then
     exit 1
 fi
 
+if [ ! -d "migrations" ]; then
+    echo "❌ Error: carpeta migrations no encontrada"
+    exit 1
+fi
+
 echo "✓ Todos los archivos necesarios están presentes"
 echo ""
 
@@ -58,6 +63,7 @@ zip -r "$ZIP_NAME" \
   requirements.txt \
   setup.cfg \
   app/ \
+  migrations/ \
   .ebextensions/ \
   -x "*.pyc" \
   -x "*__pycache__*" \
@@ -66,7 +72,9 @@ zip -r "$ZIP_NAME" \
   -x ".DS_Store" \
   -x "app/__pycache__/*" \
   -x "app/*/__pycache__/*" \
-  -x "app/*/*/__pycache__/*"
+  -x "app/*/*/__pycache__/*" \
+  -x "migrations/__pycache__/*" \
+  -x "migrations/*/__pycache__/*"
 
 echo ""
 echo "✅ Paquete creado exitosamente: $ZIP_NAME"
@@ -101,6 +109,14 @@ else
     exit 1
 fi
 
+# Verificar que migrations está incluida (la usa .ebextensions/migrations.config)
+if unzip -l "$ZIP_NAME" | grep -q " migrations/env.py$"; then
+    echo "✅ migrations está incluida (correcto)"
+else
+    echo "❌ ADVERTENCIA: migrations NO está incluida"
+    exit 1
+fi
+
 echo ""
 echo "🎉 ¡Paquete listo para deployment!"
 echo ""
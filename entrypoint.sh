@@ -42,41 +42,50 @@ PY
   fi
 fi
 
-if [ -d "migrations" ]; then
+# Las migraciones se ejecutan una vez por despliegue, como tarea única de ECS
+# (ver README). Con RUN_MIGRATIONS=true cada contenedor las aplica al arrancar;
+# en Postgres se serializan con un advisory lock para que varias tareas no
+# corran flask db upgrade a la vez.
+if [ "${RUN_MIGRATIONS:-false}" = "true" ]; then
   echo "Ejecutando migraciones Alembic..."
-  flask db upgrade || { echo "⚠️  WARNING: Fallo flask db upgrade, continuando..."; }
-else
-  echo "Sin 'migrations', creando tablas con create_all()..."
-  python - <<'PY'
-import os
-print(f"🔍 DATABASE_URL para create_all: {os.environ.get('DATABASE_URL')}")
-print(f"🔍 FLASK_ENV: {os.environ.get('FLASK_ENV')}")
-from app import create_app
-from app.api.extensions import db
-print("📦 Creando app Flask...")
-app = create_app()
-print(f"🔍 Config de la app - SQLALCHEMY_DATABASE_URI: {app.config.get('SQLALCHEMY_DATABASE_URI')}")
-try:
-    with app.app_context():
-        print("🔨 Ejecutando db.create_all()...")
-        db.create_all()
-        print("✅ Tablas creadas con create_all().")
-except Exception as e:
-    print(f"⚠️  WARNING: No se pudieron crear tablas: {e}")
-    import traceback
-    traceback.print_exc()
+  if ! python - <<'PY'
+import os, subprocess, sys
+# Llave del advisory lock de migraciones (compartida por todas las tareas)
+MIGRATIONS_LOCK_ID = 7315562108
+upgrade = ["flask", "--app", "app", "db", "upgrade"]
+url = os.environ.get("DATABASE_URL", "")
+if not url.startswith("postgresql"):
+    sys.exit(subprocess.call(upgrade))
+import psycopg2
+conn = psycopg2.connect(url.replace("postgresql+psycopg2://", "postgresql://", 1))
+conn.autocommit = True
+with conn.cursor() as cur:
+    print("🔒 Esperando el lock de migraciones...")
+    cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATIONS_LOCK_ID,))
+    try:
+        code = subprocess.call(upgrade)
+    finally:
+        cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATIONS_LOCK_ID,))
+conn.close()
+sys.exit(code)
 PY
+  then
+    echo "❌ Fallo flask db upgrade, se detiene el contenedor" >&2
+    exit 1
+  fi
+else
+  echo "RUN_MIGRATIONS=false, se omiten las migraciones"
 fi
 
-echo "Levantando Gunicorn en :8000 con recarga automática..."
+echo "Levantando Gunicorn en :${PORT:-8000} con gunicorn.conf.py (FLASK_ENV=${FLASK_ENV:-development})..."
 echo "🔍 NEW_RELIC_LICENSE_KEY configurado: $(if [ -n "$NEW_RELIC_LICENSE_KEY" ]; then echo "SI"; else echo "NO"; fi)"
 echo "🔍 NEW_RELIC_APP_NAME: ${NEW_RELIC_APP_NAME:-popcorn-app}"
 
 # Ejecutar con New Relic si la license key está configurada
 if [ -n "$NEW_RELIC_LICENSE_KEY" ]; then
   echo "🚀 Iniciando aplicación con New Relic monitoring..."
-  exec newrelic-admin run-program gunicorn -b 0.0.0.0:8000 --reload "app:create_app()"
+  exec newrelic-admin run-program gunicorn -c gunicorn.conf.py "app:create_app()"
 else
   echo "⚠️  NEW_RELIC_LICENSE_KEY no configurado, iniciando sin New Relic..."
-  exec gunicorn -b 0.0.0.0:8000 --reload "app:create_app()"
+  exec gunicorn -c gunicorn.conf.py "app:create_app()"
 fi
@@ -0,0 +1,93 @@
+"""
+Configuración de Gunicorn para producción.
+
+Gunicorn carga este archivo automáticamente desde el directorio de trabajo
+(o con ``-c gunicorn.conf.py``). Todos los valores se pueden ajustar con
+variables de entorno; ver .env.example.
+"""
+import multiprocessing
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# gthread (por defecto) atiende varias peticiones por worker con hilos; gevent
+# requiere instalar gevent y psycogreen; sync es un worker de un hilo.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", "4")) if worker_class == "gthread" else 1
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+
+# La app se crea una sola vez en el master y los workers la heredan con fork
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+# Mayor que el idle timeout del ALB (60 s) para evitar 502 por conexiones cerradas
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "75"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+
+# Reciclar workers periódicamente; el jitter evita que reinicien todos a la vez
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+# Métricas de Prometheus agregadas entre workers: prometheus_client elige el
+# modo multiproceso al crear los histogramas, así que se define antes de cargar
+# la app. PROMETHEUS_MULTIPROC_DIR vacío lo desactiva.
+prometheus_multiproc_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+if prometheus_multiproc_dir:
+    os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+else:
+    del os.environ["PROMETHEUS_MULTIPROC_DIR"]
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+
+def on_starting(server):
+    """Descarta las métricas de una ejecución anterior del master"""
+    if prometheus_multiproc_dir:
+        shutil.rmtree(prometheus_multiproc_dir, ignore_errors=True)
+        os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Los archivos de métricas del worker se conservan; se marca como terminado"""
+    if prometheus_multiproc_dir:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    """
+    Con BLACKLIST_CREATE_MODE=async vacía la cola local antes de terminar: el
+    disco de la tarea de ECS no sobrevive a su reemplazo
+    """
+    if os.getenv("BLACKLIST_CREATE_MODE", "sync") != "async":
+        return
+    from app import create_app
+    from app.services.blacklist_ingest_service import blacklist_ingest_queue
+
+    app = create_app()
+    try:
+        while blacklist_ingest_queue.flush_once():
+            pass
+    except Exception:
+        server.log.exception("No se pudo vaciar la cola de creación; quedan %s filas",
+                             blacklist_ingest_queue.depth())
+
+
+def post_fork(server, worker):
+    """Prepara cada worker después del fork del master"""
+    if worker_class == "gevent":
+        # psycopg2 bloquea el event loop si no se parchea para gevent
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+
+    if preload_app:
+        # Las conexiones abiertas en el master no se deben compartir entre procesos
+        from app.api.extensions import db
+        from app.services.read_replicas import replica_router
+        with worker.app.wsgi().app_context():
+            db.engine.dispose(close=False)
+        replica_router.dispose(close=False)
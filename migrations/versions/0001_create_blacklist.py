@@ -0,0 +1,37 @@
+"""Crea la tabla blacklist
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Las bases de datos existentes ya tienen la tabla creada con db.create_all()
+    if sa.inspect(op.get_bind()).has_table('blacklist'):
+        return
+
+    op.create_table(
+        'blacklist',
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('app_uuid', sa.String(length=36), nullable=False),
+        sa.Column('blocked_reason', sa.String(length=255), nullable=True),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('email'),
+    )
+
+
+def downgrade():
+    op.drop_table('blacklist')
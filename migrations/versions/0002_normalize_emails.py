@@ -0,0 +1,46 @@
+"""Normaliza los emails existentes e indexa lower(email)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+NORMALIZED = "lower(trim(blacklist.email))"
+
+
+def upgrade():
+    # 1. Filas cuya versión normalizada ya existe: se conserva la normalizada
+    op.execute(sa.text(
+        f"DELETE FROM blacklist WHERE blacklist.email <> {NORMALIZED} "
+        f"AND EXISTS (SELECT 1 FROM blacklist b WHERE b.email = {NORMALIZED})"
+    ))
+    # 2. Varias filas sin normalizar con el mismo destino: se conserva una
+    op.execute(sa.text(
+        f"DELETE FROM blacklist WHERE blacklist.email <> {NORMALIZED} "
+        f"AND EXISTS (SELECT 1 FROM blacklist b "
+        f"WHERE lower(trim(b.email)) = {NORMALIZED} AND b.email < blacklist.email)"
+    ))
+    # 3. Normalizar el resto
+    op.execute(sa.text(f"UPDATE blacklist SET email = {NORMALIZED} WHERE blacklist.email <> {NORMALIZED}"))
+
+    op.create_index(
+        'ix_blacklist_email_lower',
+        'blacklist',
+        [sa.text('lower(email)')],
+        unique=True,
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_blacklist_email_lower', table_name='blacklist')
@@ -0,0 +1,28 @@
+"""Indexa updated_at para la exportación incremental
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_blacklist_updated_at',
+        'blacklist',
+        ['updated_at', 'email'],
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_blacklist_updated_at', table_name='blacklist')
@@ -0,0 +1,49 @@
+"""Agrega change_seq para el feed de cambios
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    is_postgresql = op.get_bind().dialect.name == 'postgresql'
+
+    op.add_column('blacklist', sa.Column('change_seq', sa.BigInteger(), nullable=True))
+
+    # Numerar las filas existentes en el orden en que cambiaron
+    op.execute(sa.text(
+        "UPDATE blacklist SET change_seq = numbered.seq FROM ("
+        "SELECT email, row_number() OVER (ORDER BY coalesce(updated_at, created_at), email) AS seq "
+        "FROM blacklist) AS numbered WHERE blacklist.email = numbered.email"
+    ))
+
+    if is_postgresql:
+        op.execute(sa.text('CREATE SEQUENCE IF NOT EXISTS blacklist_change_seq'))
+        op.execute(sa.text(
+            "SELECT setval('blacklist_change_seq', "
+            "(SELECT coalesce(max(change_seq), 0) + 1 FROM blacklist), false)"
+        ))
+        # También para inserciones que no pasan por la aplicación
+        op.execute(sa.text(
+            "ALTER TABLE blacklist ALTER COLUMN change_seq SET DEFAULT nextval('blacklist_change_seq')"
+        ))
+
+    op.create_index('ix_blacklist_change_seq', 'blacklist', ['change_seq', 'email'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_blacklist_change_seq', table_name='blacklist')
+    op.drop_column('blacklist', 'change_seq')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(sa.text('DROP SEQUENCE IF EXISTS blacklist_change_seq'))
@@ -0,0 +1,37 @@
+"""Índices para el listado paginado por (created_at, email)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'ix_blacklist_created_at': ['created_at', 'email'],
+    'ix_blacklist_app_uuid_created_at': ['app_uuid', 'created_at', 'email'],
+    'ix_blacklist_ip_address_created_at': ['ip_address', 'created_at', 'email'],
+}
+
+
+def upgrade():
+    # Filas antiguas sin created_at quedarían fuera de la comparación por cursor
+    op.execute(sa.text(
+        'UPDATE blacklist SET created_at = coalesce(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL'
+    ))
+
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'blacklist', columns, if_not_exists=True)
+
+
+def downgrade():
+    for name in INDEXES:
+        op.drop_index(name, table_name='blacklist')
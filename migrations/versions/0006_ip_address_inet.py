@@ -0,0 +1,66 @@
+"""Normaliza ip_address y lo convierte a INET en Postgres
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00
+
+"""
+import ipaddress
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def _compact_ip(value):
+    # Igual que app.api.client_ip.parse_ip, sin depender del código de la app
+    try:
+        ip = ipaddress.ip_address(value.strip())
+    except ValueError:
+        return None
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return str(ip)
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        # Los valores que no son una IP (trace ids, "https", listas de
+        # X-Forwarded-For) quedan en NULL en lugar de abortar la conversión
+        op.execute(sa.text(
+            "CREATE FUNCTION pg_temp.try_inet(value text) RETURNS inet AS $$ "
+            "BEGIN RETURN value::inet; EXCEPTION WHEN others THEN RETURN NULL; END "
+            "$$ LANGUAGE plpgsql IMMUTABLE"
+        ))
+        op.execute(sa.text(
+            'ALTER TABLE blacklist ALTER COLUMN ip_address TYPE inet '
+            'USING pg_temp.try_inet(btrim(ip_address))'
+        ))
+        return
+
+    values = bind.execute(sa.text(
+        'SELECT DISTINCT ip_address FROM blacklist WHERE ip_address IS NOT NULL'
+    )).scalars().all()
+    for value in values:
+        compact = _compact_ip(value)
+        if compact != value:
+            bind.execute(
+                sa.text('UPDATE blacklist SET ip_address = :compact WHERE ip_address = :value'),
+                {'compact': compact, 'value': value},
+            )
+
+
+def downgrade():
+    # La limpieza de valores inválidos no se puede deshacer
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(sa.text(
+            'ALTER TABLE blacklist ALTER COLUMN ip_address TYPE varchar(45) USING host(ip_address)'
+        ))
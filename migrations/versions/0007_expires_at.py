@@ -0,0 +1,33 @@
+"""Agrega expires_at para bloqueos con vencimiento
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Columna nula sin default: en Postgres no reescribe la tabla
+    op.add_column('blacklist', sa.Column('expires_at', sa.DateTime(), nullable=True))
+
+    # Índice parcial para la purga: solo las filas que expiran
+    op.create_index(
+        'ix_blacklist_expires_at', 'blacklist', ['expires_at'], if_not_exists=True,
+        postgresql_where=sa.text('expires_at IS NOT NULL'),
+        sqlite_where=sa.text('expires_at IS NOT NULL'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_blacklist_expires_at', table_name='blacklist')
+    op.drop_column('blacklist', 'expires_at')
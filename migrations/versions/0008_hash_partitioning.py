@@ -0,0 +1,90 @@
+"""Particionado opcional de blacklist por hash de email (solo Postgres)
+
+Con BLACKLIST_PARTITIONS=N (N > 1) en el entorno de `flask db upgrade`, la
+tabla se reescribe como una tabla particionada por HASH (email) con N
+particiones blacklist_p0 .. blacklist_p{N-1}. Sin la variable, o en otros
+motores, la migración no hace nada. Para particionar después de aplicarla:
+`flask db downgrade 0007` y `BLACKLIST_PARTITIONS=N flask db upgrade`.
+
+La copia se hace en la misma transacción con la tabla bloqueada para
+escrituras (las lecturas siguen); en tablas grandes requiere una ventana de
+mantenimiento.
+
+En una tabla particionada los índices únicos deben incluir la llave de
+partición, así que ix_blacklist_email_lower se reemplaza por la restricción
+ck_blacklist_email_lower (email = lower(email)) que, junto a la llave
+primaria, garantiza la misma unicidad.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 00:00:00
+
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'ix_blacklist_updated_at': '(updated_at, email)',
+    'ix_blacklist_created_at': '(created_at, email)',
+    'ix_blacklist_app_uuid_created_at': '(app_uuid, created_at, email)',
+    'ix_blacklist_ip_address_created_at': '(ip_address, created_at, email)',
+    'ix_blacklist_change_seq': '(change_seq, email)',
+    'ix_blacklist_expires_at': '(expires_at) WHERE expires_at IS NOT NULL',
+}
+
+
+def _is_partitioned(bind):
+    return bind.execute(sa.text(
+        "SELECT count(*) FROM pg_partitioned_table WHERE partrelid = 'blacklist'::regclass"
+    )).scalar() > 0
+
+
+def _rebuild(partition_clause, partitions=0):
+    """Copia blacklist a una tabla nueva (particionada o no) y la reemplaza"""
+    op.execute(sa.text('LOCK TABLE blacklist IN EXCLUSIVE MODE'))
+    op.execute(sa.text(
+        f'CREATE TABLE blacklist_rebuild (LIKE blacklist INCLUDING DEFAULTS) {partition_clause}'
+    ))
+    for remainder in range(partitions):
+        op.execute(sa.text(
+            f'CREATE TABLE blacklist_p{remainder} PARTITION OF blacklist_rebuild '
+            f'FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})'
+        ))
+    op.execute(sa.text('INSERT INTO blacklist_rebuild SELECT * FROM blacklist'))
+    op.execute(sa.text('DROP TABLE blacklist'))
+    op.execute(sa.text('ALTER TABLE blacklist_rebuild RENAME TO blacklist'))
+    op.execute(sa.text('ALTER TABLE blacklist ADD CONSTRAINT blacklist_pkey PRIMARY KEY (email)'))
+    for name, definition in INDEXES.items():
+        op.execute(sa.text(f'CREATE INDEX {name} ON blacklist {definition}'))
+    op.execute(sa.text('ANALYZE blacklist'))
+
+
+def upgrade():
+    bind = op.get_bind()
+    partitions = int(os.getenv('BLACKLIST_PARTITIONS', '0') or 0)
+    if bind.dialect.name != 'postgresql' or partitions < 2 or _is_partitioned(bind):
+        return
+
+    _rebuild('PARTITION BY HASH (email)', partitions)
+    op.execute(sa.text(
+        'ALTER TABLE blacklist ADD CONSTRAINT ck_blacklist_email_lower CHECK (email = lower(email))'
+    ))
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or not _is_partitioned(bind):
+        return
+
+    # Las particiones se eliminan junto con la tabla particionada
+    _rebuild('')
+    op.execute(sa.text('CREATE UNIQUE INDEX ix_blacklist_email_lower ON blacklist (lower(email))'))
@@ -68,6 +68,42 @@ class TestBlacklistIntegration(unittest.TestCase):
         self.assertIn('data', data)
         self.assertEqual(data['data']['email'], self.test_email)
     
+    def test_post_create_blacklist_duplicate(self):
+        """Test POST /blacklists - email duplicado retorna 409"""
+        for expected_status in (201, 409):
+            response = self.client.post(
+                '/blacklists',
+                data=json.dumps(self.test_data),
+                headers=self.auth_headers
+            )
+            self.assertEqual(response.status_code, expected_status)
+        
+        data = json.loads(response.data)
+        self.assertEqual(data['error'], 'El email ya está en la lista negra')
+    
+    def test_post_create_blacklist_normalizes_email(self):
+        """Test POST /blacklists - el email se guarda normalizado y se encuentra al consultar"""
+        data = dict(self.test_data, email='  Test@EJEMPLO.com ')
+        response = self.client.post(
+            '/blacklists',
+            data=json.dumps(data),
+            headers=self.auth_headers
+        )
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(json.loads(response.data)['data']['email'], self.test_email)
+        
+        response = self.client.get(f'/blacklists/{self.test_email}', headers=self.auth_headers)
+        self.assertTrue(json.loads(response.data)['is_blocked'])
+        
+        # Variación de mayúsculas del mismo email: duplicado
+        response = self.client.post(
+            '/blacklists',
+            data=json.dumps(dict(self.test_data, email='TEST@ejemplo.com')),
+            headers=self.auth_headers
+        )
+        self.assertEqual(response.status_code, 409)
+    
     def test_post_create_blacklist_missing_auth(self):
         """Test POST /blacklists - sin autenticación"""
         response = self.client.post(
@@ -207,12 +243,12 @@ class TestBlacklistIntegration(unittest.TestCase):
         data = json.loads(response.data)
         self.assertTrue(data['is_blocked'])
     
-    @patch('app.services.blacklist_get_service.db.session.query')
-    def test_get_blacklist_database_error(self, mock_query):
+    @patch('app.services.blacklist_get_service.db.session.connection')
+    def test_get_blacklist_database_error(self, mock_connection):
         """Test GET /blacklists/<email> - error de base de datos"""
         # Mock error de base de datos
         from sqlalchemy.exc import SQLAlchemyError
-        mock_query.side_effect = SQLAlchemyError('Database error')
+        mock_connection.side_effect = SQLAlchemyError('Database error')
         
         response = self.client.get(
             f'/blacklists/{self.test_email}',
@@ -224,11 +260,11 @@ class TestBlacklistIntegration(unittest.TestCase):
         self.assertIn('error', data)
         self.assertEqual(data['error'], 'Error interno del servidor')
     
-    @patch('app.services.blacklist_get_service.db.session.query')
-    def test_get_blacklist_unexpected_error(self, mock_query):
+    @patch('app.services.blacklist_get_service.db.session.connection')
+    def test_get_blacklist_unexpected_error(self, mock_connection):
         """Test GET /blacklists/<email> - error inesperado"""
         # Mock error inesperado
-        mock_query.side_effect = Exception('Unexpected error')
+        mock_connection.side_effect = Exception('Unexpected error')
         
         response = self.client.get(
             f'/blacklists/{self.test_email}',
@@ -262,6 +298,77 @@ class TestBlacklistIntegration(unittest.TestCase):
         self.assertTrue(data['is_blocked'])
         self.assertIsNone(data['blocked_reason'])
     
+    # =====================================
+    # TESTS PARA ENDPOINT POST (LOOKUP POR LOTES)
+    # =====================================
+    
+    def test_post_lookup_batch(self):
+        """Test POST /blacklists/lookup - resuelve un lote de emails"""
+        blacklist_entry = Blacklist(
+            email=self.test_email,
+            app_uuid=self.test_data['app_uuid'],
+            blocked_reason=self.test_data['blocked_reason']
+        )
+        db.session.add(blacklist_entry)
+        db.session.commit()
+        
+        response = self.client.post(
+            '/blacklists/lookup',
+            data=json.dumps({'emails': ['TEST@ejemplo.com', 'libre@ejemplo.com']}),
+            headers=self.auth_headers
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['results'][self.test_email], {
+            'is_blocked': True,
+            'blocked_reason': self.test_data['blocked_reason']
+        })
+        self.assertEqual(data['results']['libre@ejemplo.com'], {'is_blocked': False})
+    
+    def test_post_lookup_batch_too_large(self):
+        """Test POST /blacklists/lookup - lote mayor al máximo configurado"""
+        self.app.config['BLACKLIST_LOOKUP_MAX_BATCH'] = 1
+        
+        response = self.client.post(
+            '/blacklists/lookup',
+            data=json.dumps({'emails': ['a@ejemplo.com', 'b@ejemplo.com']}),
+            headers=self.auth_headers
+        )
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', json.loads(response.data))
+    
+    def test_post_lookup_missing_emails(self):
+        """Test POST /blacklists/lookup - sin lista de emails"""
+        response = self.client.post(
+            '/blacklists/lookup',
+            data=json.dumps({}),
+            headers=self.auth_headers
+        )
+        
+        self.assertEqual(response.status_code, 400)
+    
+    # =====================================
+    # TESTS PARA ENDPOINT DE ESTADÍSTICAS
+    # =====================================
+    
+    def test_get_stats_cache_counters(self):
+        """Test GET /stats - expone los contadores del caché"""
+        response = self.client.get('/stats', headers=self.auth_headers)
+        
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertIn('cache', data)
+        for counter in ('hits', 'misses', 'evictions'):
+            self.assertIn(counter, data['cache'])
+    
+    def test_get_stats_missing_auth(self):
+        """Test GET /stats - sin autenticación"""
+        response = self.client.get('/stats')
+        
+        self.assertEqual(response.status_code, 401)
+    
     # =====================================
     # TESTS PARA COBERTURA COMPLETA
     # =====================================
@@ -0,0 +1,198 @@
+import time
+import unittest
+
+# Configurar el path para importar módulos de la aplicación
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+import jwt
+from flask import Flask
+
+from app import create_app
+from app.api.auth import BearerAuth, bearer_auth, load_jwt_keys, parse_token_list
+
+SECRET = 'clave-jwt-de-pruebas-de-32-bytes!'
+
+
+class FakeClock:
+    """Reloj controlable para probar expiraciones"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_auth(clock=None, **config):
+    """Crea un BearerAuth configurado con una app mínima"""
+    app = Flask(__name__)
+    app.config.update(config)
+    auth = BearerAuth(clock=clock or FakeClock())
+    auth.init_app(app)
+    return auth
+
+
+class TestStaticTokens(unittest.TestCase):
+    """Pruebas de los tokens estáticos"""
+
+    def test_parse_token_list(self):
+        """Test que la lista de tokens descarta espacios y vacíos"""
+        self.assertEqual(parse_token_list(' a, b ,,c '), ['a', 'b', 'c'])
+        self.assertEqual(parse_token_list(None), [])
+
+    def test_missing_or_malformed_header_returns_401(self):
+        """Test que sin esquema Bearer se retorna 401"""
+        auth = make_auth(STATIC_JWT_TOKEN='secreto')
+
+        self.assertEqual(auth.check(''), ({'message': 'Unauthorized'}, 401))
+        self.assertEqual(auth.check('Basic secreto'), ({'message': 'Unauthorized'}, 401))
+
+    def test_valid_and_invalid_token(self):
+        """Test que solo el token configurado es aceptado"""
+        auth = make_auth(STATIC_JWT_TOKEN='secreto')
+
+        self.assertIsNone(auth.check('Bearer secreto'))
+        self.assertIsNone(auth.check('Bearer  secreto '))
+        self.assertEqual(auth.check('Bearer otro'), ({'message': 'Forbidden'}, 403))
+        self.assertEqual(auth.check('Bearer '), ({'message': 'Forbidden'}, 403))
+        self.assertEqual(auth.check('Bearer señal'), ({'message': 'Forbidden'}, 403))
+
+    def test_rotating_tokens(self):
+        """Test que se aceptan todos los tokens de STATIC_JWT_TOKENS y el histórico"""
+        auth = make_auth(STATIC_JWT_TOKEN='viejo', STATIC_JWT_TOKENS='nuevo, siguiente')
+
+        for token in ('viejo', 'nuevo', 'siguiente'):
+            self.assertIsNone(auth.check(f'Bearer {token}'))
+        self.assertEqual(auth.check('Bearer otro'), ({'message': 'Forbidden'}, 403))
+        self.assertEqual(auth.stats()['static_tokens'], 3)
+
+    def test_no_tokens_rejects_everything(self):
+        """Test que sin tokens configurados ningún token es válido"""
+        auth = make_auth(STATIC_JWT_TOKEN='')
+
+        self.assertEqual(auth.check('Bearer cualquiera'), ({'message': 'Forbidden'}, 403))
+
+
+class TestJwtVerification(unittest.TestCase):
+    """Pruebas de la verificación de JWT firmados"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.clock = FakeClock()
+        self.auth = make_auth(
+            clock=self.clock, STATIC_JWT_TOKEN='secreto', AUTH_JWT_ENABLED=True, AUTH_JWT_SECRET=SECRET,
+            AUTH_JWT_AUDIENCE='blacklist', AUTH_JWT_CACHE_TTL=60.0,
+        )
+
+    def encode(self, key=SECRET, **claims):
+        """Firma un JWT con los claims indicados y la audiencia esperada"""
+        claims.setdefault('aud', 'blacklist')
+        return jwt.encode(claims, key, algorithm='HS256')
+
+    def test_valid_jwt(self):
+        """Test que un JWT firmado con la clave configurada es aceptado"""
+        self.assertIsNone(self.auth.check(f'Bearer {self.encode(sub="app")}'))
+
+    def test_invalid_signature_audience_or_expired(self):
+        """Test que se rechazan firmas, audiencias y tokens vencidos"""
+        forbidden = ({'message': 'Forbidden'}, 403)
+
+        self.assertEqual(self.auth.check(f'Bearer {self.encode(key=SECRET[::-1])}'), forbidden)
+        self.assertEqual(self.auth.check(f'Bearer {self.encode(aud="otra")}'), forbidden)
+        self.assertEqual(self.auth.check(f'Bearer {self.encode(exp=1)}'), forbidden)
+        self.assertEqual(self.auth.check('Bearer a.b.c'), forbidden)
+
+    def test_unsigned_jwt_is_rejected(self):
+        """Test que un JWT con alg none no es aceptado"""
+        token = jwt.encode({'aud': 'blacklist'}, None, algorithm='none')
+
+        self.assertEqual(self.auth.check(f'Bearer {token}'), ({'message': 'Forbidden'}, 403))
+
+    def test_verified_jwt_is_cached(self):
+        """Test que un JWT repetido no se vuelve a verificar"""
+        header = f'Bearer {self.encode(sub="app")}'
+
+        self.auth.check(header)
+        self.auth.check(header)
+
+        stats = self.auth.stats()
+        self.assertEqual(stats['jwt_cache_misses'], 1)
+        self.assertEqual(stats['jwt_cache_hits'], 1)
+
+    def test_cache_respects_exp(self):
+        """Test que el caché no extiende la validez más allá de exp"""
+        self.clock.now = time.time()
+        exp = int(self.clock.now) + 30
+        header = f'Bearer {self.encode(exp=exp)}'
+        self.assertIsNone(self.auth.check(header))
+
+        # Pasado exp (antes del TTL de 60 s) la entrada del caché ya no sirve
+        self.clock.now = exp + 1
+        self.auth.check(header)
+        self.assertEqual(self.auth.stats()['jwt_cache_misses'], 2)
+        self.assertEqual(self.auth.stats()['jwt_cache_hits'], 0)
+
+    def test_cache_is_bounded(self):
+        """Test que el caché descarta los JWT menos usados al llenarse"""
+        auth = make_auth(AUTH_JWT_ENABLED=True, AUTH_JWT_SECRET=SECRET, AUTH_JWT_CACHE_SIZE=2)
+
+        for i in range(3):
+            auth.check(f'Bearer {jwt.encode({"n": i}, SECRET, algorithm="HS256")}')
+
+        self.assertEqual(auth.stats()['jwt_cache_size'], 2)
+
+    def test_jwt_disabled_by_default(self):
+        """Test que sin AUTH_JWT_ENABLED un JWT válido no es aceptado"""
+        auth = make_auth(STATIC_JWT_TOKEN='secreto', JWT_SECRET_KEY=SECRET)
+        token = jwt.encode({'sub': 'app'}, SECRET, algorithm='HS256')
+
+        self.assertEqual(auth.check(f'Bearer {token}'), ({'message': 'Forbidden'}, 403))
+
+    def test_jwt_requires_explicit_key(self):
+        """Test que AUTH_JWT_ENABLED sin clave explícita falla en vez de usar JWT_SECRET_KEY"""
+        with self.assertRaises(ValueError):
+            make_auth(AUTH_JWT_ENABLED=True, JWT_SECRET_KEY=SECRET)
+        with self.assertRaises(ValueError):
+            make_auth(AUTH_JWT_ENABLED=True, AUTH_JWT_SECRET='', JWT_SECRET_KEY=SECRET)
+
+    def test_load_jwt_keys_validation(self):
+        """Test que se rechazan algoritmos no soportados o sin clave"""
+        self.assertIn('HS256', load_jwt_keys(['HS256'], secret='clave'))
+        with self.assertRaises(ValueError):
+            load_jwt_keys(['none'], secret='clave')
+        with self.assertRaises(ValueError):
+            load_jwt_keys(['HS256'])
+        with self.assertRaises(ValueError):
+            load_jwt_keys(['XX999'], secret='clave')
+
+
+class TestStaticBearerRequired(unittest.TestCase):
+    """Pruebas del decorador en las rutas de la aplicación"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+
+    def test_rotated_token_accepted_by_routes(self):
+        """Test que las rutas aceptan un token de STATIC_JWT_TOKENS"""
+        self.app.config['STATIC_JWT_TOKENS'] = 'token-rotado'
+        bearer_auth.init_app(self.app)
+
+        response = self.client.get('/stats', headers={'Authorization': 'Bearer token-rotado'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('auth', response.get_json())
+
+    def test_invalid_token_rejected_by_routes(self):
+        """Test que las rutas rechazan un token inválido con 403"""
+        response = self.client.get('/stats', headers={'Authorization': 'Bearer otro'})
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.get_json(), {'message': 'Forbidden'})
+
+
+if __name__ == '__main__':
+    unittest.main()
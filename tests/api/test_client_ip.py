@@ -0,0 +1,145 @@
+import unittest
+
+# Configurar el path para importar módulos de la aplicación
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from werkzeug.datastructures import Headers
+
+from app import create_app
+from app.api.client_ip import ClientIpResolver, parse_ip, parse_networks
+from app.api.extensions import db
+from app.models.blacklist import Blacklist
+
+
+class TestParseIp(unittest.TestCase):
+    """Pruebas de la validación de direcciones"""
+
+    def test_valid_addresses_are_compacted(self):
+        """Test que las IP se retornan en forma compacta"""
+        self.assertEqual(parse_ip(' 203.0.113.7 '), '203.0.113.7')
+        self.assertEqual(parse_ip('2001:0db8:0000:0000:0000:0000:0000:0001'), '2001:db8::1')
+        self.assertEqual(parse_ip('::ffff:192.0.2.1'), '192.0.2.1')
+
+    def test_ports_and_zones_are_removed(self):
+        """Test que se descartan puerto y zona"""
+        self.assertEqual(parse_ip('203.0.113.7:443'), '203.0.113.7')
+        self.assertEqual(parse_ip('[2001:db8::1]:443'), '2001:db8::1')
+        self.assertEqual(parse_ip('fe80::1%eth0'), 'fe80::1')
+
+    def test_invalid_values(self):
+        """Test que los valores que no son IP retornan None"""
+        for value in (None, '', 'unknown', 'https', '443', 'Root=1-67891233-abcdef', '1.2.3.4, 5.6.7.8'):
+            self.assertIsNone(parse_ip(value), value)
+
+    def test_parse_networks(self):
+        """Test que las redes se leen de una lista separada por comas"""
+        networks = parse_networks('10.0.0.0/8, 192.168.1.5,,2001:db8::/32')
+
+        self.assertEqual([str(network) for network in networks],
+                         ['10.0.0.0/8', '192.168.1.5/32', '2001:db8::/32'])
+        with self.assertRaises(ValueError):
+            parse_networks('no-es-red')
+
+
+class TestClientIpResolver(unittest.TestCase):
+    """Pruebas de la resolución de la IP del cliente"""
+
+    def test_without_trusted_proxies_uses_remote_addr(self):
+        """Test que con TRUSTED_PROXY_COUNT=0 se ignoran los headers"""
+        resolver = ClientIpResolver(proxy_count=0)
+
+        self.assertEqual(resolver.resolve('10.0.0.2', '203.0.113.7'), '10.0.0.2')
+
+    def test_hop_count(self):
+        """Test que se toma el salto indicado contando desde la derecha"""
+        forwarded_for = '198.51.100.1, 203.0.113.7, 10.0.0.5'
+
+        self.assertEqual(ClientIpResolver(proxy_count=1).resolve('10.0.0.2', forwarded_for), '10.0.0.5')
+        self.assertEqual(ClientIpResolver(proxy_count=2).resolve('10.0.0.2', forwarded_for), '203.0.113.7')
+
+    def test_hop_count_with_missing_or_invalid_hops(self):
+        """Test que sin suficientes saltos válidos se usa la dirección remota"""
+        resolver = ClientIpResolver(proxy_count=2)
+
+        self.assertEqual(resolver.resolve('10.0.0.2', '203.0.113.7'), '10.0.0.2')
+        self.assertEqual(resolver.resolve('10.0.0.2', 'unknown, 10.0.0.5'), '10.0.0.2')
+        self.assertIsNone(resolver.resolve('unknown'))
+
+    def test_trusted_networks(self):
+        """Test que se salta de derecha a izquierda por los proxies de confianza"""
+        resolver = ClientIpResolver(trusted_networks=parse_networks('10.0.0.0/8'))
+
+        self.assertEqual(resolver.resolve('10.0.0.2', '198.51.100.1, 203.0.113.7, 10.0.0.5'), '203.0.113.7')
+        self.assertEqual(resolver.resolve('10.0.0.2', '10.1.1.1, 10.0.0.5'), '10.1.1.1')
+        self.assertEqual(resolver.resolve('10.0.0.2', 'basura, 10.0.0.5'), '10.0.0.5')
+        self.assertEqual(resolver.resolve('10.0.0.2'), '10.0.0.2')
+
+    def test_untrusted_peer_cannot_spoof(self):
+        """Test que si la conexión no viene de un proxy propio se ignoran los headers"""
+        resolver = ClientIpResolver(trusted_networks=parse_networks('10.0.0.0/8'),
+                                    client_header='CF-Connecting-IP')
+
+        self.assertEqual(resolver.resolve('198.51.100.9', '203.0.113.7', '203.0.113.8'), '198.51.100.9')
+
+    def test_client_header(self):
+        """Test que CLIENT_IP_HEADER tiene prioridad sobre X-Forwarded-For"""
+        resolver = ClientIpResolver(trusted_networks=parse_networks('10.0.0.0/8'), client_header='CF-Connecting-IP')
+        headers = Headers({'X-Forwarded-For': '10.0.0.5', 'CF-Connecting-IP': '2001:0db8::0001'})
+
+        self.assertEqual(resolver.resolve_headers(headers, '10.0.0.2'), '2001:db8::1')
+        self.assertEqual(resolver.resolve_environ({
+            'REMOTE_ADDR': '10.0.0.2', 'HTTP_CF_CONNECTING_IP': 'no-es-ip', 'HTTP_X_FORWARDED_FOR': '10.0.0.5',
+        }), '10.0.0.5')
+
+    def test_client_header_requires_trusted_networks(self):
+        """Test que CLIENT_IP_HEADER sin TRUSTED_PROXY_CIDRS se rechaza y el conteo de saltos no lo usa"""
+        with self.assertRaises(ValueError):
+            ClientIpResolver(proxy_count=1, client_header='CF-Connecting-IP')
+
+        resolver = ClientIpResolver(proxy_count=1)
+        self.assertEqual(resolver.resolve('10.0.0.2', '203.0.113.7', '198.51.100.1'), '203.0.113.7')
+
+    def test_repeated_forwarded_for_headers(self):
+        """Test que varios headers X-Forwarded-For se tratan como una sola lista"""
+        resolver = ClientIpResolver(proxy_count=2)
+        headers = Headers([('X-Forwarded-For', '203.0.113.7'), ('X-Forwarded-For', '10.0.0.5')])
+
+        self.assertEqual(resolver.resolve_headers(headers, '10.0.0.2'), '203.0.113.7')
+
+
+class TestClientIpMiddleware(unittest.TestCase):
+    """Pruebas del middleware instalado por create_app"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.headers = {'Authorization': f"Bearer {self.app.config['STATIC_JWT_TOKEN']}"}
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_create_stores_resolved_ip(self):
+        """Test que se guarda la IP resuelta y no un header que no es IP"""
+        headers = dict(self.headers, **{'X-Forwarded-For': '198.51.100.1, 203.0.113.7',
+                                        'X-Forwarded-Proto': 'https'})
+
+        response = self.client.post('/blacklists', headers=headers, json={
+            'email': 'ip@ejemplo.com', 'app_uuid': '550e8400-e29b-41d4-a716-446655440000',
+        })
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()['data']['ip_address'], '203.0.113.7')
+        self.assertEqual(db.session.get(Blacklist, 'ip@ejemplo.com').ip_address, '203.0.113.7')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+from unittest.mock import patch
+import tempfile
+from types import SimpleNamespace
+
+# Configurar el path para importar módulos de la aplicación
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.api.config import engine_options_from_env
+from app.api.pool_metrics import TimedQueuePool, pool_metrics
+
+
+class TestEngineOptionsFromEnv(unittest.TestCase):
+    """Pruebas para la configuración del engine desde variables de entorno"""
+
+    def test_defaults(self):
+        """Test valores por defecto sin variables de entorno"""
+        with patch.dict(os.environ, {}, clear=True):
+            options = engine_options_from_env()
+
+        self.assertIs(options['poolclass'], TimedQueuePool)
+        self.assertEqual(options['pool_size'], 5)
+        self.assertEqual(options['max_overflow'], 10)
+        self.assertTrue(options['pool_pre_ping'])
+        self.assertNotIn('connect_args', options)
+
+    def test_values_from_env(self):
+        """Test que se leen tamaños del pool y timeouts por conexión"""
+        env = {
+            'DB_POOL_SIZE': '20',
+            'DB_MAX_OVERFLOW': '0',
+            'DB_POOL_TIMEOUT': '2.5',
+            'DB_POOL_RECYCLE': '300',
+            'DB_POOL_PRE_PING': 'false',
+            'DB_STATEMENT_TIMEOUT_MS': '5000',
+            'DB_LOCK_TIMEOUT_MS': '1000',
+        }
+        with patch.dict(os.environ, env, clear=True):
+            options = engine_options_from_env()
+
+        self.assertEqual(options['pool_size'], 20)
+        self.assertEqual(options['max_overflow'], 0)
+        self.assertEqual(options['pool_timeout'], 2.5)
+        self.assertEqual(options['pool_recycle'], 300)
+        self.assertFalse(options['pool_pre_ping'])
+        self.assertEqual(
+            options['connect_args'],
+            {'options': '-c statement_timeout=5000 -c lock_timeout=1000'}
+        )
+
+
+class TestPoolMetrics(unittest.TestCase):
+    """Pruebas para las métricas de checkout y saturación del pool"""
+
+    def setUp(self):
+        """Crea un engine con un pool de una sola conexión"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(
+            f"sqlite:///{self.tmpdir.name}/pool.db",
+            poolclass=TimedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+        )
+        app = SimpleNamespace(config={'SQLALCHEMY_ENGINE_OPTIONS': {'max_overflow': 0}})
+        pool_metrics.init_app(app, self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmpdir.cleanup()
+        pool_metrics.init_app(SimpleNamespace(config={}), None)
+
+    def test_checkout_and_saturation(self):
+        """Test que se registran los checkouts y la saturación del pool"""
+        connection = self.engine.connect()
+        stats = pool_metrics.stats(self.engine.pool)
+
+        self.assertEqual(stats['checkouts'], 1)
+        self.assertEqual(stats['checked_out'], 1)
+        self.assertEqual(stats['saturation'], 1.0)
+
+        connection.close()
+        self.assertEqual(pool_metrics.stats(self.engine.pool)['saturation'], 0.0)
+
+    def test_checkout_timeout_is_counted(self):
+        """Test que un timeout esperando conexión queda registrado"""
+        connection = self.engine.connect()
+        with self.assertRaises(PoolTimeoutError):
+            self.engine.connect()
+        connection.close()
+
+        self.assertEqual(pool_metrics.stats()['timeouts'], 1)
+
+    def test_prometheus_metrics(self):
+        """Test que la espera y la saturación del pool se exportan a Prometheus"""
+        waits = REGISTRY.get_sample_value('blacklist_db_pool_checkout_wait_seconds_count') or 0
+
+        connection = self.engine.connect()
+        self.assertEqual(REGISTRY.get_sample_value('blacklist_db_pool_checked_out'), 1)
+        self.assertEqual(REGISTRY.get_sample_value('blacklist_db_pool_saturation'), 1.0)
+        self.assertEqual(REGISTRY.get_sample_value('blacklist_db_pool_checkout_wait_seconds_count'), waits + 1)
+
+        connection.close()
+        self.assertEqual(REGISTRY.get_sample_value('blacklist_db_pool_saturation'), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import unittest
+from unittest.mock import patch
+
+# Configurar el path para importar módulos de la aplicación
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.api.extensions import db
+from app.api.query_monitor import (
+    QueryBudgetExceeded,
+    current_query_count,
+    query_budget,
+    query_monitor,
+    redact_parameters,
+)
+from app.models.blacklist import Blacklist
+from app.services.blacklist_create_service import BlacklistCreateService
+
+LOGGER = 'app.api.query_monitor'
+
+
+class TestRedactParameters(unittest.TestCase):
+    """Pruebas de la ocultación de parámetros"""
+
+    def test_values_are_hidden(self):
+        """Test que se conservan nombres y cantidad pero no los valores"""
+        self.assertEqual(redact_parameters({'email': 'a@x.com', 'n': 1}), {'email': '?', 'n': '?'})
+        self.assertEqual(redact_parameters(('a@x.com', 1)), ['?', '?'])
+        self.assertEqual(redact_parameters([{'email': 'a@x.com'}] * 3, executemany=True), '<3 filas>')
+
+
+class TestQueryMonitor(unittest.TestCase):
+    """Pruebas del registro de consultas lentas y del presupuesto por ruta"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.headers = {'Authorization': f"Bearer {self.app.config['STATIC_JWT_TOKEN']}"}
+
+        @self.app.get('/dos-consultas')
+        @query_budget(1)
+        def two_queries():
+            db.session.execute(text('SELECT 1'))
+            db.session.execute(text('SELECT 2'))
+            return {'queries': current_query_count()}
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        query_monitor.enforce_budget = self.app.config['QUERY_BUDGET_ENFORCED']
+
+    def test_slow_query_is_logged_without_values(self):
+        """Test que una consulta sobre el umbral se registra sin los valores de sus parámetros"""
+        with patch.object(query_monitor, 'slow_threshold', 0.0):
+            with self.assertLogs(LOGGER, level='WARNING') as logs:
+                db.session.execute(text('SELECT :secreto'), {'secreto': 'dato-privado@ejemplo.com'})
+
+        self.assertIn('Consulta lenta', logs.output[0])
+        # SQLite recibe los parámetros en forma posicional
+        self.assertIn("parámetros: ['?']", logs.output[0])
+        self.assertNotIn('dato-privado', logs.output[0])
+
+    def test_failed_statements_leave_no_state_on_connection(self):
+        """Test que las sentencias que fallan no acumulan tiempos de inicio en la conexión"""
+        with patch.object(query_monitor, 'slow_threshold', 60.0):
+            with self.app.test_request_context():
+                self.app.preprocess_request()
+                for _ in range(3):
+                    with self.assertRaises(OperationalError):
+                        db.session.execute(text('SELECT * FROM no_existe'))
+                    db.session.rollback()
+                db.session.execute(text('SELECT 1'))
+                info = db.session.connection().info
+
+        self.assertNotIn('query_monitor_start', info)
+        self.assertNotIn('request_metrics_start', info)
+
+    def test_fast_query_is_not_logged(self):
+        """Test que las consultas bajo el umbral no se registran"""
+        with patch.object(query_monitor, 'slow_threshold', 60.0):
+            with self.assertNoLogs(LOGGER, level='WARNING'):
+                db.session.execute(text('SELECT 1'))
+
+    def test_budget_enforced_fails_request(self):
+        """Test que en testing superar el presupuesto hace fallar la petición"""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get('/dos-consultas')
+
+    def test_budget_not_enforced_only_logs(self):
+        """Test que sin QUERY_BUDGET_ENFORCED solo se registra una advertencia"""
+        query_monitor.enforce_budget = False
+
+        with self.assertLogs(LOGGER, level='WARNING') as logs:
+            response = self.client.get('/dos-consultas')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'queries': 2})
+        self.assertIn('ejecutó 2 sentencias SQL (presupuesto: 1)', logs.output[0])
+
+    def test_budget_outside_request(self):
+        """Test que el presupuesto también se aplica a llamadas fuera de una petición"""
+        @query_budget(0)
+        def one_query():
+            db.session.execute(text('SELECT 1'))
+
+        with self.assertRaises(QueryBudgetExceeded):
+            one_query()
+
+    def test_create_path_is_one_statement(self):
+        """Test que crear un email ejecuta una sola sentencia (el INSERT)"""
+        response = self.client.post('/blacklists', headers=self.headers, json={
+            'email': 'nuevo@ejemplo.com', 'app_uuid': '550e8400-e29b-41d4-a716-446655440000',
+        })
+
+        self.assertEqual(response.status_code, 201)
+
+    def test_select_before_insert_exceeds_budget(self):
+        """Test que volver a consultar si el email existe antes del INSERT rompe el presupuesto"""
+        original = BlacklistCreateService.create_blacklist_item
+
+        def create_with_existence_check(email, app_uuid, blocked_reason, expires_at=None):
+            db.session.execute(select(Blacklist.email).where(Blacklist.email == email)).first()
+            return original(email, app_uuid, blocked_reason, expires_at)
+
+        with patch.object(BlacklistCreateService, 'create_blacklist_item', create_with_existence_check):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.post('/blacklists', headers=self.headers, json={
+                    'email': 'nuevo@ejemplo.com', 'app_uuid': '550e8400-e29b-41d4-a716-446655440000',
+                })
+
+    def test_read_paths_are_one_statement(self):
+        """Test que consulta, lote y listado ejecutan una sola sentencia"""
+        self.assertEqual(self.client.get('/blacklists/a@ejemplo.com', headers=self.headers).status_code, 200)
+        self.assertEqual(self.client.post('/blacklists/lookup', headers=self.headers,
+                                          json={'emails': ['a@ejemplo.com', 'b@ejemplo.com']}).status_code, 200)
+        self.assertEqual(self.client.get('/blacklists', headers=self.headers).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import subprocess
+import tempfile
+import textwrap
+import unittest
+
+# Configurar el path para importar módulos de la aplicación
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from prometheus_client import REGISTRY
+
+from app import create_app
+from app.api.extensions import db
+from app.api.request_metrics import current_timings, timed_stage
+from app.models.blacklist import Blacklist
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), '../../')
+GET_ENDPOINT = 'api_root.blacklistgetresource'
+
+
+def sample(name, **labels):
+    """Valor actual de una muestra del registro por defecto (0 si no existe)"""
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestRequestMetrics(unittest.TestCase):
+    """Pruebas de los histogramas por etapa"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add(Blacklist(email='a@ejemplo.com', app_uuid='550e8400-e29b-41d4-a716-446655440000',
+                                 blocked_reason='Spam'))
+        db.session.commit()
+        self.headers = {'Authorization': f"Bearer {self.app.config['STATIC_JWT_TOKEN']}"}
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_request_records_every_stage(self):
+        """Test que una consulta registra duración total, etapas y cantidad de consultas SQL"""
+        stage = 'blacklist_http_request_stage_duration_seconds_count'
+        before = {name: sample(stage, endpoint=GET_ENDPOINT, stage=name)
+                  for name in ('auth', 'validation', 'db', 'serialization', 'other')}
+        db_before = sample('blacklist_http_request_stage_duration_seconds_sum', endpoint=GET_ENDPOINT, stage='db')
+        queries_before = sample('blacklist_http_request_db_queries_sum', endpoint=GET_ENDPOINT)
+        total_before = sample('blacklist_http_request_duration_seconds_count',
+                              method='GET', endpoint=GET_ENDPOINT, status='200')
+
+        response = self.client.get('/blacklists/a@ejemplo.com', headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        for name, count in before.items():
+            self.assertEqual(sample(stage, endpoint=GET_ENDPOINT, stage=name), count + 1, name)
+        self.assertGreater(sample('blacklist_http_request_stage_duration_seconds_sum',
+                                  endpoint=GET_ENDPOINT, stage='db'), db_before)
+        self.assertEqual(sample('blacklist_http_request_db_queries_sum', endpoint=GET_ENDPOINT), queries_before + 1)
+        self.assertEqual(sample('blacklist_http_request_duration_seconds_count',
+                                method='GET', endpoint=GET_ENDPOINT, status='200'), total_before + 1)
+
+    def test_rejected_request_is_recorded_with_status(self):
+        """Test que las peticiones rechazadas se registran con su código de estado"""
+        labels = {'method': 'GET', 'endpoint': GET_ENDPOINT, 'status': '403'}
+        before = sample('blacklist_http_request_duration_seconds_count', **labels)
+
+        self.client.get('/blacklists/a@ejemplo.com', headers={'Authorization': 'Bearer otro'})
+
+        self.assertEqual(sample('blacklist_http_request_duration_seconds_count', **labels), before + 1)
+
+    def test_metrics_endpoint(self):
+        """Test que /metrics expone los histogramas en formato Prometheus"""
+        self.client.get('/blacklists/a@ejemplo.com', headers=self.headers)
+
+        response = self.client.get('/metrics', headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        body = response.get_data(as_text=True)
+        self.assertIn('# TYPE blacklist_http_request_stage_duration_seconds histogram', body)
+        self.assertIn(f'endpoint="{GET_ENDPOINT}",le="0.001",stage="db"', body)
+
+    def test_metrics_requires_token(self):
+        """Test que /metrics requiere el bearer token"""
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+
+    def test_timed_stage_outside_request(self):
+        """Test que fuera de una petición las etapas no se registran"""
+        @timed_stage('validation')
+        def validate():
+            return current_timings()
+
+        self.assertIsNone(validate())
+
+
+class TestMultiprocessMetrics(unittest.TestCase):
+    """Pruebas de la agregación entre procesos (workers de gunicorn)"""
+
+    SCRIPT = textwrap.dedent('''
+        import sys
+        from app import create_app
+        from app.api.extensions import db
+
+        app = create_app('testing')
+        headers = {'Authorization': 'Bearer ' + app.config['STATIC_JWT_TOKEN']}
+        with app.app_context():
+            db.create_all()
+        client = app.test_client()
+        if sys.argv[1] == 'request':
+            client.get('/blacklists/a@ejemplo.com', headers=headers)
+        else:
+            print(client.get('/metrics', headers=headers).get_data(as_text=True))
+    ''')
+
+    def run_process(self, directory, action):
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory)
+        return subprocess.run([sys.executable, '-c', self.SCRIPT, action], cwd=ROOT_DIR, env=env,
+                              capture_output=True, text=True, check=True).stdout
+
+    def test_metrics_are_aggregated_across_processes(self):
+        """Test que /metrics suma las peticiones atendidas por otros procesos"""
+        with tempfile.TemporaryDirectory() as directory:
+            self.run_process(directory, 'request')
+            self.run_process(directory, 'request')
+
+            body = self.run_process(directory, 'metrics')
+
+        self.assertIn(
+            f'blacklist_http_request_duration_seconds_count{{endpoint="{GET_ENDPOINT}",method="GET",status="200"}} 2.0',
+            body,
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+from unittest.mock import patch
+
+# Configurar el path para importar módulos de la aplicación
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from app import create_app
+from app.api.extensions import db
+from app.models.blacklist import Blacklist
+from app.services.blacklist_bloom import BloomFilter, blacklist_bloom
+from app.services.blacklist_get_service import BlacklistGetService
+
+
+class TestBloomFilter(unittest.TestCase):
+    """Pruebas unitarias para BloomFilter"""
+
+    def test_no_false_negatives(self):
+        """Test que todo elemento agregado se reporta como presente"""
+        bloom = BloomFilter(capacity=1000, fp_rate=0.01)
+        emails = [f'user{i}@ejemplo.com' for i in range(1000)]
+        for email in emails:
+            bloom.add(email)
+
+        self.assertTrue(all(email in bloom for email in emails))
+        self.assertEqual(bloom.count, 1000)
+
+    def test_false_positive_rate_close_to_target(self):
+        """Test que la tasa de falsos positivos está cerca de la configurada"""
+        bloom = BloomFilter(capacity=5000, fp_rate=0.01)
+        for i in range(5000):
+            bloom.add(f'user{i}@ejemplo.com')
+
+        false_positives = sum(f'otro{i}@ejemplo.com' in bloom for i in range(20000))
+        self.assertLess(false_positives / 20000, 0.02)
+        self.assertAlmostEqual(bloom.estimated_fp_rate(), 0.01, delta=0.005)
+
+    def test_sizing(self):
+        """Test que el tamaño en bits y hashes sigue las fórmulas estándar"""
+        bloom = BloomFilter(capacity=1_000_000, fp_rate=0.01)
+
+        self.assertEqual(bloom.num_hashes, 7)
+        self.assertAlmostEqual(bloom.memory_bytes / 1_000_000, 1.2, delta=0.01)
+
+
+class TestBlacklistBloomFilter(unittest.TestCase):
+    """Pruebas del filtro de Bloom en el camino de consulta"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.app = create_app('testing')
+        self.app.config['BLACKLIST_BLOOM_ENABLED'] = True
+        self.app.config['BLACKLIST_BLOOM_CAPACITY'] = 1000
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        blacklist_bloom.init_app(self.app)
+
+        db.session.add(Blacklist(
+            email='bloqueado@ejemplo.com',
+            app_uuid='550e8400-e29b-41d4-a716-446655440000',
+            blocked_reason='Spam'
+        ))
+        db.session.commit()
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        blacklist_bloom.enabled = False
+
+    def test_lookup_before_build_goes_to_database(self):
+        """Test que sin filtro construido la consulta llega a la base de datos"""
+        with patch.object(blacklist_bloom, '_app', None):
+            result = BlacklistGetService.get_blacklist_by_email('bloqueado@ejemplo.com')
+
+        self.assertTrue(result['is_blocked'])
+
+    def test_negative_lookup_skips_database(self):
+        """Test que un email descartado por el filtro no consulta la base de datos"""
+        blacklist_bloom.rebuild()
+
+        with patch('app.services.blacklist_get_service.db.session.connection') as mock_connection:
+            result = BlacklistGetService.get_blacklist_by_email('libre@ejemplo.com')
+
+        self.assertEqual(result, {'is_blocked': False})
+        mock_connection.assert_not_called()
+        self.assertEqual(blacklist_bloom.stats()['negatives'], 1)
+
+    def test_positive_lookup_reaches_database(self):
+        """Test que un email en el filtro se resuelve en la base de datos"""
+        blacklist_bloom.rebuild()
+
+        result = BlacklistGetService.get_blacklist_by_email('bloqueado@ejemplo.com')
+
+        self.assertEqual(result, {'is_blocked': True, 'blocked_reason': 'Spam'})
+
+    def test_create_adds_to_filter(self):
+        """Test que un email creado después de construir el filtro se encuentra"""
+        from app.services.blacklist_create_service import BlacklistCreateService
+        blacklist_bloom.rebuild()
+
+        with self.app.test_request_context():
+            BlacklistCreateService.create_blacklist_item(
+                'nuevo@ejemplo.com', '550e8400-e29b-41d4-a716-446655440000', 'Fraude'
+            )
+
+        self.assertTrue(blacklist_bloom.might_contain('nuevo@ejemplo.com'))
+        self.assertTrue(BlacklistGetService.get_blacklist_by_email('nuevo@ejemplo.com')['is_blocked'])
+
+    def test_stats_report_memory_and_fp_rate(self):
+        """Test que las estadísticas reportan memoria y tasa de falsos positivos"""
+        blacklist_bloom.rebuild()
+        stats = blacklist_bloom.stats()
+
+        self.assertTrue(stats['built'])
+        self.assertEqual(stats['items'], 1)
+        self.assertGreater(stats['memory_bytes'], 0)
+        self.assertIn('estimated_fp_rate', stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
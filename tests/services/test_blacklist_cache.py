@@ -0,0 +1,379 @@
+import subprocess
+import tempfile
+import textwrap
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+# Configurar el path para importar módulos de la aplicación
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover - depende del entorno
+    fakeredis = None
+
+from app import create_app
+from app.api.extensions import db
+from app.services.blacklist_cache import BlacklistCache, SingleFlight, blacklist_cache
+from app.services.blacklist_get_service import BlacklistGetService
+from app.services.cache_backends import (
+    LocalCacheBackend,
+    RedisCacheBackend,
+    SharedMemoryCacheBackend,
+    create_backend,
+)
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), '../../')
+
+
+class FakeClock:
+    """Reloj controlable para probar la expiración por TTL"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestBlacklistCache(unittest.TestCase):
+    """Pruebas unitarias para BlacklistCache"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.clock = FakeClock()
+        self.cache = BlacklistCache(max_size=2, ttl=10, clock=self.clock)
+
+    def test_get_miss_and_hit(self):
+        """Test que cuenta fallos y aciertos"""
+        self.assertIsNone(self.cache.get('a@ejemplo.com'))
+        self.cache.set('a@ejemplo.com', {'is_blocked': False})
+
+        self.assertEqual(self.cache.get('a@ejemplo.com'), {'is_blocked': False})
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_get_returns_copy(self):
+        """Test que modificar el resultado no altera la entrada cacheada"""
+        self.cache.set('a@ejemplo.com', {'is_blocked': True, 'blocked_reason': 'spam'})
+        result = self.cache.get('a@ejemplo.com')
+        result['blocked_reason'] = 'otro'
+
+        self.assertEqual(self.cache.get('a@ejemplo.com')['blocked_reason'], 'spam')
+
+    def test_entry_expires_after_ttl(self):
+        """Test que las entradas vencen después del TTL"""
+        self.cache.set('a@ejemplo.com', {'is_blocked': False})
+        self.clock.now = 10
+
+        self.assertIsNone(self.cache.get('a@ejemplo.com'))
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_lru_eviction(self):
+        """Test que se expulsa la entrada menos usada recientemente"""
+        self.cache.set('a@ejemplo.com', {'is_blocked': False})
+        self.cache.set('b@ejemplo.com', {'is_blocked': False})
+        self.cache.get('a@ejemplo.com')
+        self.cache.set('c@ejemplo.com', {'is_blocked': False})
+
+        self.assertIsNone(self.cache.get('b@ejemplo.com'))
+        self.assertIsNotNone(self.cache.get('a@ejemplo.com'))
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_invalidate(self):
+        """Test que invalidate elimina la entrada"""
+        self.cache.set('a@ejemplo.com', {'is_blocked': False})
+        self.cache.invalidate('a@ejemplo.com')
+
+        self.assertIsNone(self.cache.get('a@ejemplo.com'))
+
+    def test_disabled_cache_stores_nothing(self):
+        """Test que con max_size 0 el caché queda deshabilitado"""
+        cache = BlacklistCache(max_size=0)
+        cache.set('a@ejemplo.com', {'is_blocked': False})
+
+        self.assertIsNone(cache.get('a@ejemplo.com'))
+        self.assertEqual(cache.stats()['misses'], 0)
+
+
+class TestBlacklistGetServiceCache(unittest.TestCase):
+    """Pruebas del uso del caché desde BlacklistGetService"""
+
+    def setUp(self):
+        """Habilita el caché compartido para cada test"""
+        blacklist_cache.max_size = 100
+        blacklist_cache.ttl = 60
+        blacklist_cache.clear()
+
+    def tearDown(self):
+        """Deja el caché compartido deshabilitado"""
+        blacklist_cache.max_size = 0
+        blacklist_cache.clear()
+
+    @patch('app.services.blacklist_get_service.db')
+    def test_second_lookup_served_from_cache(self, mock_db):
+        """Test que la segunda consulta del mismo email no llega a la base de datos"""
+        mock_db.session.connection.return_value.execute.return_value.first.return_value = None
+
+        first = BlacklistGetService.get_blacklist_by_email('Test@Ejemplo.com')
+        second = BlacklistGetService.get_blacklist_by_email('test@ejemplo.com ')
+
+        self.assertEqual(first, {'is_blocked': False})
+        self.assertEqual(second, {'is_blocked': False})
+        mock_db.session.connection.return_value.execute.assert_called_once()
+        self.assertEqual(blacklist_cache.stats()['hits'], 1)
+
+    @patch('app.services.blacklist_create_service.db')
+    @patch('app.services.blacklist_create_service.BlacklistCreateService.get_client_ip')
+    @patch('app.services.blacklist_create_service.Blacklist')
+    def test_create_writes_through(self, mock_blacklist_class, mock_get_ip, mock_db):
+        """Test que crear un elemento reemplaza el resultado negativo cacheado (write-through)"""
+        from app.services.blacklist_create_service import BlacklistCreateService
+
+        mock_get_ip.return_value = '192.168.1.100'
+        mock_blacklist_class.return_value = Mock()
+        blacklist_cache.set('test@ejemplo.com', {'is_blocked': False})
+
+        BlacklistCreateService.create_blacklist_item(
+            'test@ejemplo.com',
+            '550e8400-e29b-41d4-a716-446655440000',
+            'Test reason'
+        )
+
+        self.assertEqual(blacklist_cache.get('test@ejemplo.com'),
+                         {'is_blocked': True, 'blocked_reason': 'Test reason'})
+
+    @patch('app.services.blacklist_get_service.db')
+    def test_concurrent_misses_query_once(self, mock_db):
+        """Test que los fallos concurrentes sobre el mismo email hacen una sola consulta"""
+        started = threading.Event()
+        release = threading.Event()
+
+        def first():
+            started.set()
+            release.wait(5)
+            return None
+
+        mock_db.session.connection.return_value.execute.return_value.first.side_effect = first
+        results = []
+        leader = threading.Thread(target=lambda: results.append(
+            BlacklistGetService.get_blacklist_by_email('a@ejemplo.com')))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(
+            BlacklistGetService.get_blacklist_by_email('a@ejemplo.com'))) for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        while blacklist_cache.stats()['coalesced'] < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(results, [{'is_blocked': False}] * 4)
+        mock_db.session.connection.return_value.execute.assert_called_once()
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Pruebas de SingleFlight"""
+
+    def test_error_is_shared_and_key_released(self):
+        """Test que el error de la carga llega a quien espera y la llave se libera"""
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def failing():
+            started.set()
+            release.wait(5)
+            raise RuntimeError('sin base de datos')
+
+        def call():
+            try:
+                flight.do('a@ejemplo.com', failing)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=call)
+        follower.start()
+        while flight.coalesced < 1:
+            time.sleep(0.001)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(errors, ['sin base de datos'] * 2)
+        self.assertEqual(flight.do('a@ejemplo.com', lambda: 'ok'), 'ok')
+
+
+class TestSharedMemoryCacheBackend(unittest.TestCase):
+    """Pruebas del backend en memoria compartida (mmap)"""
+
+    def setUp(self):
+        """Crea un archivo de caché temporal"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'cache')
+        self.clock = FakeClock()
+        self.backend = SharedMemoryCacheBackend(self.path, max_size=16, clock=self.clock)
+
+    def tearDown(self):
+        """Cierra el mapeo y borra el archivo"""
+        self.backend.close()
+        self.tmpdir.cleanup()
+
+    def test_set_get_delete(self):
+        """Test que guarda, lee y borra resultados"""
+        self.backend.set('a@ejemplo.com', {'is_blocked': True, 'blocked_reason': 'Spam'}, 10)
+
+        self.assertEqual(self.backend.get('a@ejemplo.com'), {'is_blocked': True, 'blocked_reason': 'Spam'})
+        self.assertIsNone(self.backend.get('b@ejemplo.com'))
+        self.backend.delete('a@ejemplo.com')
+        self.assertIsNone(self.backend.get('a@ejemplo.com'))
+
+    def test_entry_expires_after_ttl(self):
+        """Test que las entradas vencen después del TTL"""
+        self.backend.set('a@ejemplo.com', {'is_blocked': False}, 10)
+        self.clock.now = 10
+
+        self.assertIsNone(self.backend.get('a@ejemplo.com'))
+        self.assertEqual(self.backend.stats()['size'], 0)
+
+    def test_full_bucket_replaces_oldest(self):
+        """Test que con el bucket lleno se reemplaza la entrada que vence primero"""
+        backend = SharedMemoryCacheBackend(os.path.join(self.tmpdir.name, 'chico'), max_size=1, clock=self.clock)
+        for i in range(backend.WAYS + 1):
+            self.clock.now = i
+            backend.set(f'{i}@ejemplo.com', {'is_blocked': False}, 100)
+
+        self.assertIsNone(backend.get('0@ejemplo.com'))
+        self.assertEqual(backend.get(f'{backend.WAYS}@ejemplo.com'), {'is_blocked': False})
+        self.assertEqual(backend.stats()['evictions'], 1)
+        backend.close()
+
+    def test_oversized_entry_replaces_previous(self):
+        """Test que una entrada que no cabe en un slot no deja la anterior"""
+        self.backend.set('a@ejemplo.com', {'is_blocked': False}, 10)
+        self.backend.set('a@ejemplo.com', {'is_blocked': True, 'blocked_reason': 'x' * 600}, 10)
+
+        self.assertIsNone(self.backend.get('a@ejemplo.com'))
+        self.assertEqual(self.backend.stats()['oversize'], 1)
+
+    def test_entries_are_shared_between_processes(self):
+        """Test que otro proceso ve las entradas escritas y borradas en el archivo"""
+        backend = SharedMemoryCacheBackend(self.path, max_size=16)
+        backend.set('a@ejemplo.com', {'is_blocked': True, 'blocked_reason': 'Spam'}, 60)
+        script = textwrap.dedent('''
+            import sys
+            from app.services.cache_backends import SharedMemoryCacheBackend
+            backend = SharedMemoryCacheBackend(sys.argv[1], max_size=16)
+            print(backend.get('a@ejemplo.com'))
+            backend.set('b@ejemplo.com', {'is_blocked': False}, 60)
+        ''')
+
+        output = subprocess.run([sys.executable, '-c', script, self.path], cwd=ROOT_DIR,
+                                capture_output=True, text=True, check=True).stdout
+
+        self.assertEqual(output.strip(), "{'is_blocked': True, 'blocked_reason': 'Spam'}")
+        self.assertEqual(backend.get('b@ejemplo.com'), {'is_blocked': False})
+        backend.close()
+
+    def test_mismatched_layout_resets_file(self):
+        """Test que un archivo con otra estructura se reinicia en lugar de leerse"""
+        self.backend.set('a@ejemplo.com', {'is_blocked': False}, 10)
+        backend = SharedMemoryCacheBackend(self.path, max_size=32, clock=self.clock)
+
+        self.assertIsNone(backend.get('a@ejemplo.com'))
+        backend.close()
+
+
+@unittest.skipIf(fakeredis is None, 'requiere fakeredis')
+class TestRedisCacheBackend(unittest.TestCase):
+    """Pruebas del backend Redis contra fakeredis"""
+
+    def setUp(self):
+        """Dos backends sobre el mismo servidor, como dos workers"""
+        self.server = fakeredis.FakeServer()
+        self.backend = RedisCacheBackend(fakeredis.FakeRedis(server=self.server))
+        self.other = RedisCacheBackend(fakeredis.FakeRedis(server=self.server))
+
+    def test_entries_are_shared(self):
+        """Test que una escritura se ve desde otro cliente y el borrado también"""
+        self.backend.set('a@ejemplo.com', {'is_blocked': True, 'blocked_reason': 'Spam'}, 30)
+
+        self.assertEqual(self.other.get('a@ejemplo.com'), {'is_blocked': True, 'blocked_reason': 'Spam'})
+        client = fakeredis.FakeRedis(server=self.server)
+        self.assertAlmostEqual(client.pttl('blacklist:cache:a@ejemplo.com'), 30000, delta=1000)
+        self.other.delete('a@ejemplo.com')
+        self.assertIsNone(self.backend.get('a@ejemplo.com'))
+
+    def test_clear_only_removes_cache_keys(self):
+        """Test que clear solo borra las claves del caché"""
+        client = fakeredis.FakeRedis(server=self.server)
+        client.set('otra-clave', '1')
+        self.backend.set('a@ejemplo.com', {'is_blocked': False}, 30)
+
+        self.backend.clear()
+
+        self.assertIsNone(self.backend.get('a@ejemplo.com'))
+        self.assertEqual(client.get('otra-clave'), b'1')
+
+    def test_errors_are_misses(self):
+        """Test que si Redis no responde la consulta sigue como un fallo del caché"""
+        self.server.connected = False
+
+        with self.assertLogs('app.services.cache_backends', level='WARNING'):
+            self.assertIsNone(self.backend.get('a@ejemplo.com'))
+            self.backend.set('a@ejemplo.com', {'is_blocked': False}, 30)
+        self.assertEqual(self.backend.stats()['errors'], 2)
+
+
+class TestCreateBackend(unittest.TestCase):
+    """Pruebas de la selección del backend por configuración"""
+
+    def test_backends_by_name(self):
+        """Test que BLACKLIST_CACHE_BACKEND elige el backend y max_size 0 usa el local"""
+        with tempfile.TemporaryDirectory() as directory:
+            shared = create_backend({'BLACKLIST_CACHE_BACKEND': 'shared',
+                                     'BLACKLIST_CACHE_SHARED_PATH': os.path.join(directory, 'cache')}, 10)
+            self.assertIsInstance(shared, SharedMemoryCacheBackend)
+            shared.close()
+
+        self.assertIsInstance(create_backend({}, 10), LocalCacheBackend)
+        self.assertIsInstance(create_backend({'BLACKLIST_CACHE_BACKEND': 'redis'}, 0), LocalCacheBackend)
+        with self.assertRaises(ValueError):
+            create_backend({'BLACKLIST_CACHE_BACKEND': 'memcached'}, 10)
+
+    def test_shared_backend_through_create_app(self):
+        """Test que create_app configura el caché compartido y las consultas lo usan"""
+        with tempfile.TemporaryDirectory() as directory:
+            app = create_app('testing')
+            app.config.update(BLACKLIST_CACHE_MAX_SIZE=100, BLACKLIST_CACHE_BACKEND='shared',
+                              BLACKLIST_CACHE_SHARED_PATH=os.path.join(directory, 'cache'))
+            blacklist_cache.init_app(app)
+            try:
+                with app.app_context():
+                    db.create_all()
+                    BlacklistGetService.get_blacklist_by_email('a@ejemplo.com')
+                    BlacklistGetService.get_blacklist_by_email('a@ejemplo.com')
+                    stats = blacklist_cache.stats()
+                    db.session.remove()
+                    db.drop_all()
+            finally:
+                blacklist_cache.backend.close()
+                blacklist_cache.init_app(create_app('testing'))
+
+        self.assertEqual(stats['backend'], 'shared')
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from datetime import datetime, timedelta
+
+# Configurar el path para importar módulos de la aplicación
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from app import create_app
+from app.api.extensions import db
+from app.models.blacklist import Blacklist
+from app.services.blacklist_changes_service import BlacklistChangesService
+
+
+class FakeClock:
+    """Reloj controlado para probar el long-polling sin esperar"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestBlacklistChangesService(unittest.TestCase):
+    """Pruebas unitarias para BlacklistChangesService"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.app_uuid = '550e8400-e29b-41d4-a716-446655440000'
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _add(self, email, updated_at=None):
+        entry = Blacklist(email=email, app_uuid=self.app_uuid, blocked_reason=None)
+        if updated_at is not None:
+            entry.created_at = entry.updated_at = updated_at
+        db.session.add(entry)
+        db.session.commit()
+
+    def test_cursor_roundtrip(self):
+        """Test que el cursor codifica y decodifica (change_seq, email)"""
+        cursor = BlacklistChangesService.encode_cursor(42, 'a@ejemplo.com')
+
+        self.assertEqual(BlacklistChangesService.decode_cursor(cursor), (42, 'a@ejemplo.com'))
+        self.assertIsNone(BlacklistChangesService.decode_cursor(''))
+
+    def test_change_seq_increases_with_each_write(self):
+        """Test que cada inserción recibe un change_seq mayor"""
+        self._add('a@ejemplo.com')
+        self._add('b@ejemplo.com')
+
+        first = db.session.get(Blacklist, 'a@ejemplo.com').change_seq
+        second = db.session.get(Blacklist, 'b@ejemplo.com').change_seq
+        self.assertGreater(second, first)
+
+    def test_settle_cuts_batch_at_first_recent_row(self):
+        """Test que las filas demasiado recientes y las posteriores esperan al siguiente lote"""
+        now = datetime.utcnow()
+        self._add('viejo@ejemplo.com', now - timedelta(minutes=1))
+        self._add('reciente@ejemplo.com', now)
+        self._add('otro-viejo@ejemplo.com', now - timedelta(minutes=1))
+
+        result = BlacklistChangesService.fetch_changes(settle_seconds=10)
+
+        self.assertEqual([change['email'] for change in result['changes']], ['viejo@ejemplo.com'])
+        self.assertTrue(result['has_more'])
+
+    def test_long_poll_waits_until_deadline_without_changes(self):
+        """Test que sin cambios se consulta cada poll_interval hasta agotar wait"""
+        clock = FakeClock()
+
+        result = BlacklistChangesService.wait_for_changes(
+            None, wait=2.0, poll_interval=0.5, clock=clock, sleep=clock.sleep
+        )
+
+        self.assertEqual(result['changes'], [])
+        self.assertEqual(clock.sleeps, [0.5, 0.5, 0.5, 0.5])
+
+    def test_long_poll_returns_as_soon_as_changes_appear(self):
+        """Test que el long-polling responde en cuanto aparece un cambio"""
+        clock = FakeClock()
+
+        def sleep(seconds):
+            clock.sleep(seconds)
+            self._add('nuevo@ejemplo.com')
+
+        result = BlacklistChangesService.wait_for_changes(
+            None, wait=10.0, poll_interval=0.5, clock=clock, sleep=sleep
+        )
+
+        self.assertEqual([change['email'] for change in result['changes']], ['nuevo@ejemplo.com'])
+        self.assertEqual(clock.now, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import sqlite3
 import unittest
 from unittest.mock import Mock, patch, MagicMock
 import uuid
@@ -9,6 +10,7 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
 
+from app.api.client_ip import client_ip_resolver
 from app.services.blacklist_create_service import BlacklistCreateService
 
 
@@ -59,6 +61,12 @@ class TestBlacklistCreateService(unittest.TestCase):
         errors = BlacklistCreateService.validate_data({})
         self.assertEqual(errors, ['No se proporcionaron datos'])
     
+    def test_validate_data_with_non_object(self):
+        """Test validación cuando el cuerpo JSON no es un objeto"""
+        for data in ([1], ['a@ejemplo.com'], 'a@ejemplo.com', 5):
+            errors = BlacklistCreateService.validate_data(data)
+            self.assertEqual(errors, ['Los datos deben ser un objeto JSON'])
+    
     def test_validate_data_missing_email(self):
         """Test validación cuando falta el email"""
         errors = BlacklistCreateService.validate_data(self.invalid_data_no_email)
@@ -104,63 +112,56 @@ class TestBlacklistCreateService(unittest.TestCase):
         self.assertIn('El app_uuid debe ser un UUID válido', errors)
         # No validamos blocked_reason en la implementación actual
 
-    # =====================================
-    # TESTS PARA email_exists
-    # =====================================
-    
-    @patch('app.services.blacklist_create_service.Blacklist')
-    def test_email_exists_true(self, mock_blacklist):
-        """Test cuando el email ya existe"""
-        # Mock de la consulta que retorna un objeto (email existe)
-        mock_blacklist.query.filter_by.return_value.first.return_value = Mock()
-        
-        result = BlacklistCreateService.email_exists('test@ejemplo.com')
-        self.assertTrue(result)
-        mock_blacklist.query.filter_by.assert_called_once_with(email='test@ejemplo.com')
-    
-    @patch('app.services.blacklist_create_service.Blacklist')
-    def test_email_exists_false(self, mock_blacklist):
-        """Test cuando el email no existe"""
-        # Mock de la consulta que retorna None (email no existe)
-        mock_blacklist.query.filter_by.return_value.first.return_value = None
-        
-        result = BlacklistCreateService.email_exists('nuevo@ejemplo.com')
-        self.assertFalse(result)
-        mock_blacklist.query.filter_by.assert_called_once_with(email='nuevo@ejemplo.com')
-
     # =====================================
     # TESTS PARA get_client_ip
     # =====================================
     
     def test_get_client_ip_with_x_forwarded_for(self):
-        """Test obtención de IP desde X-Forwarded-For"""
-        with self.app.test_request_context(headers={'X-Forwarded-For': '192.168.1.100, 10.0.0.1'}):
+        """Test que se toma el salto agregado por el proxy de confianza (TRUSTED_PROXY_COUNT=1)"""
+        client_ip_resolver.init_app(self.app)
+        with self.app.test_request_context(headers={'X-Forwarded-For': '192.168.1.100, 203.0.113.7'},
+                                           environ_base={'REMOTE_ADDR': '10.0.0.2'}):
             ip = BlacklistCreateService.get_client_ip()
-            self.assertEqual(ip, '192.168.1.100')
+            self.assertEqual(ip, '203.0.113.7')
     
-    def test_get_client_ip_with_x_real_ip(self):
-        """Test obtención de IP desde X-Real-IP"""
-        with self.app.test_request_context(headers={'X-Real-IP': '203.0.113.50'}):
+    def test_get_client_ip_ignores_untrusted_headers(self):
+        """Test que X-Real-IP y los headers que no son IP no se usan"""
+        client_ip_resolver.init_app(self.app)
+        headers = {'X-Real-IP': '203.0.113.50', 'X-Forwarded-Proto': 'https',
+                   'X-Amzn-Trace-Id': 'Root=1-67891233-abcdef012345678912345678'}
+        with self.app.test_request_context(headers=headers, environ_base={'REMOTE_ADDR': '10.0.0.2'}):
             ip = BlacklistCreateService.get_client_ip()
-            self.assertEqual(ip, '203.0.113.50')
+            self.assertEqual(ip, '10.0.0.2')
     
     def test_get_client_ip_with_cloudflare(self):
-        """Test obtención de IP desde Cloudflare"""
-        with self.app.test_request_context(headers={'CF-Connecting-IP': '198.51.100.25'}):
+        """Test obtención de IP desde Cloudflare cuando CLIENT_IP_HEADER lo indica"""
+        self.app.config.update(CLIENT_IP_HEADER='CF-Connecting-IP', TRUSTED_PROXY_CIDRS='10.0.0.0/8')
+        client_ip_resolver.init_app(self.app)
+        with self.app.test_request_context(headers={'CF-Connecting-IP': '198.51.100.25'},
+                                           environ_base={'REMOTE_ADDR': '10.0.0.2'}):
             ip = BlacklistCreateService.get_client_ip()
             self.assertEqual(ip, '198.51.100.25')
     
     def test_get_client_ip_fallback_to_remote_addr(self):
         """Test fallback a REMOTE_ADDR cuando no hay headers"""
+        client_ip_resolver.init_app(self.app)
         with self.app.test_request_context(environ_base={'REMOTE_ADDR': '127.0.0.1'}):
             ip = BlacklistCreateService.get_client_ip()
             self.assertEqual(ip, '127.0.0.1')
     
     def test_get_client_ip_unknown_fallback(self):
-        """Test fallback a 'unknown' cuando no hay IP disponible"""
+        """Test que sin una IP válida se retorna None"""
+        client_ip_resolver.init_app(self.app)
         with self.app.test_request_context():
             ip = BlacklistCreateService.get_client_ip()
-            self.assertEqual(ip, 'unknown')
+            self.assertIsNone(ip)
+
+    def test_get_client_ip_from_middleware(self):
+        """Test que se usa la IP que dejó el middleware en el environ"""
+        with self.app.test_request_context(environ_base={'blacklist.client_ip': '203.0.113.9',
+                                                         'REMOTE_ADDR': '127.0.0.1'}):
+            ip = BlacklistCreateService.get_client_ip()
+            self.assertEqual(ip, '203.0.113.9')
 
     # =====================================
     # TESTS PARA create_blacklist_item
@@ -212,6 +213,32 @@ class TestBlacklistCreateService(unittest.TestCase):
         self.assertEqual(error, 'Error de integridad en la base de datos')
         mock_db.session.rollback.assert_called_once()
     
+    @patch('app.services.blacklist_create_service.db')
+    @patch('app.services.blacklist_create_service.BlacklistCreateService.get_client_ip')
+    @patch('app.services.blacklist_create_service.Blacklist')
+    def test_create_blacklist_item_duplicate_key(self, mock_blacklist_class, mock_get_ip, mock_db):
+        """Test que solo una violación de llave única se reporta como DUPLICATE"""
+        mock_get_ip.return_value = '192.168.1.100'
+        mock_blacklist_class.return_value = Mock()
+        mock_db.session.execute.return_value.rowcount = 0
+        errors = {
+            'SQLITE_CONSTRAINT_PRIMARYKEY': BlacklistCreateService.DUPLICATE,
+            'SQLITE_CONSTRAINT_NOTNULL': BlacklistCreateService.INTEGRITY_ERROR,
+            'SQLITE_CONSTRAINT_CHECK': BlacklistCreateService.INTEGRITY_ERROR,
+        }
+
+        for name, expected in errors.items():
+            orig = sqlite3.IntegrityError(name)
+            orig.sqlite_errorname = name
+            mock_db.session.commit.side_effect = IntegrityError('INSERT', {}, orig)
+
+            result, error = BlacklistCreateService.create_blacklist_item(
+                'test@ejemplo.com', str(uuid.uuid4()), 'Test reason'
+            )
+
+            self.assertIsNone(result)
+            self.assertIs(error, expected)
+
     @patch('app.services.blacklist_create_service.db')
     @patch('app.services.blacklist_create_service.BlacklistCreateService.get_client_ip')
     @patch('app.services.blacklist_create_service.Blacklist')
@@ -242,7 +269,6 @@ class TestBlacklistCreateService(unittest.TestCase):
     def test_process_create_request_success(self):
         """Test procesamiento exitoso de petición"""
         with patch.object(BlacklistCreateService, 'validate_data', return_value=[]), \
-             patch.object(BlacklistCreateService, 'email_exists', return_value=False), \
              patch.object(BlacklistCreateService, 'create_blacklist_item') as mock_create:
             
             # Configurar mock
@@ -270,9 +296,10 @@ class TestBlacklistCreateService(unittest.TestCase):
             self.assertEqual(result['errors'], ['El campo email es requerido'])
     
     def test_process_create_request_email_exists(self):
-        """Test procesamiento cuando el email ya existe"""
+        """Test procesamiento cuando el email ya existe (violación de llave primaria)"""
         with patch.object(BlacklistCreateService, 'validate_data', return_value=[]), \
-             patch.object(BlacklistCreateService, 'email_exists', return_value=True):
+             patch.object(BlacklistCreateService, 'create_blacklist_item',
+                         return_value=(None, BlacklistCreateService.DUPLICATE)):
             
             result = BlacklistCreateService.process_create_request(self.valid_data)
             
@@ -283,7 +310,6 @@ class TestBlacklistCreateService(unittest.TestCase):
     def test_process_create_request_creation_error(self):
         """Test procesamiento con error en la creación"""
         with patch.object(BlacklistCreateService, 'validate_data', return_value=[]), \
-             patch.object(BlacklistCreateService, 'email_exists', return_value=False), \
              patch.object(BlacklistCreateService, 'create_blacklist_item', 
                          return_value=(None, 'Error de base de datos')):
             
@@ -0,0 +1,230 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+
+# Configurar el path para importar módulos de la aplicación
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from sqlalchemy import select
+
+from app import create_app
+from app.api.extensions import db
+from app.models.blacklist import Blacklist
+from app.services.blacklist_bulk_create_service import BlacklistBulkCreateService
+from app.services.blacklist_cache import blacklist_cache
+from app.services.blacklist_create_service import BlacklistCreateService
+from app.services.blacklist_get_service import BlacklistGetService
+from app.services.blacklist_ingest_service import blacklist_ingest_queue
+from app.services.blacklist_retention_service import blacklist_retention
+from app.services.blacklist_snapshot import SnapshotFile, write_snapshot
+
+APP_UUID = '550e8400-e29b-41d4-a716-446655440000'
+
+
+class TestBlacklistExpiration(unittest.TestCase):
+    """Pruebas de expires_at: consultas, creación y purga de filas expiradas"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.headers = {'Authorization': f"Bearer {self.app.config['STATIC_JWT_TOKEN']}"}
+        self.now = datetime.utcnow()
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        blacklist_cache.init_app(self.app)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add(self, email, expires_in=None, reason='Spam'):
+        expires_at = self.now + timedelta(seconds=expires_in) if expires_in is not None else None
+        db.session.add(Blacklist(email=email, app_uuid=APP_UUID, blocked_reason=reason, expires_at=expires_at))
+        db.session.commit()
+
+    def emails(self):
+        db.session.remove()
+        return set(db.session.execute(select(Blacklist.email)).scalars())
+
+    def test_lookups_ignore_expired_rows(self):
+        """Test que la consulta individual y por lote no reportan bloqueos expirados"""
+        self.add('vencido@ejemplo.com', expires_in=-60)
+        self.add('vigente@ejemplo.com', expires_in=3600)
+        self.add('permanente@ejemplo.com')
+
+        response = self.client.get('/blacklists/vencido@ejemplo.com', headers=self.headers)
+        self.assertEqual(response.get_json(), {'is_blocked': False})
+        self.assertEqual(BlacklistGetService.get_blacklist_by_emails(
+            ['vencido@ejemplo.com', 'vigente@ejemplo.com', 'permanente@ejemplo.com']
+        ), {
+            'vencido@ejemplo.com': {'is_blocked': False},
+            'vigente@ejemplo.com': {'is_blocked': True, 'blocked_reason': 'Spam'},
+            'permanente@ejemplo.com': {'is_blocked': True, 'blocked_reason': 'Spam'},
+        })
+
+    def test_cache_ttl_is_capped_by_expiration(self):
+        """Test que un bloqueo que expira no queda en caché más allá de su expiración"""
+        self.app.config.update(BLACKLIST_CACHE_MAX_SIZE=100, BLACKLIST_CACHE_TTL=60)
+        blacklist_cache.init_app(self.app)
+        self.add('a@ejemplo.com', expires_in=3600)
+        self.add('b@ejemplo.com', expires_in=0.5)
+
+        BlacklistGetService.get_blacklist_by_emails(['a@ejemplo.com', 'b@ejemplo.com'])
+
+        entries = blacklist_cache.backend._entries
+        self.assertAlmostEqual(entries['a@ejemplo.com'][0] - blacklist_cache._clock(), 60, delta=1)
+        self.assertLess(entries['b@ejemplo.com'][0] - blacklist_cache._clock(), 1)
+
+    def test_create_with_expires_at(self):
+        """Test que la creación acepta expires_at ISO 8601 y lo devuelve en UTC"""
+        response = self.client.post('/blacklists', headers=self.headers, json={
+            'email': 'a@ejemplo.com', 'app_uuid': APP_UUID, 'expires_at': '2999-01-01T05:00:00-05:00',
+        })
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()['data']['expires_at'], '2999-01-01T10:00:00')
+        self.assertEqual(db.session.get(Blacklist, 'a@ejemplo.com').expires_at, datetime(2999, 1, 1, 10))
+
+    def test_create_rejects_invalid_expires_at(self):
+        """Test que expires_at inválido o en el pasado retorna 400"""
+        for value, error in (('mañana', 'expires_at debe ser una fecha ISO 8601 válida'),
+                             (123, 'expires_at debe ser una fecha ISO 8601 válida'),
+                             ('2000-01-01T00:00:00Z', 'expires_at debe ser una fecha futura')):
+            response = self.client.post('/blacklists', headers=self.headers, json={
+                'email': 'a@ejemplo.com', 'app_uuid': APP_UUID, 'expires_at': value,
+            })
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.get_json(), {'error': error})
+
+    def test_create_replaces_expired_row(self):
+        """Test que crear un email cuyo bloqueo expiró lo vuelve a bloquear en lugar de responder 409"""
+        self.add('a@ejemplo.com', expires_in=-60, reason='Anterior')
+        self.add('b@ejemplo.com', expires_in=3600)
+
+        response = self.client.post('/blacklists', headers=self.headers, json={
+            'email': 'a@ejemplo.com', 'app_uuid': APP_UUID, 'blocked_reason': 'Nuevo',
+        })
+        duplicate = self.client.post('/blacklists', headers=self.headers, json={
+            'email': 'b@ejemplo.com', 'app_uuid': APP_UUID,
+        })
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(duplicate.status_code, 409)
+        db.session.remove()
+        entry = db.session.get(Blacklist, 'a@ejemplo.com')
+        self.assertEqual((entry.blocked_reason, entry.expires_at), ('Nuevo', None))
+        self.assertEqual(BlacklistGetService.get_blacklist_by_email('a@ejemplo.com'),
+                         {'is_blocked': True, 'blocked_reason': 'Nuevo'})
+
+    def test_bulk_replaces_expired_rows(self):
+        """Test que la carga masiva cuenta como creados los emails cuyo bloqueo expiró"""
+        self.add('vencido@ejemplo.com', expires_in=-60)
+        self.add('vigente@ejemplo.com', expires_in=3600)
+
+        with self.app.test_request_context():
+            result = BlacklistBulkCreateService.process_bulk_request([
+                {'email': 'vencido@ejemplo.com', 'app_uuid': APP_UUID, 'expires_at': '2999-01-01T00:00:00'},
+                {'email': 'vigente@ejemplo.com', 'app_uuid': APP_UUID},
+                {'email': 'nuevo@ejemplo.com', 'app_uuid': APP_UUID, 'expires_at': 'ayer'},
+            ])
+
+        self.assertEqual([item['status'] for item in result['data']['results']],
+                         [BlacklistBulkCreateService.STATUS_CREATED, BlacklistBulkCreateService.STATUS_DUPLICATE,
+                          BlacklistBulkCreateService.STATUS_INVALID])
+        db.session.remove()
+        self.assertEqual(db.session.get(Blacklist, 'vencido@ejemplo.com').expires_at, datetime(2999, 1, 1))
+
+    def test_async_create_keeps_expires_at(self):
+        """Test que la cola de creación asíncrona conserva expires_at"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.app.config.update(BLACKLIST_CREATE_MODE='async', BLACKLIST_INGEST_FLUSHER_ENABLED=False,
+                                   BLACKLIST_INGEST_QUEUE_PATH=os.path.join(tmpdir, 'ingest.db'))
+            blacklist_ingest_queue.init_app(self.app)
+            try:
+                response = self.client.post('/blacklists', headers=self.headers, json={
+                    'email': 'a@ejemplo.com', 'app_uuid': APP_UUID, 'expires_at': '2999-01-01T00:00:00Z',
+                })
+                self.assertEqual(response.status_code, 202)
+                self.assertEqual(response.get_json()['data']['expires_at'], '2999-01-01T00:00:00')
+
+                blacklist_ingest_queue.flush_once()
+            finally:
+                blacklist_ingest_queue.init_app(create_app('testing'))
+
+        db.session.remove()
+        self.assertEqual(db.session.get(Blacklist, 'a@ejemplo.com').expires_at, datetime(2999, 1, 1))
+
+    def test_snapshot_respects_expiration(self):
+        """Test que el snapshot responde no bloqueado para las llaves expiradas"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'blacklist.snapshot')
+            write_snapshot(path, [
+                ('vencido@ejemplo.com', 'Spam', self.now - timedelta(seconds=1)),
+                ('vigente@ejemplo.com', 'Spam', self.now + timedelta(hours=1)),
+                ('lejano@ejemplo.com', 'Spam', datetime(9999, 12, 31)),
+                ('permanente@ejemplo.com', 'Spam'),
+            ])
+            snapshot = SnapshotFile(path)
+
+            # Fechas después de 2106 no caben en 32 bits sin signo
+            self.assertTrue(snapshot.get('lejano@ejemplo.com')['is_blocked'])
+
+            self.assertEqual(snapshot.get('vencido@ejemplo.com'), {'is_blocked': False})
+            self.assertTrue(snapshot.get('vigente@ejemplo.com')['is_blocked'])
+            self.assertTrue(snapshot.get('permanente@ejemplo.com')['is_blocked'])
+
+    def test_purge_expired_in_batches(self):
+        """Test que la purga borra solo las filas expiradas, por lotes"""
+        for i in range(5):
+            self.add(f'vencido{i}@ejemplo.com', expires_in=-60 - i)
+        self.add('vigente@ejemplo.com', expires_in=3600)
+        self.add('permanente@ejemplo.com')
+        pauses = []
+        blacklist_retention._sleep = pauses.append
+
+        try:
+            self.assertEqual(blacklist_retention.purge_expired(batch_size=2), 5)
+        finally:
+            blacklist_retention._sleep = time.sleep
+
+        self.assertEqual(self.emails(), {'vigente@ejemplo.com', 'permanente@ejemplo.com'})
+        # Lotes de 2, 2 y 1: pausa solo entre lotes completos
+        self.assertEqual(len(pauses), 2)
+        self.assertEqual(blacklist_retention.stats()['purged'], 5)
+
+    def test_purge_respects_max_batches(self):
+        """Test que max_batches limita lo que borra una corrida"""
+        for i in range(5):
+            self.add(f'vencido{i}@ejemplo.com', expires_in=-60)
+
+        self.assertEqual(blacklist_retention.purge_expired(batch_size=2, max_batches=1), 2)
+        self.assertEqual(len(self.emails()), 3)
+
+    def test_purge_expired_command(self):
+        """Test que flask blacklist purge-expired borra las filas expiradas"""
+        self.add('vencido@ejemplo.com', expires_in=-60)
+        self.add('vigente@ejemplo.com', expires_in=3600)
+
+        result = self.app.test_cli_runner().invoke(args=['blacklist', 'purge-expired', '--batch-size', '10'])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Filas expiradas purgadas: 1', result.output)
+        self.assertEqual(self.emails(), {'vigente@ejemplo.com'})
+
+    def test_parse_expires_at(self):
+        """Test que expires_at se normaliza a UTC sin zona y es opcional"""
+        now = datetime(2026, 1, 1)
+        self.assertIsNone(BlacklistCreateService.parse_expires_at(None, now))
+        self.assertEqual(BlacklistCreateService.parse_expires_at('2026-01-02T01:00:00+01:00', now),
+                         datetime(2026, 1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -30,6 +30,7 @@ class TestBlacklistGetService(unittest.TestCase):
         self.mock_blacklist.created_at.isoformat.return_value = '2023-01-01T10:00:00'
         self.mock_blacklist.updated_at = Mock()
         self.mock_blacklist.updated_at.isoformat.return_value = '2023-01-01T10:00:00'
+        self.mock_blacklist.expires_at = None
     
     # =====================================
     # TESTS PARA CASOS EXITOSOS
@@ -39,19 +40,16 @@ class TestBlacklistGetService(unittest.TestCase):
     def test_get_blacklist_by_email_found(self, mock_db):
         """Test obtener email que está en la blacklist"""
         # Mock de la consulta de base de datos
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_filter.first.return_value = self.mock_blacklist
-        mock_query.filter_by.return_value = mock_filter
-        mock_db.session.query.return_value = mock_query
+        mock_execute = mock_db.session.connection.return_value.execute
+        mock_execute.return_value.first.return_value = self.mock_blacklist
         
         # Ejecutar método
         result = BlacklistGetService.get_blacklist_by_email(self.test_email)
         
         # Verificaciones
-        mock_db.session.query.assert_called_once_with(Blacklist)
-        mock_query.filter_by.assert_called_once_with(email=self.test_email_normalized)
-        mock_filter.first.assert_called_once()
+        mock_db.session.connection.assert_called_once()
+        mock_execute.assert_called_once_with(BlacklistGetService.BLOCKED_REASON_BY_EMAIL, {'email': self.test_email_normalized})
+        mock_execute.return_value.first.assert_called_once()
         
         # Verificar resultado - solo los campos necesarios
         self.assertIsInstance(result, dict)
@@ -71,19 +69,16 @@ class TestBlacklistGetService(unittest.TestCase):
     def test_get_blacklist_by_email_not_found(self, mock_db):
         """Test obtener email que NO está en la blacklist"""
         # Mock de la consulta de base de datos - no encontrado
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_filter.first.return_value = None  # No encontrado
-        mock_query.filter_by.return_value = mock_filter
-        mock_db.session.query.return_value = mock_query
+        mock_execute = mock_db.session.connection.return_value.execute
+        mock_execute.return_value.first.return_value = None  # No encontrado
         
         # Ejecutar método
         result = BlacklistGetService.get_blacklist_by_email(self.test_email)
         
         # Verificaciones
-        mock_db.session.query.assert_called_once_with(Blacklist)
-        mock_query.filter_by.assert_called_once_with(email=self.test_email_normalized)
-        mock_filter.first.assert_called_once()
+        mock_db.session.connection.assert_called_once()
+        mock_execute.assert_called_once_with(BlacklistGetService.BLOCKED_REASON_BY_EMAIL, {'email': self.test_email_normalized})
+        mock_execute.return_value.first.assert_called_once()
         
         # Verificar resultado - solo los campos necesarios
         self.assertIsInstance(result, dict)
@@ -107,34 +102,28 @@ class TestBlacklistGetService(unittest.TestCase):
     def test_get_blacklist_by_email_case_insensitive(self, mock_db):
         """Test que el servicio normaliza emails a lowercase"""
         # Mock de la consulta de base de datos
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_filter.first.return_value = self.mock_blacklist
-        mock_query.filter_by.return_value = mock_filter
-        mock_db.session.query.return_value = mock_query
+        mock_execute = mock_db.session.connection.return_value.execute
+        mock_execute.return_value.first.return_value = self.mock_blacklist
         
         # Ejecutar método con email en mayúsculas
         result = BlacklistGetService.get_blacklist_by_email(self.test_email_upper)
         
         # Verificar que se normalizó a lowercase
-        mock_query.filter_by.assert_called_once_with(email=self.test_email_normalized)
+        mock_execute.assert_called_once_with(BlacklistGetService.BLOCKED_REASON_BY_EMAIL, {'email': self.test_email_normalized})
         self.assertTrue(result['is_blocked'])
     
     @patch('app.services.blacklist_get_service.db')
     def test_get_blacklist_by_email_trim_spaces(self, mock_db):
         """Test que el servicio elimina espacios del email"""
         # Mock de la consulta de base de datos
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_filter.first.return_value = self.mock_blacklist
-        mock_query.filter_by.return_value = mock_filter
-        mock_db.session.query.return_value = mock_query
+        mock_execute = mock_db.session.connection.return_value.execute
+        mock_execute.return_value.first.return_value = self.mock_blacklist
         
         # Ejecutar método con email con espacios
         result = BlacklistGetService.get_blacklist_by_email(self.test_email_spaces)
         
         # Verificar que se eliminaron los espacios
-        mock_query.filter_by.assert_called_once_with(email=self.test_email_normalized)
+        mock_execute.assert_called_once_with(BlacklistGetService.BLOCKED_REASON_BY_EMAIL, {'email': self.test_email_normalized})
         self.assertTrue(result['is_blocked'])
     
     # =====================================
@@ -171,7 +160,7 @@ class TestBlacklistGetService(unittest.TestCase):
         """Test manejo de errores de SQLAlchemy"""
         # Mock error de SQLAlchemy
         from sqlalchemy.exc import SQLAlchemyError
-        mock_db.session.query.side_effect = SQLAlchemyError("Database connection failed")
+        mock_db.session.connection.return_value.execute.side_effect = SQLAlchemyError("Database connection failed")
         
         # Ejecutar método y verificar que se propaga el error
         with self.assertRaises(SQLAlchemyError) as context:
@@ -183,7 +172,7 @@ class TestBlacklistGetService(unittest.TestCase):
     def test_get_blacklist_by_email_unexpected_error(self, mock_db):
         """Test manejo de errores inesperados"""
         # Mock error inesperado
-        mock_db.session.query.side_effect = Exception("Unexpected error")
+        mock_db.session.connection.return_value.execute.side_effect = Exception("Unexpected error")
         
         # Ejecutar método y verificar que se propaga el error
         with self.assertRaises(Exception) as context:
@@ -201,17 +190,14 @@ class TestBlacklistGetService(unittest.TestCase):
         special_email = 'test+tag@ejemplo.com'
         
         # Mock de la consulta de base de datos
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_filter.first.return_value = None
-        mock_query.filter_by.return_value = mock_filter
-        mock_db.session.query.return_value = mock_query
+        mock_execute = mock_db.session.connection.return_value.execute
+        mock_execute.return_value.first.return_value = None
         
         # Ejecutar método
         result = BlacklistGetService.get_blacklist_by_email(special_email)
         
         # Verificar que se procesó correctamente
-        mock_query.filter_by.assert_called_once_with(email=special_email)
+        mock_execute.assert_called_once_with(BlacklistGetService.BLOCKED_REASON_BY_EMAIL, {'email': special_email})
         self.assertFalse(result['is_blocked'])
     
     @patch('app.services.blacklist_get_service.db')
@@ -220,17 +206,14 @@ class TestBlacklistGetService(unittest.TestCase):
         long_email = 'a' * 200 + '@ejemplo.com'
         
         # Mock de la consulta de base de datos
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_filter.first.return_value = None
-        mock_query.filter_by.return_value = mock_filter
-        mock_db.session.query.return_value = mock_query
+        mock_execute = mock_db.session.connection.return_value.execute
+        mock_execute.return_value.first.return_value = None
         
         # Ejecutar método
         result = BlacklistGetService.get_blacklist_by_email(long_email)
         
         # Verificar que se procesó correctamente
-        mock_query.filter_by.assert_called_once_with(email=long_email)
+        mock_execute.assert_called_once_with(BlacklistGetService.BLOCKED_REASON_BY_EMAIL, {'email': long_email})
         self.assertFalse(result['is_blocked'])
     
     # =====================================
@@ -241,11 +224,8 @@ class TestBlacklistGetService(unittest.TestCase):
     def test_response_structure_success_blocked(self, mock_db):
         """Test estructura de respuesta cuando está bloqueado"""
         # Mock de la consulta de base de datos
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_filter.first.return_value = self.mock_blacklist
-        mock_query.filter_by.return_value = mock_filter
-        mock_db.session.query.return_value = mock_query
+        mock_execute = mock_db.session.connection.return_value.execute
+        mock_execute.return_value.first.return_value = self.mock_blacklist
         
         # Ejecutar método
         result = BlacklistGetService.get_blacklist_by_email(self.test_email)
@@ -264,11 +244,8 @@ class TestBlacklistGetService(unittest.TestCase):
     def test_response_structure_success_not_blocked(self, mock_db):
         """Test estructura de respuesta cuando NO está bloqueado"""
         # Mock de la consulta de base de datos
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_filter.first.return_value = None
-        mock_query.filter_by.return_value = mock_filter
-        mock_db.session.query.return_value = mock_query
+        mock_execute = mock_db.session.connection.return_value.execute
+        mock_execute.return_value.first.return_value = None
         
         # Ejecutar método
         result = BlacklistGetService.get_blacklist_by_email(self.test_email)
@@ -282,6 +259,47 @@ class TestBlacklistGetService(unittest.TestCase):
         self.assertIsInstance(result['is_blocked'], bool)
         self.assertFalse(result['is_blocked'])
 
+    
+    # =====================================
+    # TESTS PARA CONSULTA POR LOTES
+    # =====================================
+    
+    @patch('app.services.blacklist_get_service.db')
+    def test_get_blacklist_by_emails_single_query(self, mock_db):
+        """Test que el lote se resuelve con una sola query y normaliza los emails"""
+        found = Mock()
+        found.email = self.test_email_normalized
+        found.blocked_reason = 'Comportamiento sospechoso'
+        found.expires_at = None
+        mock_execute = mock_db.session.connection.return_value.execute
+        mock_execute.return_value.all.return_value = [found]
+        
+        result = BlacklistGetService.get_blacklist_by_emails(
+            [self.test_email_upper, self.test_email_spaces, 'otro@ejemplo.com']
+        )
+        
+        mock_execute.assert_called_once_with(
+            BlacklistGetService.BLOCKED_REASON_BY_EMAILS,
+            {'emails': [self.test_email_normalized, 'otro@ejemplo.com']}
+        )
+        self.assertEqual(result, {
+            self.test_email_normalized: {'is_blocked': True, 'blocked_reason': 'Comportamiento sospechoso'},
+            'otro@ejemplo.com': {'is_blocked': False}
+        })
+    
+    def test_get_blacklist_by_emails_exceeds_max_batch(self):
+        """Test que se rechaza un lote más grande que el máximo"""
+        with self.assertRaises(ValueError) as context:
+            BlacklistGetService.get_blacklist_by_emails(['a@ejemplo.com', 'b@ejemplo.com'], max_batch=1)
+        
+        self.assertEqual(str(context.exception), 'El lote supera el máximo de 1 emails')
+    
+    def test_get_blacklist_by_emails_invalid_input(self):
+        """Test validación de la lista de emails"""
+        for invalid in (None, [], 'a@ejemplo.com', ['a@ejemplo.com', '  ']):
+            with self.assertRaises(ValueError):
+                BlacklistGetService.get_blacklist_by_emails(invalid)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,200 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# Configurar el path para importar módulos de la aplicación
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app import create_app
+from app.api.extensions import db
+from app.models.blacklist import Blacklist
+from app.services.blacklist_bulk_create_service import BlacklistBulkCreateService
+from app.services.blacklist_ingest_service import blacklist_ingest_queue
+
+APP_UUID = '550e8400-e29b-41d4-a716-446655440000'
+
+
+class TestBlacklistIngestQueue(unittest.TestCase):
+    """Pruebas de la creación asíncrona con cola local"""
+
+    def setUp(self):
+        """App en modo async con la cola en un archivo temporal y sin hilo de fondo"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.app = create_app('testing')
+        self.app.config.update(
+            BLACKLIST_CREATE_MODE='async',
+            BLACKLIST_INGEST_QUEUE_PATH=os.path.join(self.tmpdir.name, 'ingest.db'),
+            BLACKLIST_INGEST_FLUSHER_ENABLED=False,
+            BLACKLIST_INGEST_BATCH_SIZE=100,
+        )
+        blacklist_ingest_queue.init_app(self.app)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.headers = {'Authorization': f"Bearer {self.app.config['STATIC_JWT_TOKEN']}"}
+
+    def tearDown(self):
+        """Detiene la cola y vuelve al modo sync"""
+        blacklist_ingest_queue.init_app(create_app('testing'))
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmpdir.cleanup()
+
+    def post(self, email, **extra):
+        return self.client.post('/blacklists', headers=self.headers, json={
+            'email': email, 'app_uuid': APP_UUID, 'blocked_reason': 'Spam', **extra,
+        })
+
+    def emails(self):
+        db.session.remove()
+        return {row.email for row in Blacklist.query.all()}
+
+    def test_post_is_accepted_and_flushed_in_batch(self):
+        """Test que la creación responde 202 y el email se inserta al vaciar la cola"""
+        response = self.post(' Nuevo@Ejemplo.com ')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.get_json()['data']['email'], 'nuevo@ejemplo.com')
+        self.assertEqual(self.emails(), set())
+        self.assertEqual(blacklist_ingest_queue.depth(), 1)
+
+        self.assertEqual(blacklist_ingest_queue.flush_once(), 1)
+
+        self.assertEqual(self.emails(), {'nuevo@ejemplo.com'})
+        self.assertEqual(blacklist_ingest_queue.depth(), 0)
+        self.assertEqual(self.client.get('/blacklists/nuevo@ejemplo.com', headers=self.headers).get_json(),
+                         {'is_blocked': True, 'blocked_reason': 'Spam'})
+
+    def test_invalid_body_is_rejected_without_queueing(self):
+        """Test que la validación sigue respondiendo 400 y no encola"""
+        response = self.post('a@ejemplo.com', app_uuid='no-es-uuid')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(blacklist_ingest_queue.depth(), 0)
+
+    def test_non_text_fields_are_rejected_without_queueing(self):
+        """Test que un objeto o lista en los campos de texto responde 400 y no encola"""
+        for extra in ({'blocked_reason': {'motivo': 'Spam'}}, {'app_uuid': [APP_UUID]}):
+            response = self.post('a@ejemplo.com', **extra)
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.get_json(),
+                             {'error': 'Los campos email, app_uuid y blocked_reason deben ser texto'})
+        self.assertEqual(blacklist_ingest_queue.depth(), 0)
+
+    def test_non_object_body_is_rejected_without_queueing(self):
+        """Test que un cuerpo JSON que no es un objeto responde 400 y no encola"""
+        response = self.client.post('/blacklists', headers=self.headers, json=[1])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {'error': 'Los datos deben ser un objeto JSON'})
+        self.assertEqual(blacklist_ingest_queue.depth(), 0)
+
+    def test_duplicates_are_coalesced(self):
+        """Test que los emails repetidos o ya existentes se descartan en un solo INSERT"""
+        db.session.add(Blacklist(email='existe@ejemplo.com', app_uuid=APP_UUID, blocked_reason='Spam'))
+        db.session.commit()
+        for email in ('a@ejemplo.com', 'A@ejemplo.com', 'existe@ejemplo.com', 'b@ejemplo.com'):
+            self.assertEqual(self.post(email).status_code, 202)
+
+        with patch.object(BlacklistBulkCreateService, 'insert_chunk',
+                          wraps=BlacklistBulkCreateService.insert_chunk) as insert_chunk:
+            self.assertEqual(blacklist_ingest_queue.flush_once(), 4)
+
+        insert_chunk.assert_called_once()
+        self.assertEqual(len(insert_chunk.call_args.args[0]), 3)
+        self.assertEqual(self.emails(), {'a@ejemplo.com', 'b@ejemplo.com', 'existe@ejemplo.com'})
+
+    def test_full_queue_applies_backpressure(self):
+        """Test que con la cola llena la creación responde 503 con Retry-After"""
+        blacklist_ingest_queue.max_depth = 2
+        self.post('a@ejemplo.com')
+        self.post('b@ejemplo.com')
+
+        response = self.post('c@ejemplo.com')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertEqual(blacklist_ingest_queue.stats()['rejected'], 1)
+        self.assertEqual(blacklist_ingest_queue.depth(), 2)
+
+    def test_database_outage_keeps_rows_queued(self):
+        """Test que si la base de datos no responde el lote queda en la cola"""
+        self.post('a@ejemplo.com')
+        error = OperationalError('INSERT', {}, Exception('conexión rechazada'))
+
+        with patch.object(BlacklistBulkCreateService, 'insert_chunk', side_effect=error):
+            with self.assertRaises(OperationalError):
+                blacklist_ingest_queue.flush_once()
+
+        self.assertEqual(blacklist_ingest_queue.depth(), 1)
+        blacklist_ingest_queue.flush_once()
+        self.assertEqual(self.emails(), {'a@ejemplo.com'})
+
+    def test_rejected_row_goes_to_failed_table(self):
+        """Test que una fila que la base de datos rechaza no bloquea al resto del lote"""
+        original = BlacklistBulkCreateService.insert_chunk
+
+        def insert_chunk(rows):
+            if any(row['email'] == 'malo@ejemplo.com' for row in rows):
+                raise IntegrityError('INSERT', {}, Exception('valor inválido'))
+            return original(rows)
+
+        for email in ('a@ejemplo.com', 'malo@ejemplo.com', 'b@ejemplo.com'):
+            self.post(email)
+
+        with patch.object(BlacklistBulkCreateService, 'insert_chunk', side_effect=insert_chunk):
+            with self.assertLogs('app.services.blacklist_ingest_service', level='WARNING'):
+                self.assertEqual(blacklist_ingest_queue.flush_once(), 3)
+
+        self.assertEqual(self.emails(), {'a@ejemplo.com', 'b@ejemplo.com'})
+        self.assertEqual(blacklist_ingest_queue.depth(), 0)
+        self.assertEqual(blacklist_ingest_queue.failed_count(), 1)
+
+    def test_lag_and_stats(self):
+        """Test que /stats reporta profundidad y antigüedad de la cola"""
+        self.post('a@ejemplo.com')
+        time.sleep(0.01)
+
+        stats = self.client.get('/stats', headers=self.headers).get_json()['ingest']
+
+        self.assertEqual(stats['depth'], 1)
+        self.assertGreater(stats['lag_seconds'], 0)
+        self.assertEqual(stats['enqueued'], 1)
+
+    def test_background_flusher(self):
+        """Test que el hilo de fondo vacía la cola sin intervención"""
+        blacklist_ingest_queue.flusher_enabled = True
+        blacklist_ingest_queue.flush_interval = 0.01
+        self.post('a@ejemplo.com')
+
+        deadline = time.monotonic() + 5
+        while blacklist_ingest_queue.depth() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        blacklist_ingest_queue.stop()
+
+        self.assertEqual(self.emails(), {'a@ejemplo.com'})
+        self.assertTrue(blacklist_ingest_queue.stats()['flushed'] >= 1)
+
+    def test_flush_queue_command(self):
+        """Test que flask blacklist flush-queue vacía la cola completa"""
+        blacklist_ingest_queue.batch_size = 2
+        for i in range(5):
+            self.post(f'{i}@ejemplo.com')
+
+        result = self.app.test_cli_runner().invoke(args=['blacklist', 'flush-queue'])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Filas retiradas de la cola: 5', result.output)
+        self.assertEqual(len(self.emails()), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
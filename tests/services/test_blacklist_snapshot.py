@@ -0,0 +1,197 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Configurar el path para importar módulos de la aplicación
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from app import create_app
+from app.api.extensions import db
+from app.models.blacklist import Blacklist
+from app.services.blacklist_get_service import BlacklistGetService
+from app.services.blacklist_snapshot import (
+    BlacklistSnapshot,
+    SnapshotFile,
+    blacklist_snapshot,
+    write_snapshot,
+)
+
+APP_UUID = '550e8400-e29b-41d4-a716-446655440000'
+
+
+class TestSnapshotFile(unittest.TestCase):
+    """Pruebas del formato del snapshot"""
+
+    def setUp(self):
+        """Directorio temporal para los snapshots"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'blacklist.snapshot')
+
+    def tearDown(self):
+        """Borra los snapshots"""
+        self.tmpdir.cleanup()
+
+    def test_lookup_hits_and_misses(self):
+        """Test que encuentra cada email con su motivo y descarta los demás"""
+        rows = [(f'{i}@ejemplo.com', 'Spam' if i % 2 else 'Fraude') for i in range(1000)]
+        rows.append(('sin-motivo@ejemplo.com', None))
+        rows.append(('ñandú@ejemplo.com', 'Motivo con tildes: ñ'))
+
+        self.assertEqual(write_snapshot(self.path, rows, change_seq=42), 1002)
+        snapshot = SnapshotFile(self.path)
+
+        for email, reason in rows:
+            self.assertEqual(snapshot.get(email), {'is_blocked': True, 'blocked_reason': reason})
+        self.assertEqual(snapshot.get('otro@ejemplo.com'), {'is_blocked': False})
+        self.assertEqual(snapshot.change_seq, 42)
+
+    def test_reasons_are_stored_once(self):
+        """Test que los motivos repetidos se guardan una sola vez"""
+        write_snapshot(self.path, [(f'{i}@ejemplo.com', 'Spam') for i in range(100)])
+        small = os.path.getsize(self.path)
+        write_snapshot(self.path, [(f'{i}@ejemplo.com', f'Spam {i}') for i in range(100)])
+
+        self.assertLess(small, os.path.getsize(self.path))
+
+    def test_empty_table(self):
+        """Test que un snapshot vacío responde que ningún email está bloqueado"""
+        write_snapshot(self.path, [])
+
+        self.assertEqual(SnapshotFile(self.path).get('a@ejemplo.com'), {'is_blocked': False})
+
+    def test_invalid_file_is_rejected(self):
+        """Test que un archivo que no es un snapshot completo se rechaza"""
+        write_snapshot(self.path, [('a@ejemplo.com', 'Spam')])
+        with open(self.path, 'r+b') as snapshot:
+            snapshot.truncate(os.path.getsize(self.path) - 1)
+
+        with self.assertRaises(ValueError):
+            SnapshotFile(self.path)
+
+    def test_failed_write_keeps_previous_snapshot(self):
+        """Test que un error al escribir no reemplaza el snapshot publicado"""
+        write_snapshot(self.path, [('a@ejemplo.com', 'Spam')])
+
+        def rows():
+            yield 'b@ejemplo.com', 'Spam'
+            raise RuntimeError('conexión perdida')
+
+        with self.assertRaises(RuntimeError):
+            write_snapshot(self.path, rows())
+
+        self.assertEqual(SnapshotFile(self.path).get('a@ejemplo.com')['is_blocked'], True)
+        self.assertEqual(os.listdir(self.tmpdir.name), ['blacklist.snapshot'])
+
+
+class TestBlacklistSnapshotLookup(unittest.TestCase):
+    """Pruebas del modo de consulta desde el snapshot"""
+
+    def setUp(self):
+        """App con BLACKLIST_LOOKUP_MODE=snapshot y revisión del archivo en cada consulta"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'blacklist.snapshot')
+        write_snapshot(self.path, [('a@ejemplo.com', 'Spam')])
+
+        self.app = create_app('testing')
+        self.app.config.update(BLACKLIST_LOOKUP_MODE='snapshot', BLACKLIST_SNAPSHOT_PATH=self.path,
+                               BLACKLIST_SNAPSHOT_CHECK_SECONDS=0)
+        blacklist_snapshot.init_app(self.app)
+        self.client = self.app.test_client()
+        self.headers = {'Authorization': f"Bearer {self.app.config['STATIC_JWT_TOKEN']}"}
+
+    def tearDown(self):
+        """Vuelve al modo db"""
+        blacklist_snapshot.init_app(create_app('testing'))
+        self.tmpdir.cleanup()
+
+    @patch('app.services.blacklist_get_service.db')
+    def test_lookups_do_not_touch_database(self, mock_db):
+        """Test que la consulta individual y por lote se resuelven sin base de datos"""
+        with self.app.app_context():
+            self.assertEqual(BlacklistGetService.get_blacklist_by_email(' A@Ejemplo.com'),
+                             {'is_blocked': True, 'blocked_reason': 'Spam'})
+            self.assertEqual(BlacklistGetService.get_blacklist_by_emails(['a@ejemplo.com', 'b@ejemplo.com']), {
+                'a@ejemplo.com': {'is_blocked': True, 'blocked_reason': 'Spam'},
+                'b@ejemplo.com': {'is_blocked': False},
+            })
+
+        mock_db.session.connection.assert_not_called()
+
+    def test_endpoint_without_table(self):
+        """Test que el endpoint responde desde el snapshot aunque la tabla no exista"""
+        response = self.client.get('/blacklists/a@ejemplo.com', headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'is_blocked': True, 'blocked_reason': 'Spam'})
+
+    def test_hot_swap(self):
+        """Test que un snapshot nuevo publicado en el mismo path reemplaza al anterior"""
+        self.assertTrue(blacklist_snapshot.lookup('a@ejemplo.com')['is_blocked'])
+        previous = blacklist_snapshot._current
+
+        write_snapshot(self.path, [('b@ejemplo.com', 'Fraude')])
+
+        self.assertFalse(blacklist_snapshot.lookup('a@ejemplo.com')['is_blocked'])
+        self.assertEqual(blacklist_snapshot.lookup('b@ejemplo.com'), {'is_blocked': True, 'blocked_reason': 'Fraude'})
+        self.assertEqual(blacklist_snapshot.stats()['swaps'], 1)
+        # El mapeo anterior sigue siendo válido para quien lo estaba usando
+        self.assertTrue(previous.get('a@ejemplo.com')['is_blocked'])
+
+    def test_missing_snapshot_falls_back_to_database(self):
+        """Test que sin snapshot las consultas van a la base de datos"""
+        os.unlink(self.path)
+        snapshot = BlacklistSnapshot()
+
+        with self.assertLogs('app.services.blacklist_snapshot', level='WARNING'):
+            snapshot.init_app(self.app)
+        self.assertIsNone(snapshot.lookup('a@ejemplo.com'))
+        self.assertFalse(snapshot.stats()['loaded'])
+
+    def test_invalid_mode(self):
+        """Test que un modo de consulta desconocido se rechaza al configurar"""
+        self.app.config['BLACKLIST_LOOKUP_MODE'] = 'replica'
+
+        with self.assertRaises(ValueError):
+            BlacklistSnapshot().init_app(self.app)
+
+
+class TestSnapshotCommand(unittest.TestCase):
+    """Pruebas para el comando flask blacklist snapshot"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.runner = self.app.test_cli_runner()
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmpdir.cleanup()
+
+    def test_dumps_table(self):
+        """Test que el snapshot contiene todos los emails de la tabla"""
+        for i in range(5):
+            db.session.add(Blacklist(email=f'{i}@ejemplo.com', app_uuid=APP_UUID, blocked_reason=f'Motivo {i}'))
+        db.session.commit()
+        path = os.path.join(self.tmpdir.name, 'blacklist.snapshot')
+
+        result = self.runner.invoke(args=['blacklist', 'snapshot', '--output', path, '--batch-size', '2'])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('5 emails', result.output)
+        snapshot = SnapshotFile(path)
+        self.assertEqual(snapshot.count, 5)
+        self.assertEqual(snapshot.get('3@ejemplo.com'), {'is_blocked': True, 'blocked_reason': 'Motivo 3'})
+        self.assertIsNotNone(snapshot.change_seq)
+
+
+if __name__ == '__main__':
+    unittest.main()
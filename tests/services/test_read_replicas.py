@@ -0,0 +1,209 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Configurar el path para importar módulos de la aplicación
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from sqlalchemy import insert, select
+
+from app import create_app
+from app.api.extensions import db
+from app.models.blacklist import Blacklist
+from app.services.blacklist_cache import blacklist_cache
+from app.services.blacklist_get_service import BlacklistGetService
+from app.services.read_replicas import parse_replica_urls, replica_router
+
+APP_UUID = '550e8400-e29b-41d4-a716-446655440000'
+
+
+class TestReadReplicas(unittest.TestCase):
+    """Pruebas del enrutamiento de lecturas con dos réplicas SQLite en archivos"""
+
+    def setUp(self):
+        """Primario en memoria y dos réplicas en archivos, sin hilo de revisión"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.replica_paths = [os.path.join(self.tmpdir.name, f'replica{i}.db') for i in range(2)]
+        self.app = create_app('testing')
+        self.configure(self.replica_paths)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.headers = {'Authorization': f"Bearer {self.app.config['STATIC_JWT_TOKEN']}"}
+
+    def tearDown(self):
+        """Vuelve a la configuración sin réplicas"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        replica_router.init_app(create_app('testing'))
+        self.tmpdir.cleanup()
+
+    def configure(self, paths, **config):
+        self.app.config.update(
+            DATABASE_REPLICA_URLS=','.join(f'sqlite:///{path}' for path in paths),
+            DB_REPLICA_HEALTH_INTERVAL=0,
+            **config,
+        )
+        replica_router.init_app(self.app)
+        for replica in replica_router.replicas:
+            if os.path.isdir(os.path.dirname(replica.engine.url.database)):
+                db.metadata.create_all(replica.engine)
+
+    def add_to_replica(self, index, email, reason='Spam'):
+        with replica_router.replicas[index].engine.begin() as connection:
+            connection.execute(insert(Blacklist.__table__), {
+                'email': email, 'app_uuid': APP_UUID, 'blocked_reason': reason,
+            })
+
+    def lookup(self, email, **environ):
+        response = self.client.get(f'/blacklists/{email}', headers=self.headers, environ_overrides=environ)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def test_parse_replica_urls(self):
+        """Test que la lista de URLs ignora espacios y elementos vacíos"""
+        self.assertEqual(parse_replica_urls(' sqlite:///a.db, ,sqlite:///b.db,'), ['sqlite:///a.db', 'sqlite:///b.db'])
+        self.assertEqual(parse_replica_urls(None), [])
+
+    def test_lookups_round_robin_across_replicas(self):
+        """Test que las consultas se reparten entre las réplicas y no van al primario"""
+        self.add_to_replica(0, 'a@ejemplo.com', 'En réplica 0')
+        self.add_to_replica(1, 'a@ejemplo.com', 'En réplica 1')
+
+        reasons = {self.lookup('a@ejemplo.com')['blocked_reason'] for _ in range(4)}
+
+        self.assertEqual(reasons, {'En réplica 0', 'En réplica 1'})
+        stats = replica_router.stats()
+        self.assertEqual([replica['reads'] for replica in stats['replicas']], [2, 2])
+        self.assertEqual(stats['primary_reads'], 0)
+
+    def test_batch_list_and_export_read_from_replica(self):
+        """Test que la consulta por lote, el listado y la exportación leen de las réplicas"""
+        for index in range(2):
+            self.add_to_replica(index, 'a@ejemplo.com')
+
+        self.assertEqual(BlacklistGetService.get_blacklist_by_emails(['a@ejemplo.com'])['a@ejemplo.com']['is_blocked'], True)
+
+        listing = self.client.get('/blacklists', headers=self.headers).get_json()
+        self.assertEqual([item['email'] for item in listing['items']], ['a@ejemplo.com'])
+
+        export = self.client.get('/blacklists/export?format=ndjson', headers=self.headers)
+        self.assertEqual(export.status_code, 200)
+        self.assertIn(b'a@ejemplo.com', export.data)
+        self.assertEqual(db.session.execute(select(Blacklist.email)).all(), [])
+
+    def test_read_your_writes_after_create(self):
+        """Test que tras crear un email el mismo cliente lo lee del primario y los demás de las réplicas"""
+        response = self.client.post('/blacklists', headers=self.headers, json={
+            'email': 'nuevo@ejemplo.com', 'app_uuid': APP_UUID, 'blocked_reason': 'Spam',
+        }, environ_overrides={'REMOTE_ADDR': '10.0.0.1'})
+        self.assertEqual(response.status_code, 201)
+
+        self.assertTrue(self.lookup('nuevo@ejemplo.com', REMOTE_ADDR='10.0.0.1')['is_blocked'])
+        # Otro cliente lee de una réplica que todavía no tiene la fila
+        self.assertFalse(self.lookup('nuevo@ejemplo.com', REMOTE_ADDR='10.0.0.2')['is_blocked'])
+
+        stats = replica_router.stats()
+        self.assertEqual(stats['sticky_reads'], 1)
+        self.assertEqual(sum(replica['reads'] for replica in stats['replicas']), 1)
+
+    def test_replica_misses_do_not_overwrite_cache(self):
+        """Test que un no bloqueado leído de una réplica atrasada no pisa el caché de la creación"""
+        self.configure(self.replica_paths, BLACKLIST_CACHE_MAX_SIZE=100)
+        blacklist_cache.init_app(self.app)
+        try:
+            for index in range(2):
+                self.add_to_replica(index, 'a@ejemplo.com')
+            self.lookup('a@ejemplo.com', REMOTE_ADDR='10.0.0.2')
+            self.lookup('libre@ejemplo.com', REMOTE_ADDR='10.0.0.2')
+            BlacklistGetService.get_blacklist_by_emails(['libre2@ejemplo.com'])
+
+            self.assertTrue(blacklist_cache.get('a@ejemplo.com')['is_blocked'])
+            self.assertIsNone(blacklist_cache.get('libre@ejemplo.com'))
+            self.assertIsNone(blacklist_cache.get('libre2@ejemplo.com'))
+
+            # Carrera: la creación cachea el bloqueo mientras otra consulta
+            # ya leyó la réplica sin la fila
+            BlacklistGetService.store_created('nuevo@ejemplo.com', 'Spam')
+            self.assertFalse(BlacklistGetService.store_result('nuevo@ejemplo.com', None, True)['is_blocked'])
+            self.assertTrue(blacklist_cache.get('nuevo@ejemplo.com')['is_blocked'])
+        finally:
+            blacklist_cache.init_app(create_app('testing'))
+
+    def test_sticky_lookup_has_its_own_single_flight_key(self):
+        """Test que una consulta con read-your-writes no se agrupa con lecturas de réplicas"""
+        with patch.object(blacklist_cache, 'load', wraps=blacklist_cache.load) as load:
+            self.lookup('a@ejemplo.com', REMOTE_ADDR='10.0.0.2')
+            replica_router.record_write('10.0.0.1')
+            self.lookup('a@ejemplo.com', REMOTE_ADDR='10.0.0.1')
+
+        self.assertEqual([call.args[0] for call in load.call_args_list],
+                         ['a@ejemplo.com', 'primary:a@ejemplo.com'])
+
+    def test_sticky_window_expires(self):
+        """Test que sin DB_REPLICA_STICKY_SECONDS las lecturas vuelven a las réplicas"""
+        self.configure(self.replica_paths, DB_REPLICA_STICKY_SECONDS=0)
+        replica_router.record_write('10.0.0.1')
+
+        self.assertFalse(self.lookup('a@ejemplo.com', REMOTE_ADDR='10.0.0.1')['is_blocked'])
+        self.assertEqual(replica_router.stats()['sticky_reads'], 0)
+
+    def test_failover_to_next_replica_and_primary(self):
+        """Test que una réplica que no responde sale de rotación y la lectura se repite en otra"""
+        missing = os.path.join(self.tmpdir.name, 'no-existe', 'replica.db')
+        self.configure([missing, self.replica_paths[1]])
+        self.add_to_replica(1, 'a@ejemplo.com')
+
+        with self.assertLogs('app.services.read_replicas', level='WARNING'):
+            results = [BlacklistGetService.get_blacklist_by_email('a@ejemplo.com') for _ in range(3)]
+
+        self.assertTrue(all(result['is_blocked'] for result in results))
+        stats = replica_router.stats()
+        self.assertFalse(stats['replicas'][0]['available'])
+        self.assertEqual(stats['replicas'][0]['failures'], 1)
+        self.assertEqual(stats['replicas'][1]['reads'], 3)
+
+        # Sin réplicas disponibles la lectura va al primario
+        replica_router.mark_down(replica_router.replicas[1], 'prueba')
+        self.assertFalse(BlacklistGetService.get_blacklist_by_email('a@ejemplo.com')['is_blocked'])
+        self.assertEqual(replica_router.stats()['primary_reads'], 1)
+
+    def test_health_check_restores_replica(self):
+        """Test que la revisión periódica devuelve a rotación una réplica que vuelve a responder"""
+        directory = os.path.join(self.tmpdir.name, 'tardia')
+        self.configure([os.path.join(directory, 'replica.db')])
+
+        with self.assertLogs('app.services.read_replicas', level='WARNING'):
+            replica_router.check_health()
+        self.assertFalse(replica_router.stats()['replicas'][0]['available'])
+
+        os.mkdir(directory)
+        replica_router.check_health()
+        self.assertTrue(replica_router.stats()['replicas'][0]['available'])
+
+    def test_writes_inside_read_go_to_primary(self):
+        """Test que una sentencia de escritura dentro de una lectura enrutada se ejecuta en el primario"""
+        replica_router.read(lambda: db.session.execute(insert(Blacklist.__table__), {
+            'email': 'a@ejemplo.com', 'app_uuid': APP_UUID,
+        }))
+        db.session.commit()
+
+        self.assertEqual(db.session.execute(select(Blacklist.email)).scalars().all(), ['a@ejemplo.com'])
+
+    def test_stats_endpoint(self):
+        """Test que /stats reporta las réplicas sin contraseñas"""
+        self.configure(self.replica_paths)
+
+        stats = self.client.get('/stats', headers=self.headers).get_json()['replicas']
+
+        self.assertTrue(stats['enabled'])
+        self.assertEqual(len(stats['replicas']), 2)
+        self.assertTrue(all(replica['available'] for replica in stats['replicas']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,275 @@
+import asyncio
+import json
+import tempfile
+import threading
+import unittest
+
+# Configurar el path para importar módulos de la aplicación
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
+
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from app import create_app
+from app.api.extensions import db
+from app.api.query_monitor import QueryBudgetExceeded, query_budget
+from app.asgi import async_database_url, async_engine_options, create_asgi_app
+from app.services.blacklist_cache import blacklist_cache
+
+
+class TestAsyncEngineConfig(unittest.TestCase):
+    """Pruebas de la conversión de configuración al engine asíncrono"""
+
+    def test_database_url_uses_async_driver(self):
+        """Test que la URL se convierte al driver asíncrono equivalente"""
+        self.assertEqual(async_database_url('postgresql://u:p@db/app').drivername, 'postgresql+asyncpg')
+        self.assertEqual(async_database_url('postgresql+psycopg2://u:p@db/app').drivername, 'postgresql+asyncpg')
+        self.assertEqual(async_database_url('sqlite:///dev.db').drivername, 'sqlite+aiosqlite')
+        with self.assertRaises(ValueError):
+            async_database_url('mysql://u:p@db/app')
+
+    def test_engine_options_map_pool_and_timeouts(self):
+        """Test que se conservan los tamaños del pool y los timeouts van como server_settings"""
+        url = async_database_url('postgresql://u:p@db/app')
+        options = async_engine_options(url, {
+            'poolclass': object,
+            'pool_size': 20,
+            'max_overflow': 5,
+            'pool_pre_ping': True,
+            'connect_args': {'options': '-c statement_timeout=500 -c lock_timeout=200'},
+        })
+
+        self.assertEqual(options, {
+            'pool_size': 20,
+            'max_overflow': 5,
+            'pool_pre_ping': True,
+            'connect_args': {'server_settings': {'statement_timeout': '500', 'lock_timeout': '200'}},
+        })
+
+
+class TestAsgiApp(unittest.TestCase):
+    """Pruebas de integración de la aplicación ASGI con aiosqlite"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.flask_app = create_app('testing')
+        self.app = create_asgi_app(flask_app=self.flask_app)
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self._create_schema())
+        self.token = self.flask_app.config['STATIC_JWT_TOKEN']
+        self.headers = {'Authorization': f'Bearer {self.token}', 'Content-Type': 'application/json'}
+        self.app_uuid = '550e8400-e29b-41d4-a716-446655440000'
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        self.loop.run_until_complete(self.app.engine.dispose())
+        self.loop.close()
+
+    async def _create_schema(self):
+        async with self.app.engine.begin() as connection:
+            await connection.run_sync(db.metadata.create_all)
+
+    def request(self, method, path, body=None, headers=None):
+        """Ejecuta una petición HTTP contra la app ASGI y retorna (status, headers, body)"""
+        headers = self.headers if headers is None else headers
+        content = json.dumps(body).encode('utf-8') if body is not None else b''
+        if content:
+            headers = dict(headers, **{'Content-Length': str(len(content))})
+        scope = {
+            'type': 'http',
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode('utf-8'),
+            'root_path': '',
+            'query_string': b'',
+            'headers': [(name.lower().encode('latin1'), value.encode('latin1'))
+                        for name, value in headers.items()],
+            'client': ('10.0.0.1', 5000),
+            'server': ('localhost', 8000),
+        }
+        messages = [{'type': 'http.request', 'body': content, 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        self.loop.run_until_complete(self.app(scope, receive, send))
+        start = sent[0]
+        response_body = b''.join(message.get('body', b'') for message in sent[1:])
+        response_headers = dict(start['headers'])
+        if response_headers.get(b'content-type') == b'application/json':
+            response_body = json.loads(response_body)
+        return start['status'], response_headers, response_body
+
+    def test_get_email_not_blocked(self):
+        """Test que un email no registrado retorna is_blocked False"""
+        status, headers, data = self.request('GET', '/blacklists/libre@ejemplo.com')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'content-type'], b'application/json')
+        self.assertEqual(data, {'is_blocked': False})
+
+    def test_create_then_get(self):
+        """Test que un email creado por la ruta asíncrona se reporta bloqueado"""
+        status, _, data = self.request('POST', '/blacklists', {
+            'email': ' Nuevo@Ejemplo.com ', 'app_uuid': self.app_uuid, 'blocked_reason': 'Spam'
+        })
+
+        self.assertEqual(status, 201)
+        self.assertEqual(data, {
+            'message': 'Email agregado a la lista negra exitosamente',
+            'data': {'email': 'nuevo@ejemplo.com', 'app_uuid': self.app_uuid,
+                     'blocked_reason': 'Spam', 'ip_address': '10.0.0.1', 'expires_at': None},
+        })
+
+        status, _, data = self.request('GET', '/blacklists/NUEVO@ejemplo.com')
+        self.assertEqual(status, 200)
+        self.assertEqual(data, {'is_blocked': True, 'blocked_reason': 'Spam'})
+
+    def test_create_duplicate_returns_409(self):
+        """Test que crear un email existente retorna 409"""
+        item = {'email': 'dup@ejemplo.com', 'app_uuid': self.app_uuid}
+        self.request('POST', '/blacklists', item)
+
+        status, _, data = self.request('POST', '/blacklists', item)
+
+        self.assertEqual(status, 409)
+        self.assertEqual(data, {'error': 'El email ya está en la lista negra'})
+
+    def test_create_validation_errors(self):
+        """Test que los errores de validación tienen el mismo formato que Flask"""
+        status, _, data = self.request('POST', '/blacklists', {'app_uuid': 'no-es-uuid'})
+
+        self.assertEqual(status, 400)
+        self.assertEqual(data, {'error': ['El campo email es requerido', 'El app_uuid debe ser un UUID válido']})
+
+    def test_create_non_object_body_returns_400(self):
+        """Test que un cuerpo JSON que no es un objeto responde 400 y no 500"""
+        status, _, data = self.request('POST', '/blacklists', [1])
+
+        self.assertEqual(status, 400)
+        self.assertEqual(data, {'error': 'Los datos deben ser un objeto JSON'})
+
+    def test_create_non_json_falls_back_to_flask(self):
+        """Test que un cuerpo que no es JSON lo responde Flask"""
+        headers = {'Authorization': f'Bearer {self.token}', 'Content-Type': 'text/plain'}
+
+        status, _, data = self.request('POST', '/blacklists', headers=headers)
+
+        self.assertEqual(status, 415)
+        self.assertIn('message', data)
+
+    def test_lookup(self):
+        """Test que la consulta por lotes combina bloqueados y no bloqueados"""
+        self.request('POST', '/blacklists', {'email': 'a@ejemplo.com', 'app_uuid': self.app_uuid,
+                                             'blocked_reason': 'Fraude'})
+
+        status, _, data = self.request('POST', '/blacklists/lookup', {'emails': ['A@ejemplo.com', 'b@ejemplo.com']})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(data, {'results': {
+            'a@ejemplo.com': {'is_blocked': True, 'blocked_reason': 'Fraude'},
+            'b@ejemplo.com': {'is_blocked': False},
+        }})
+
+    def test_lookup_without_emails_returns_400(self):
+        """Test que un lote vacío retorna 400"""
+        status, _, data = self.request('POST', '/blacklists/lookup', {'emails': []})
+
+        self.assertEqual(status, 400)
+        self.assertEqual(data, {'error': 'Se requiere una lista de emails no vacía'})
+
+    def test_missing_token_returns_401(self):
+        """Test que sin token se retorna 401"""
+        status, _, data = self.request('GET', '/blacklists/a@ejemplo.com', headers={})
+
+        self.assertEqual(status, 401)
+        self.assertEqual(data, {'message': 'Unauthorized'})
+
+    def test_invalid_token_returns_403(self):
+        """Test que un token inválido retorna 403"""
+        status, _, data = self.request('GET', '/blacklists/a@ejemplo.com',
+                                       headers={'Authorization': 'Bearer otro'})
+
+        self.assertEqual(status, 403)
+        self.assertEqual(data, {'message': 'Forbidden'})
+
+    def test_shared_cache_runs_off_the_event_loop(self):
+        """Test que con un caché shared las operaciones del caché no corren en el event loop"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.flask_app.config.update(BLACKLIST_CACHE_MAX_SIZE=100, BLACKLIST_CACHE_BACKEND='shared',
+                                         BLACKLIST_CACHE_SHARED_PATH=os.path.join(tmpdir, 'cache'))
+            blacklist_cache.init_app(self.flask_app)
+            backend = blacklist_cache.backend
+            threads = []
+            for name in ('get', 'set'):
+                original = getattr(backend, name)
+
+                def traced(*args, _original=original):
+                    threads.append(threading.get_ident())
+                    return _original(*args)
+                setattr(backend, name, traced)
+
+            try:
+                status, _, _ = self.request('POST', '/blacklists', {'email': 'a@ejemplo.com',
+                                                                    'app_uuid': self.app_uuid})
+                self.assertEqual(status, 201)
+                status, _, data = self.request('GET', '/blacklists/a@ejemplo.com')
+                self.assertEqual(data, {'is_blocked': True, 'blocked_reason': None})
+                status, _, _ = self.request('POST', '/blacklists/lookup', {'emails': ['b@ejemplo.com']})
+                self.assertEqual(status, 200)
+            finally:
+                blacklist_cache.init_app(create_app('testing'))
+
+        self.assertTrue(threads)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    def test_hot_routes_record_metrics(self):
+        """Test que las rutas del event loop registran los histogramas de /metrics"""
+        def sample(name, **labels):
+            return REGISTRY.get_sample_value(name, labels) or 0.0
+        endpoint = 'api_root.blacklistgetresource'
+        requests = sample('blacklist_http_request_duration_seconds_count',
+                          method='GET', endpoint=endpoint, status='200')
+        queries = sample('blacklist_http_request_db_queries_sum', endpoint=endpoint)
+        db_time = sample('blacklist_http_request_stage_duration_seconds_sum', endpoint=endpoint, stage='db')
+
+        status, _, _ = self.request('GET', '/blacklists/libre@ejemplo.com')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(sample('blacklist_http_request_duration_seconds_count',
+                                method='GET', endpoint=endpoint, status='200'), requests + 1)
+        self.assertEqual(sample('blacklist_http_request_db_queries_sum', endpoint=endpoint), queries + 1)
+        self.assertGreater(sample('blacklist_http_request_stage_duration_seconds_sum',
+                                  endpoint=endpoint, stage='db'), db_time)
+
+    def test_query_budget_counts_async_statements(self):
+        """Test que query_budget cuenta las sentencias del engine asíncrono"""
+        @query_budget(1)
+        async def two_statements():
+            async with self.app.engine.connect() as connection:
+                await connection.execute(text('SELECT 1'))
+                await connection.execute(text('SELECT 2'))
+
+        with self.assertRaises(QueryBudgetExceeded):
+            self.loop.run_until_complete(two_statements())
+
+    def test_other_routes_served_by_flask(self):
+        """Test que las rutas no asíncronas y los 404 los atiende Flask"""
+        status, _, data = self.request('GET', '/stats')
+        self.assertEqual(status, 200)
+        self.assertIn('cache', data)
+
+        status, _, _ = self.request('GET', '/no-existe')
+        self.assertEqual(status, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+
+# Configurar el path para importar módulos de la aplicación
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
+
+from flask_migrate import upgrade, downgrade
+from sqlalchemy import inspect, text
+
+from app import create_app
+from app.api.extensions import db
+from app.models.blacklist import is_partitioned
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), '../migrations')
+
+
+class TestMigrations(unittest.TestCase):
+    """Pruebas de las migraciones de Alembic sobre SQLite"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        db.session.remove()
+        with db.engine.begin() as connection:
+            connection.execute(text('DROP TABLE IF EXISTS blacklist'))
+            connection.execute(text('DROP TABLE IF EXISTS alembic_version'))
+        self.app_context.pop()
+
+    def test_upgrade_creates_schema(self):
+        """Test que upgrade crea la tabla y coincide con el modelo"""
+        upgrade(directory=MIGRATIONS_DIR)
+
+        inspector = inspect(db.engine)
+        columns = {column['name'] for column in inspector.get_columns('blacklist')}
+        self.assertTrue({'email', 'app_uuid', 'blocked_reason', 'ip_address',
+                         'created_at', 'updated_at', 'expires_at'} <= columns)
+        with db.engine.connect() as connection:
+            indexes = connection.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'blacklist'"
+            )).scalars().all()
+        self.assertIn('ix_blacklist_email_lower', indexes)
+        self.assertIn('ix_blacklist_expires_at', indexes)
+
+    def test_partitioning_is_skipped_outside_postgres(self):
+        """Test que en SQLite 0008 no particiona y el índice único sobre lower(email) se conserva"""
+        upgrade(directory=MIGRATIONS_DIR)
+
+        with db.engine.connect() as connection:
+            self.assertFalse(is_partitioned(connection))
+            indexes = connection.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'blacklist'"
+            )).scalars().all()
+        self.assertIn('ix_blacklist_email_lower', indexes)
+
+    def test_upgrade_adopts_table_from_create_all(self):
+        """Test que upgrade sobre una tabla creada con create_all normaliza sus filas"""
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                'CREATE TABLE blacklist (email VARCHAR(255) PRIMARY KEY, app_uuid VARCHAR(36) NOT NULL, '
+                'blocked_reason VARCHAR(255), ip_address VARCHAR(45), created_at DATETIME, updated_at DATETIME)'
+            ))
+            for email in ('Mixed@Ejemplo.com', 'dup@ejemplo.com', 'DUP@ejemplo.com', 'Otro@X.com', 'OTRO@x.com'):
+                connection.execute(text(
+                    "INSERT INTO blacklist (email, app_uuid) VALUES (:email, 'x')"
+                ), {'email': email})
+
+        upgrade(directory=MIGRATIONS_DIR)
+
+        with db.engine.connect() as connection:
+            emails = sorted(connection.execute(text('SELECT email FROM blacklist')).scalars())
+        self.assertEqual(emails, ['dup@ejemplo.com', 'mixed@ejemplo.com', 'otro@x.com'])
+
+    def test_upgrade_numbers_existing_rows(self):
+        """Test que upgrade asigna change_seq a las filas existentes en orden de actualización"""
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                'CREATE TABLE blacklist (email VARCHAR(255) PRIMARY KEY, app_uuid VARCHAR(36) NOT NULL, '
+                'blocked_reason VARCHAR(255), ip_address VARCHAR(45), created_at DATETIME, updated_at DATETIME)'
+            ))
+            for email, updated_at in (('b@x.com', '2026-01-02'), ('a@x.com', '2026-01-03'), ('c@x.com', '2026-01-01')):
+                connection.execute(text(
+                    "INSERT INTO blacklist (email, app_uuid, updated_at) VALUES (:email, 'x', :updated_at)"
+                ), {'email': email, 'updated_at': updated_at})
+
+        upgrade(directory=MIGRATIONS_DIR)
+
+        with db.engine.connect() as connection:
+            rows = connection.execute(text('SELECT email, change_seq FROM blacklist ORDER BY change_seq')).all()
+        self.assertEqual([tuple(row) for row in rows], [('c@x.com', 1), ('b@x.com', 2), ('a@x.com', 3)])
+
+    def test_upgrade_cleans_ip_addresses(self):
+        """Test que upgrade compacta las IP y deja en NULL los valores que no son IP"""
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                'CREATE TABLE blacklist (email VARCHAR(255) PRIMARY KEY, app_uuid VARCHAR(36) NOT NULL, '
+                'blocked_reason VARCHAR(255), ip_address VARCHAR(45), created_at DATETIME, updated_at DATETIME)'
+            ))
+            for email, ip_address in (('a@x.com', '10.0.0.1'), ('b@x.com', '2001:0db8:0:0:0:0:0:1'),
+                                      ('c@x.com', 'https'), ('d@x.com', 'Root=1-67891233-abcdef'),
+                                      ('e@x.com', None)):
+                connection.execute(text(
+                    "INSERT INTO blacklist (email, app_uuid, ip_address) VALUES (:email, 'x', :ip_address)"
+                ), {'email': email, 'ip_address': ip_address})
+
+        upgrade(directory=MIGRATIONS_DIR)
+
+        with db.engine.connect() as connection:
+            rows = connection.execute(text('SELECT email, ip_address FROM blacklist ORDER BY email')).all()
+        self.assertEqual([tuple(row) for row in rows], [
+            ('a@x.com', '10.0.0.1'), ('b@x.com', '2001:db8::1'), ('c@x.com', None),
+            ('d@x.com', None), ('e@x.com', None),
+        ])
+
+    def test_downgrade_to_base(self):
+        """Test que downgrade deshace las migraciones"""
+        upgrade(directory=MIGRATIONS_DIR)
+        downgrade(directory=MIGRATIONS_DIR, revision='base')
+
+        self.assertFalse(inspect(db.engine).has_table('blacklist'))
+
+
+if __name__ == '__main__':
+    unittest.main()